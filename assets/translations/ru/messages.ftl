@@ -151,7 +151,10 @@ msg-invite-reward = { $value }{ $reward_strategy_type ->
 msg-dashboard-main = <b>🛠 Панель управления</b>
 msg-users-main = <b>👥 Пользователи</b>
 msg-broadcast-main = <b>📢 Рассылка</b>
-msg-statistics-main = { $statistics }
+msg-statistics-main =
+    { $statistics }
+
+    <i>Обновлено: { $updated_at }</i>
     
 msg-statistics-users =
     <b>👥 Статистика по пользователям</b>
@@ -1038,8 +1041,15 @@ msg-importer-import-completed =
     <blockquote>
     • <b>Всего пользователей</b>: { $total_count }
     • <b>Успешно импортированы</b>: { $success_count }
+    • <b>Уже есть в панели</b>: { $skipped_count }
     • <b>Не удалось импортировать</b>: { $failed_count }
     </blockquote>
+    { $failed_count ->
+    [0] { empty }
+    *[HAS]
+    <b>❌ Не импортированы:</b>
+    <blockquote expandable>{ $failed_usernames }</blockquote>
+    }
 
 msg-importer-sync-completed =
     <b>📥 Синхронизация пользователей завершена</b>
@@ -1052,6 +1062,7 @@ msg-importer-sync-completed =
     Новые пользователи: { $added_users }
     Добавлены подписки: { $added_subscription }
     Обновлены подписки: { $updated}
+    Без изменений: { $unchanged }
     
     Пользователи без Telegram ID: { $missing_telegram }
     Ошибки при синхронизации: { $errors }
@@ -448,4 +448,4 @@ ntf-importer-import-started = <i>✅ Импорт пользователей з
 ntf-importer-sync-started = <i>✅ Синхронизация пользователей запущена, ожидайте...</i>
 ntf-importer-users-not-found = <i>❌ Не удалось найти пользователей для синхронизации.</i>
 ntf-importer-not-support = <i>⚠️ Импорт всех данных из 3xui-shop временно недоступен. Вы можете воспользоваться импортом из панели 3X-UI!</i>
-ntf-importer-sync-already-running = <i>⚠️ Синхронизация пользователей уже была запущена, ожидайте...</i>
\ No newline at end of file
+ntf-importer-sync-already-running = <i>⚠️ Синхронизация пользователей уже была запущена, ожидайте... Обработано: { $processed } из { $total }.</i>
\ No newline at end of file
@@ -22,6 +22,8 @@ def create_app(config: AppConfig, dispatcher: Dispatcher) -> FastAPI:
     telegram_webhook_endpoint = TelegramWebhookEndpoint(
         dispatcher=dispatcher,
         secret_token=config.bot.secret_token.get_secret_value(),
+        max_inflight_updates=config.bot.max_inflight_updates,
+        max_pending_updates=config.bot.max_pending_updates,
     )
     telegram_webhook_endpoint.register(app=app, path=config.bot.webhook_path)
     app.state.telegram_webhook_endpoint = telegram_webhook_endpoint
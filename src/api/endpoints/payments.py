@@ -38,7 +38,22 @@ async def payments_webhook(
             return Response(status_code=status.HTTP_404_NOT_FOUND)
 
         payment_id, payment_status = await gateway.handle_webhook(request)
-        await handle_payment_transaction_task.kiq(payment_id, payment_status)
+
+        # Gateways retry aggressively: a (payment, status) claim only covers the
+        # in-flight task and is dropped if it fails, transitions are idempotent anyway
+        if not await payment_gateway_service.claim_webhook(
+            gateway_enum, payment_id, payment_status
+        ):
+            return Response(status_code=status.HTTP_200_OK)
+
+        try:
+            await handle_payment_transaction_task.kiq(
+                payment_id, payment_status, gateway_type=gateway_enum
+            )
+        except Exception:
+            await payment_gateway_service.release_webhook(gateway_enum, payment_id, payment_status)
+            raise
+
         return Response(status_code=status.HTTP_200_OK)
 
     except Exception as exception:
@@ -1,19 +1,22 @@
-import traceback
-from typing import cast
+import secrets
+from typing import Annotated
 
-from aiogram.utils.formatting import Text
 from dishka import FromDishka
 from dishka.integrations.fastapi import inject
-from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
 from loguru import logger
+from redis.asyncio import Redis
 from remnapy.controllers import WebhookUtility
-from remnapy.models.webhook import NodeDto, UserDto, UserHwidDeviceEventDto
 
+from src.api.remnawave_events import get_metrics
 from src.core.config import AppConfig
-from src.core.constants import API_V1, REMNAWAVE_WEBHOOK_PATH
-from src.core.utils.message_payload import MessagePayload
-from src.services.notification import NotificationService
-from src.services.remnawave import RemnawaveService
+from src.core.constants import (
+    API_V1,
+    REMNAWAVE_EVENT_STREAM_MAXLEN,
+    REMNAWAVE_METRICS_PATH,
+    REMNAWAVE_WEBHOOK_PATH,
+)
+from src.core.storage.keys import RemnawaveEventStreamKey
 
 router = APIRouter(prefix=API_V1)
 
@@ -23,8 +26,7 @@ router = APIRouter(prefix=API_V1)
 async def remnawave_webhook(
     request: Request,
     config: FromDishka[AppConfig],
-    remnawave_service: FromDishka[RemnawaveService],
-    notification_service: FromDishka[NotificationService],
+    redis_client: FromDishka[Redis],
 ) -> Response:
     try:
         raw_body = await request.body()
@@ -44,41 +46,40 @@ async def remnawave_webhook(
         logger.warning("Payload is empty after validation")
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    try:
-        if WebhookUtility.is_user_event(payload.event):
-            user = cast(UserDto, WebhookUtility.get_typed_data(payload))
-            await remnawave_service.handle_user_event(payload.event, user)
+    if not (
+        WebhookUtility.is_user_event(payload.event)
+        or WebhookUtility.is_user_hwid_devices_event(payload.event)
+        or WebhookUtility.is_node_event(payload.event)
+    ):
+        logger.warning(f"Unhandled Remnawave event type '{payload.event}'")
+        return Response(status_code=status.HTTP_200_OK)
 
-        elif WebhookUtility.is_user_hwid_devices_event(payload.event):
-            event = cast(UserHwidDeviceEventDto, WebhookUtility.get_typed_data(payload))
-            await remnawave_service.handle_device_event(
-                payload.event,
-                event.user,
-                event.hwid_user_device,
-            )
+    # Handled by RemnawaveEventConsumer; if the event can not be queued the panel retries it
+    try:
+        await redis_client.xadd(
+            RemnawaveEventStreamKey().pack(),
+            {"body": raw_body},
+            maxlen=REMNAWAVE_EVENT_STREAM_MAXLEN,
+            approximate=True,
+        )
+    except Exception as exception:
+        logger.error(f"Failed to queue Remnawave event '{payload.event}': {exception}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-        elif WebhookUtility.is_node_event(payload.event):
-            node = cast(NodeDto, WebhookUtility.get_typed_data(payload))
-            await remnawave_service.handle_node_event(payload.event, node)
+    return Response(status_code=status.HTTP_200_OK)
 
-        else:
-            logger.warning(f"Unhandled Remnawave event type '{payload.event}'")
 
-    except Exception as exception:
-        logger.exception(f"Failed to process Remnawave webhook due to '{exception}'")
-        traceback_str = traceback.format_exc()
-        error_type_name = type(exception).__name__
-        error_message = Text(str(exception)[:512])
+@router.get(REMNAWAVE_METRICS_PATH)
+@inject
+async def remnawave_metrics(
+    authorization: Annotated[str, Header()],
+    config: FromDishka[AppConfig],
+    redis_client: FromDishka[Redis],
+) -> dict[str, float]:
+    # Authorized with the webhook secret: 'Authorization: Bearer <REMNAWAVE_WEBHOOK_SECRET>'
+    secret = config.remnawave.webhook_secret.get_secret_value()
 
-        await notification_service.error_notify(
-            traceback_str=traceback_str,
-            payload=MessagePayload.not_deleted(
-                i18n_key="ntf-event-error",
-                i18n_kwargs={
-                    "user": False,
-                    "error": f"{error_type_name}: {error_message.as_html()}",
-                },
-            ),
-        )
+    if not secrets.compare_digest(authorization, f"Bearer {secret}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
 
-    return Response(status_code=status.HTTP_200_OK)
+    return await get_metrics(redis_client)
@@ -0,0 +1,417 @@
+import asyncio
+import time
+import traceback
+from typing import Any, Optional, cast
+from uuid import uuid4
+
+from aiogram.utils.formatting import Text
+from dishka import AsyncContainer, Scope
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+from remnapy.controllers import WebhookUtility
+from remnapy.models.webhook import NodeDto, UserDto, UserHwidDeviceEventDto, WebhookPayloadDto
+
+from src.core.config.remnawave import RemnawaveConfig
+from src.core.constants import (
+    POLLING_HEARTBEAT_INTERVAL,
+    POLLING_LEASE_TTL,
+    POLLING_RETRY_DELAY,
+    REMNAWAVE_EVENT_BATCH_SIZE,
+    REMNAWAVE_EVENT_GROUP,
+)
+from src.core.storage.keys import (
+    RemnawaveEventLeaderKey,
+    RemnawaveEventMetricsKey,
+    RemnawaveEventStreamKey,
+)
+from src.core.utils import json_utils
+from src.core.utils.message_payload import MessagePayload
+from src.infrastructure.redis.lease import hold_lease, release_lease, renew_lease
+from src.services.notification import NotificationService
+from src.services.remnawave import RemnawaveService
+
+# (entry id, payload); the payload is None for entries trimmed from the stream
+StreamEntry = tuple[bytes, Optional[WebhookPayloadDto]]
+
+
+def get_lane(payload: WebhookPayloadDto) -> str:
+    # Events sharing a lane are handled one at a time, in the order they arrived
+    data = payload.data
+
+    if isinstance(data, UserHwidDeviceEventDto):
+        data = data.user
+
+    if isinstance(data, UserDto):
+        return f"user:{data.telegram_id or data.uuid}"
+
+    if isinstance(data, NodeDto):
+        return f"node:{data.uuid}"
+
+    return f"event:{payload.event}"
+
+
+def get_coalesce_key(payload: WebhookPayloadDto) -> str:
+    if isinstance(payload.data, UserHwidDeviceEventDto):
+        return f"{payload.event}:{payload.data.hwid_user_device.hwid}"
+
+    return payload.event
+
+
+def coalesce(payloads: list[WebhookPayloadDto]) -> list[WebhookPayloadDto]:
+    # Only the latest occurrence of an event carries the current state, so a burst of
+    # 'user.modified' ends up as a single sync with the freshest snapshot
+    latest: dict[str, WebhookPayloadDto] = {}
+
+    for payload in payloads:
+        key = get_coalesce_key(payload)
+        latest.pop(key, None)
+        latest[key] = payload
+
+    return list(latest.values())
+
+
+def get_entry_age(entry_id: bytes) -> float:
+    # Stream ids start with the millisecond timestamp the entry was appended at
+    return max(0.0, time.time() - int(entry_id.split(b"-")[0]) / 1000)
+
+
+class RemnawaveEventConsumer:
+    # The webhook endpoint only validates events and appends them to a Redis stream. One
+    # process (the leader) consumes it: events read within the coalescing window are grouped
+    # per user, collapsed, and every user is handled in order while users run concurrently.
+
+    def __init__(
+        self,
+        container: AsyncContainer,
+        redis_client: Redis,
+        config: RemnawaveConfig,
+    ) -> None:
+        self.container = container
+        self.redis_client = redis_client
+        self.workers = config.event_workers
+        self.window = config.event_coalesce_window
+        self.worker_id = uuid4().hex
+
+        self._semaphore = asyncio.Semaphore(self.workers)
+        self._leading = asyncio.Event()
+        self._last_id: Any = "0"
+        self._lag = 0.0
+        self._claimed_at = 0.0
+        self._consumer: Optional[asyncio.Task[None]] = None
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def start(self) -> None:
+        try:
+            await self.redis_client.xgroup_create(
+                RemnawaveEventStreamKey().pack(),
+                REMNAWAVE_EVENT_GROUP,
+                id="0",
+                mkstream=True,
+            )
+        except ResponseError as exception:
+            if "BUSYGROUP" not in str(exception):
+                raise
+
+        self._consumer = asyncio.create_task(self._consume(), name="remnawave-events")
+        self._tasks = [
+            self._consumer,
+            asyncio.create_task(self._heartbeat(), name="remnawave-events-heartbeat"),
+        ]
+        logger.info(
+            f"Remnawave event consumer started as '{self.worker_id}' "
+            f"(workers: {self.workers}, window: {self.window}s)"
+        )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        await release_lease(self.redis_client, RemnawaveEventLeaderKey().pack(), self.worker_id)
+        logger.info("Remnawave event consumer stopped")
+
+    #
+
+    async def _heartbeat(self) -> None:
+        key = RemnawaveEventLeaderKey().pack()
+
+        while True:
+            # Holding the lease without consuming would stall the stream for every replica
+            if self._consumer is None or self._consumer.done():
+                logger.error("Remnawave event consumer is not running, giving up the lease")
+                self._leading.clear()
+                await release_lease(self.redis_client, key, self.worker_id)
+                return
+
+            try:
+                if await self._hold_lease(key):
+                    if not self._leading.is_set():
+                        logger.info("Became the Remnawave event consumer leader")
+                        self._claimed_at = 0.0
+                        self._leading.set()
+
+                    await self._report()
+                elif self._leading.is_set():
+                    logger.warning("Lost the Remnawave event consumer lease")
+                    self._leading.clear()
+            except Exception as exception:
+                logger.warning(f"Remnawave event heartbeat failed: {exception}")
+
+            await asyncio.sleep(POLLING_HEARTBEAT_INTERVAL)
+
+    async def _consume(self) -> None:
+        while True:
+            await self._leading.wait()
+
+            try:
+                await self._consume_once()
+            except Exception as exception:
+                logger.exception(f"Failed to consume Remnawave events: {exception}")
+                # Whatever was read but not acknowledged is read again from our pending list
+                self._last_id = "0"
+                await asyncio.sleep(POLLING_RETRY_DELAY)
+
+    async def _consume_once(self) -> None:
+        # Between batches nothing of ours is in flight, so re-reading our pending list is safe
+        if time.monotonic() - self._claimed_at > POLLING_HEARTBEAT_INTERVAL:
+            await self._claim_pending()
+            self._claimed_at = time.monotonic()
+
+        entries = await self._collect()
+
+        if not entries:
+            return
+
+        # The flag lags behind the lease by up to a heartbeat. Entries read after the lease
+        # is lost stay pending, and the next leader claims them once they have been idle
+        # for a full lease.
+        if not await self._still_leading():
+            return
+
+        lanes: dict[str, list[WebhookPayloadDto]] = {}
+        for _, payload in entries:
+            if payload is not None:
+                lanes.setdefault(get_lane(payload), []).append(payload)
+
+        results = await asyncio.gather(*(self._process(events) for events in lanes.values()))
+        handled = sum(handled for handled, _ in results)
+        failed = sum(failed for _, failed in results)
+
+        entry_ids = [entry_id for entry_id, _ in entries]
+        self._lag = get_entry_age(entry_ids[-1])
+
+        if not await self._still_leading():
+            return
+
+        metrics_key = RemnawaveEventMetricsKey().pack()
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.xack(RemnawaveEventStreamKey().pack(), REMNAWAVE_EVENT_GROUP, *entry_ids)
+            pipe.hincrby(metrics_key, "received", len(entries))
+            pipe.hincrby(metrics_key, "handled", handled)
+            pipe.hincrby(metrics_key, "failed", failed)
+            await pipe.execute()
+
+        logger.debug(
+            f"Handled '{handled}' of '{len(entries)}' Remnawave events "
+            f"for '{len(lanes)}' lanes (failed: {failed}, lag: {self._lag:.2f}s)"
+        )
+
+    async def _collect(self) -> list[StreamEntry]:
+        # Wait for the first event, then keep reading until the window closes
+        entries = await self._read(REMNAWAVE_EVENT_BATCH_SIZE, POLLING_HEARTBEAT_INTERVAL)
+
+        if not entries:
+            return entries
+
+        deadline = time.monotonic() + self.window
+
+        while len(entries) < REMNAWAVE_EVENT_BATCH_SIZE and self._leading.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            entries += await self._read(REMNAWAVE_EVENT_BATCH_SIZE - len(entries), remaining)
+
+        return entries
+
+    async def _read(self, count: int, block: float) -> list[StreamEntry]:
+        # Entries delivered to us but never acknowledged come first, in order
+        is_pending = self._last_id != ">"
+
+        response = await self.redis_client.xreadgroup(
+            REMNAWAVE_EVENT_GROUP,
+            self.worker_id,
+            {RemnawaveEventStreamKey().pack(): self._last_id},
+            count=count,
+            block=None if is_pending else max(1, int(block * 1000)),
+        )
+        entries = response[0][1] if response else []
+
+        if is_pending:
+            self._last_id = entries[-1][0] if entries else ">"
+
+        return [(entry_id, self._parse(entry_id, fields)) for entry_id, fields in entries]
+
+    def _parse(
+        self, entry_id: bytes, fields: Optional[dict[bytes, bytes]]
+    ) -> Optional[WebhookPayloadDto]:
+        if not fields:
+            return None
+
+        try:
+            return WebhookPayloadDto.from_dict(json_utils.decode(fields[b"body"]))
+        except Exception as exception:
+            logger.error(f"Dropping malformed Remnawave event '{entry_id!r}': {exception}")
+            return None
+
+    async def _process(self, payloads: list[WebhookPayloadDto]) -> tuple[int, int]:
+        events = coalesce(payloads)
+        failed = 0
+
+        async with self._semaphore:
+            try:
+                async with self.container(scope=Scope.REQUEST) as container:
+                    remnawave_service: RemnawaveService = await container.get(RemnawaveService)
+
+                    for payload in events:
+                        try:
+                            await self._dispatch(remnawave_service, payload)
+                        except Exception as exception:
+                            failed += 1
+                            await self._notify_error(container, payload, exception)
+            except Exception as exception:
+                # Resolving the dependencies failed, the remaining events of this lane are lost
+                logger.exception(f"Failed to process Remnawave event lane: {exception}")
+                return len(events), len(events)
+
+        return len(events), failed
+
+    async def _dispatch(
+        self, remnawave_service: RemnawaveService, payload: WebhookPayloadDto
+    ) -> None:
+        if WebhookUtility.is_user_event(payload.event):
+            user = cast(UserDto, WebhookUtility.get_typed_data(payload))
+            await remnawave_service.handle_user_event(payload.event, user)
+
+        elif WebhookUtility.is_user_hwid_devices_event(payload.event):
+            event = cast(UserHwidDeviceEventDto, WebhookUtility.get_typed_data(payload))
+            await remnawave_service.handle_device_event(
+                payload.event,
+                event.user,
+                event.hwid_user_device,
+            )
+
+        elif WebhookUtility.is_node_event(payload.event):
+            node = cast(NodeDto, WebhookUtility.get_typed_data(payload))
+            await remnawave_service.handle_node_event(payload.event, node)
+
+        else:
+            logger.warning(f"Unhandled Remnawave event type '{payload.event}'")
+
+    async def _notify_error(
+        self,
+        container: AsyncContainer,
+        payload: WebhookPayloadDto,
+        exception: Exception,
+    ) -> None:
+        logger.exception(
+            f"Failed to process Remnawave event '{payload.event}' due to '{exception}'"
+        )
+        error_type_name = type(exception).__name__
+        error_message = Text(str(exception)[:512])
+
+        try:
+            notification_service = await container.get(NotificationService)
+            await notification_service.error_notify(
+                traceback_str=traceback.format_exc(),
+                payload=MessagePayload.not_deleted(
+                    i18n_key="ntf-event-error",
+                    i18n_kwargs={
+                        "user": False,
+                        "error": f"{error_type_name}: {error_message.as_html()}",
+                    },
+                ),
+            )
+        except Exception as notify_exception:
+            logger.warning(f"Failed to send Remnawave event error notification: {notify_exception}")
+
+    #
+
+    async def _report(self) -> None:
+        # 'backlog' counts entries not yet delivered to the consumer, 'pending' those delivered
+        # but not acknowledged, 'lag' is the age of the last acknowledged event at that moment
+        groups = await self.redis_client.xinfo_groups(RemnawaveEventStreamKey().pack())
+        group = next(
+            (
+                g
+                for g in groups
+                if g["name"] in (REMNAWAVE_EVENT_GROUP, REMNAWAVE_EVENT_GROUP.encode())
+            ),
+            None,
+        )
+
+        if group is None:
+            return
+
+        backlog = group.get("lag") or 0
+        pending = group.get("pending") or 0
+
+        await self.redis_client.hset(  # type: ignore[misc]
+            RemnawaveEventMetricsKey().pack(),
+            mapping={
+                "backlog": backlog,
+                "pending": pending,
+                "lag": round(self._lag, 3),
+                "updated_at": int(time.time()),
+            },
+        )
+
+        if backlog or pending:
+            logger.info(
+                f"Remnawave events backlog: '{backlog}', pending: '{pending}', "
+                f"lag: '{self._lag:.2f}s'"
+            )
+
+    async def _claim_pending(self) -> None:
+        # Take over what earlier leaders left unacknowledged. An entry idle for less than
+        # a lease may still be handled by a leader that has not noticed it lost the lease.
+        stream = RemnawaveEventStreamKey().pack()
+        cursor: Any = "0-0"
+        total = 0
+
+        while True:
+            cursor, claimed, *_ = await self.redis_client.xautoclaim(
+                stream,
+                REMNAWAVE_EVENT_GROUP,
+                self.worker_id,
+                min_idle_time=POLLING_LEASE_TTL * 1000,
+                start_id=cursor,
+                count=REMNAWAVE_EVENT_BATCH_SIZE,
+            )
+            total += len(claimed)
+
+            if cursor in (b"0-0", "0-0"):
+                break
+
+        if total:
+            logger.info(f"Claimed '{total}' pending Remnawave events")
+            self._last_id = "0"
+
+    async def _still_leading(self) -> bool:
+        key = RemnawaveEventLeaderKey().pack()
+
+        if await renew_lease(self.redis_client, key, self.worker_id, POLLING_LEASE_TTL):
+            return True
+
+        logger.warning("Lost the Remnawave event consumer lease, leaving the batch pending")
+        self._leading.clear()
+        return False
+
+    async def _hold_lease(self, key: str) -> bool:
+        return await hold_lease(self.redis_client, key, self.worker_id, POLLING_LEASE_TTL)
+
+
+async def get_metrics(redis_client: Redis) -> dict[str, float]:
+    metrics = await redis_client.hgetall(RemnawaveEventMetricsKey().pack())  # type: ignore[misc]
+    return {field.decode(): float(value) for field, value in metrics.items()}
@@ -4,6 +4,7 @@ from src.bot.middlewares.base import EventTypedMiddleware
 
 from .access import AccessMiddleware
 from .channel import ChannelMiddleware
+from .context import ContextMiddleware
 from .error import ErrorMiddleware
 from .garbage import GarbageMiddleware
 from .rules import RulesMiddleware
@@ -17,6 +18,7 @@ __all__ = [
 
 def setup_middlewares(router: Router) -> None:
     outer_middlewares: list[EventTypedMiddleware] = [
+        ContextMiddleware(),
         ErrorMiddleware(),
         AccessMiddleware(),
         UserMiddleware(),
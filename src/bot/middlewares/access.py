@@ -5,11 +5,12 @@ from aiogram.types import User as AiogramUser
 from dishka import AsyncContainer
 from loguru import logger
 
-from src.core.constants import CONTAINER_KEY
+from src.core.constants import CONTAINER_KEY, UPDATE_CONTEXT_KEY
 from src.core.enums import MiddlewareEventType
 from src.services.access import AccessService
 
 from .base import EventTypedMiddleware
+from .context import UpdateContext
 
 
 class AccessMiddleware(EventTypedMiddleware):
@@ -21,7 +22,8 @@ class AccessMiddleware(EventTypedMiddleware):
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
-        aiogram_user: Optional[AiogramUser] = self._get_aiogram_user(event)
+        context: UpdateContext = data[UPDATE_CONTEXT_KEY]
+        aiogram_user: Optional[AiogramUser] = context.aiogram_user
 
         if aiogram_user is None or aiogram_user.is_bot:
             logger.warning("Terminating middleware: event from bot or missing user")
@@ -30,7 +32,12 @@ class AccessMiddleware(EventTypedMiddleware):
         container: AsyncContainer = data[CONTAINER_KEY]
         access_service: AccessService = await container.get(AccessService)
 
-        if not await access_service.is_access_allowed(aiogram_user=aiogram_user, event=event):
+        if not await access_service.is_access_allowed(
+            aiogram_user=aiogram_user,
+            event=event,
+            user=context.user,
+            settings=context.settings,
+        ):
             return
 
         return await handler(event, data)
@@ -9,14 +9,22 @@ from dishka import AsyncContainer
 from loguru import logger
 
 from src.bot.keyboards import CALLBACK_CHANNEL_CONFIRM, get_channel_keyboard, get_user_keyboard
-from src.core.constants import CONTAINER_KEY, USER_KEY
+from src.core.constants import (
+    CHANNEL_MEMBER_TTL,
+    CHANNEL_NON_MEMBER_TTL,
+    CONTAINER_KEY,
+    UPDATE_CONTEXT_KEY,
+    USER_KEY,
+)
 from src.core.enums import MiddlewareEventType
+from src.core.storage.keys import ChannelMemberKey
 from src.core.utils.message_payload import MessagePayload
 from src.infrastructure.database.models.dto import UserDto
+from src.infrastructure.redis import RedisRepository
 from src.services.notification import NotificationService
-from src.services.settings import SettingsService
 
 from .base import EventTypedMiddleware
+from .context import UpdateContext
 
 ALLOWED_STATUSES = (
     ChatMemberStatus.CREATOR,
@@ -36,9 +44,10 @@ class ChannelMiddleware(EventTypedMiddleware):
     ) -> Any:
         container: AsyncContainer = data[CONTAINER_KEY]
         user: UserDto = data[USER_KEY]
-        settings_service: SettingsService = await container.get(SettingsService)
+        context: UpdateContext = data[UPDATE_CONTEXT_KEY]
+        settings = context.settings
 
-        if not await settings_service.is_channel_required():
+        if not settings.channel_required:
             return await handler(event, data)
 
         if user.is_privileged:
@@ -47,8 +56,7 @@ class ChannelMiddleware(EventTypedMiddleware):
 
         bot: Bot = await container.get(Bot)
         notification_service: NotificationService = await container.get(NotificationService)
-
-        settings = await settings_service.get()
+        redis_repository: RedisRepository = await container.get(RedisRepository)
 
         chat_id: Union[str, int, None] = None
         channel_link = settings.channel_link.get_secret_value()
@@ -63,11 +71,26 @@ class ChannelMiddleware(EventTypedMiddleware):
             )
             return await handler(event, data)
 
+        key = ChannelMemberKey(chat_id=str(chat_id).lower(), telegram_id=user.telegram_id)
+        # A confirm click always re-checks, the user has most likely just joined
+        status = None
+        if not self._is_click_confirm(event):
+            status = await redis_repository.get(key, ChatMemberStatus)
+
         try:
-            member = await bot.get_chat_member(
-                chat_id=chat_id,
-                user_id=user.telegram_id,
-            )
+            if status is None:
+                member = await bot.get_chat_member(
+                    chat_id=chat_id,
+                    user_id=user.telegram_id,
+                )
+                status = member.status
+                await redis_repository.set(
+                    key,
+                    status,
+                    ex=(
+                        CHANNEL_MEMBER_TTL if status in ALLOWED_STATUSES else CHANNEL_NON_MEMBER_TTL
+                    ),
+                )
         except Exception as exception:
             traceback_str = traceback.format_exc()
             error_type_name = type(exception).__name__
@@ -91,11 +114,11 @@ class ChannelMiddleware(EventTypedMiddleware):
             )
             return await handler(event, data)
 
-        if member.status in ALLOWED_STATUSES:
+        if status in ALLOWED_STATUSES:
             if self._is_click_confirm(event):
                 await self._delete_channel_message(event)
 
-            logger.debug(f"User '{user.telegram_id}' passed channel check. Status: {member.status}")
+            logger.debug(f"User '{user.telegram_id}' passed channel check. Status: {status}")
             # TODO: Auto confirming
             return await handler(event, data)
 
@@ -113,7 +136,7 @@ class ChannelMiddleware(EventTypedMiddleware):
             logger.debug(f"User '{user.telegram_id}' failed channel check")
             return
 
-        if member.status == ChatMemberStatus.LEFT:
+        if status == ChatMemberStatus.LEFT:
             i18n_key = "ntf-channel-join-required-left"
         else:
             i18n_key = "ntf-channel-join-required"
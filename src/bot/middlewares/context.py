@@ -0,0 +1,79 @@
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram.types import TelegramObject
+from aiogram.types import User as AiogramUser
+from dishka import AsyncContainer
+from loguru import logger
+
+from src.core.constants import CONTAINER_KEY, UPDATE_CONTEXT_KEY
+from src.core.enums import MiddlewareEventType
+from src.core.utils.update_stats import UpdateStats, update_stats
+from src.infrastructure.database.models.dto import SettingsDto, UserDto
+from src.services.settings import SettingsService
+from src.services.user import UserService
+
+from .base import EventTypedMiddleware
+
+
+class UpdateContext:
+    __slots__ = ("aiogram_user", "user", "settings")
+
+    def __init__(
+        self,
+        aiogram_user: Optional[AiogramUser],
+        user: Optional[UserDto],
+        settings: SettingsDto,
+    ) -> None:
+        self.aiogram_user = aiogram_user
+        self.user = user
+        self.settings = settings
+
+
+class ContextMiddleware(EventTypedMiddleware):
+    __event_types__ = [
+        MiddlewareEventType.MESSAGE,
+        MiddlewareEventType.CALLBACK_QUERY,
+        MiddlewareEventType.ERROR,
+        MiddlewareEventType.AIOGD_UPDATE,
+        MiddlewareEventType.MY_CHAT_MEMBER,
+        MiddlewareEventType.PRE_CHECKOUT_QUERY,
+    ]
+
+    async def middleware_logic(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        stats = UpdateStats()
+        token = update_stats.set(stats)
+        started_at = time.perf_counter()
+        aiogram_user: Optional[AiogramUser] = self._get_aiogram_user(event)
+
+        try:
+            data[UPDATE_CONTEXT_KEY] = await self._load_context(aiogram_user, data)
+            return await handler(event, data)
+        finally:
+            update_stats.reset(token)
+            logger.debug(
+                f"{type(event).__name__} from '{aiogram_user.id if aiogram_user else None}' "
+                f"handled in {(time.perf_counter() - started_at) * 1000:.1f}ms: "
+                f"'{stats.queries}' SQL queries, '{stats.redis_calls}' Redis calls"
+            )
+
+    async def _load_context(
+        self,
+        aiogram_user: Optional[AiogramUser],
+        data: dict[str, Any],
+    ) -> UpdateContext:
+        container: AsyncContainer = data[CONTAINER_KEY]
+        settings_service: SettingsService = await container.get(SettingsService)
+        user: Optional[UserDto] = None
+
+        if aiogram_user is not None and not aiogram_user.is_bot:
+            user_service: UserService = await container.get(UserService)
+            user = await user_service.get(telegram_id=aiogram_user.id)
+
+        settings = await settings_service.get()
+        return UpdateContext(aiogram_user=aiogram_user, user=user, settings=settings)
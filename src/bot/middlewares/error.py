@@ -13,16 +13,16 @@ from aiogram_dialog.api.exceptions import (
 from dishka import AsyncContainer
 
 from src.bot.keyboards import get_user_keyboard
-from src.core.constants import CONTAINER_KEY
+from src.core.constants import CONTAINER_KEY, UPDATE_CONTEXT_KEY
 from src.core.enums import MiddlewareEventType
 from src.core.exceptions import MenuRenderingError
 from src.core.utils.message_payload import MessagePayload
 from src.infrastructure.database.models.dto import UserDto
 from src.infrastructure.taskiq.tasks.redirects import redirect_to_main_menu_task
 from src.services.notification import NotificationService
-from src.services.user import UserService
 
 from .base import EventTypedMiddleware
+from .context import UpdateContext
 
 
 class ErrorMiddleware(EventTypedMiddleware):
@@ -34,7 +34,8 @@ class ErrorMiddleware(EventTypedMiddleware):
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
-        aiogram_user: Optional[AiogramUser] = self._get_aiogram_user(event)
+        context: UpdateContext = data[UPDATE_CONTEXT_KEY]
+        aiogram_user: Optional[AiogramUser] = context.aiogram_user
         error_event = cast(ErrorEvent, event)
 
         if isinstance(
@@ -58,8 +59,7 @@ class ErrorMiddleware(EventTypedMiddleware):
 
         if aiogram_user:
             reply_markup = get_user_keyboard(aiogram_user.id)
-            user_service: UserService = await container.get(UserService)
-            user: Optional[UserDto] = await user_service.get(telegram_id=aiogram_user.id)
+            user: Optional[UserDto] = context.user
 
             if user and not user.is_dev and not isinstance(error, MenuRenderingError):
                 await redirect_to_main_menu_task.kiq(aiogram_user.id)
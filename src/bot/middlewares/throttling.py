@@ -1,25 +1,60 @@
-from typing import Any, Awaitable, Callable
+import time
+from typing import Any, Awaitable, Callable, Final
+from uuid import uuid4
 
 from aiogram.types import TelegramObject
-from cachetools import TTLCache
 from dishka import AsyncContainer
 from loguru import logger
+from redis.asyncio import Redis
 
-from src.core.constants import CONTAINER_KEY, USER_KEY
+from src.core.constants import (
+    CONTAINER_KEY,
+    DEFAULT_THROTTLING_BUDGET,
+    THROTTLING_BUDGETS,
+    THROTTLING_HITS_BUCKET,
+    THROTTLING_HITS_TTL,
+    USER_KEY,
+)
 from src.core.enums import MiddlewareEventType
+from src.core.storage.keys import ThrottlingHitsKey, ThrottlingNotifiedKey, ThrottlingWindowKey
 from src.core.utils.message_payload import MessagePayload
 from src.infrastructure.database.models.dto import UserDto
 from src.services.notification import NotificationService
 
 from .base import EventTypedMiddleware
 
+# Returns {verdict, hits}. The verdict is 0 when the event is allowed, 1 when throttled
+# and the user should be told about it, 2 when throttled and already notified within the
+# window. Hits is how many events of this type were throttled in the current bucket.
+SLIDING_WINDOW_SCRIPT: Final[str] = """
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", now - window)
+
+if redis.call("ZCARD", KEYS[1]) < limit then
+    redis.call("ZADD", KEYS[1], now, ARGV[3])
+    redis.call("PEXPIRE", KEYS[1], window)
+    return {0, 0}
+end
+
+local hits = redis.call("HINCRBY", KEYS[3], ARGV[4], 1)
+if hits == 1 then
+    redis.call("EXPIRE", KEYS[3], ARGV[5])
+end
+
+if redis.call("SET", KEYS[2], 1, "NX", "PX", window) then
+    return {1, hits}
+end
+return {2, hits}
+"""
+
 
 class ThrottlingMiddleware(EventTypedMiddleware):
     __event_types__ = [MiddlewareEventType.MESSAGE, MiddlewareEventType.CALLBACK_QUERY]
 
-    def __init__(self, ttl: float = 0.5) -> None:
-        self.cache: TTLCache[int, Any] = TTLCache(maxsize=10_000, ttl=ttl)
-
     async def middleware_logic(
         self,
         handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
@@ -29,15 +64,38 @@ class ThrottlingMiddleware(EventTypedMiddleware):
         container: AsyncContainer = data[CONTAINER_KEY]
         user: UserDto = data[USER_KEY]
 
-        notification_service: NotificationService = await container.get(NotificationService)
+        event_type = type(event).__name__
+        limit, window = THROTTLING_BUDGETS.get(event_type, DEFAULT_THROTTLING_BUDGET)
+        redis_client: Redis = await container.get(Redis)
 
-        if user.telegram_id in self.cache:
+        try:
+            verdict, hits = await redis_client.eval(  # type: ignore[misc]
+                SLIDING_WINDOW_SCRIPT,
+                3,
+                ThrottlingWindowKey(event_type=event_type, telegram_id=user.telegram_id).pack(),
+                ThrottlingNotifiedKey(telegram_id=user.telegram_id).pack(),
+                ThrottlingHitsKey(bucket=int(time.time()) // THROTTLING_HITS_BUCKET).pack(),
+                limit,
+                window,
+                uuid4().hex,
+                event_type,
+                THROTTLING_HITS_TTL,
+            )
+        except Exception as exception:
+            logger.warning(f"Throttling check failed, letting event through: {exception}")
+            return await handler(event, data)
+
+        if not verdict:
+            return await handler(event, data)
+
+        logger.warning(
+            f"User '{user.telegram_id}' throttled ({event_type}), "
+            f"'{hits}' throttled {event_type} events this hour"
+        )
+
+        if verdict == 1:
+            notification_service: NotificationService = await container.get(NotificationService)
             await notification_service.notify_user(
                 user=user,
                 payload=MessagePayload(i18n_key="ntf-throttling-many-requests"),
             )
-            logger.warning(f"User '{user.telegram_id}' throttled")
-            return
-
-        self.cache[user.telegram_id] = None
-        return await handler(event, data)
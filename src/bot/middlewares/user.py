@@ -8,7 +8,7 @@ from loguru import logger
 
 from src.bot.keyboards import get_user_keyboard
 from src.core.config import AppConfig
-from src.core.constants import CONTAINER_KEY, IS_SUPER_DEV_KEY, USER_KEY
+from src.core.constants import CONTAINER_KEY, IS_SUPER_DEV_KEY, UPDATE_CONTEXT_KEY, USER_KEY
 from src.core.enums import MiddlewareEventType, SystemNotificationType
 from src.core.utils.message_payload import MessagePayload
 from src.infrastructure.database.models.dto import UserDto
@@ -17,6 +17,7 @@ from src.services.referral import ReferralService
 from src.services.user import UserService
 
 from .base import EventTypedMiddleware
+from .context import UpdateContext
 
 
 class UserMiddleware(EventTypedMiddleware):
@@ -35,7 +36,8 @@ class UserMiddleware(EventTypedMiddleware):
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
-        aiogram_user: Optional[AiogramUser] = self._get_aiogram_user(event)
+        context: UpdateContext = data[UPDATE_CONTEXT_KEY]
+        aiogram_user: Optional[AiogramUser] = context.aiogram_user
 
         if aiogram_user is None or aiogram_user.is_bot:
             logger.warning("Terminating middleware: event from bot or missing user")
@@ -46,7 +48,7 @@ class UserMiddleware(EventTypedMiddleware):
         config: AppConfig = await container.get(AppConfig)
         user_service: UserService = await container.get(UserService)
         referral_service: ReferralService = await container.get(ReferralService)
-        user: Optional[UserDto] = await user_service.get(telegram_id=aiogram_user.id)
+        user: Optional[UserDto] = context.user
 
         if user is None:
             user = await user_service.create(aiogram_user)
@@ -82,10 +84,14 @@ class UserMiddleware(EventTypedMiddleware):
                 logger.info(f"Registered with referral code: '{referral_code}'")
                 await referral_service.handle_referral(user, referral_code)
 
-        elif not isinstance(aiogram_user, FakeUser):
-            await user_service.compare_and_update(user, aiogram_user)
+            await user_service.track_activity(user)
+        else:
+            await user_service.track_activity(
+                user,
+                None if isinstance(aiogram_user, FakeUser) else aiogram_user,
+            )
 
-        await user_service.update_recent_activity(telegram_id=user.telegram_id)
+        context.user = user
         data[USER_KEY] = user
         data[IS_SUPER_DEV_KEY] = user.telegram_id == config.bot.dev_id
 
@@ -0,0 +1,339 @@
+import asyncio
+import math
+import time
+from collections import defaultdict
+from typing import Any, Optional
+from uuid import uuid4
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import GetUpdates
+from aiogram.types import Update
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from src.core.config.bot import BotConfig
+from src.core.constants import (
+    POLLING_HEARTBEAT_INTERVAL,
+    POLLING_LEASE_TTL,
+    POLLING_RETRY_DELAY,
+    POLLING_TIMEOUT,
+    UPDATE_DRAIN_TIMEOUT,
+    UPDATE_STREAM_BATCH_SIZE,
+    UPDATE_STREAM_GROUP,
+    UPDATE_STREAM_MAXLEN,
+)
+from src.core.storage.keys import (
+    PollingLeaderKey,
+    PollingOffsetKey,
+    UpdatePartitionLeaseKey,
+    UpdateStreamKey,
+    UpdateWorkersKey,
+)
+from src.core.utils import json_utils
+from src.infrastructure.redis.lease import hold_lease, release_lease
+
+from .update_pool import UpdatePool, feed_update, get_chat_key
+
+
+class UpdateStreamIngestion:
+    # One process (the leader) pulls updates with getUpdates and appends them to Redis
+    # streams partitioned by chat. Every process leases a share of the partitions and
+    # feeds them through its own UpdatePool, so a chat is only ever handled by one process.
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        redis_client: Redis,
+        config: BotConfig,
+        allowed_updates: list[str],
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.redis_client = redis_client
+        self.partitions = config.update_partitions
+        self.allowed_updates = allowed_updates
+        self.worker_id = uuid4().hex
+
+        self.update_pool = UpdatePool(
+            handler=self._handle_update,
+            workers=config.max_inflight_updates,
+            max_pending=config.max_pending_updates,
+        )
+        self._readers: dict[int, asyncio.Task[None]] = {}
+        self._releasing: set[int] = set()
+        self._submitted: defaultdict[int, set[bytes]] = defaultdict(set)
+        self._entries: dict[int, tuple[int, bytes, Optional[asyncio.Task[Any]]]] = {}
+        self._tasks: list[asyncio.Task[None]] = []
+        self._rebalanced_at = time.monotonic()
+
+    async def start(self) -> None:
+        for partition in range(self.partitions):
+            await self._ensure_group(UpdateStreamKey(partition=partition).pack())
+
+        self.update_pool.start()
+        self._tasks = [
+            asyncio.create_task(self._poll(), name="update-poller"),
+            asyncio.create_task(self._rebalance(), name="update-partitions"),
+        ]
+        logger.info(
+            f"Update stream ingestion started as '{self.worker_id}' ({self.partitions} partitions)"
+        )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        self._releasing.update(self._readers)
+        await asyncio.gather(*self._readers.values(), return_exceptions=True)
+        await self.update_pool.close(timeout=UPDATE_DRAIN_TIMEOUT)
+
+        await release_lease(self.redis_client, PollingLeaderKey().pack(), self.worker_id)
+        await self.redis_client.zrem(UpdateWorkersKey().pack(), self.worker_id)
+        logger.info("Update stream ingestion stopped")
+
+    #
+
+    async def _poll(self) -> None:
+        while True:
+            # A Redis or network failure must not end ingestion, the next round retries it
+            try:
+                if not await self._poll_once():
+                    await asyncio.sleep(POLLING_HEARTBEAT_INTERVAL)
+            except Exception as exception:
+                logger.warning(f"Failed to ingest updates: {exception}")
+                await asyncio.sleep(POLLING_RETRY_DELAY)
+
+    async def _poll_once(self) -> bool:
+        if not await self._hold_lease(PollingLeaderKey().pack()):
+            return False
+
+        offset = await self.redis_client.get(PollingOffsetKey().pack())
+        updates = await self.bot(
+            GetUpdates(
+                offset=int(offset) if offset else None,
+                timeout=POLLING_TIMEOUT,
+                allowed_updates=self.allowed_updates,
+            ),
+            request_timeout=POLLING_TIMEOUT + POLLING_RETRY_DELAY,
+        )
+
+        if not updates:
+            return True
+
+        # The offset moves together with the appended updates, so a new leader
+        # neither skips nor duplicates them
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            for update in updates:
+                partition = get_chat_key(update) % self.partitions
+                pipe.xadd(
+                    UpdateStreamKey(partition=partition).pack(),
+                    {"update": update.model_dump_json(by_alias=True, exclude_none=True)},
+                    maxlen=UPDATE_STREAM_MAXLEN,
+                    approximate=True,
+                )
+            pipe.set(PollingOffsetKey().pack(), updates[-1].update_id + 1)
+            await pipe.execute()
+
+        logger.debug(f"Appended '{len(updates)}' updates to update streams")
+        return True
+
+    async def _rebalance(self) -> None:
+        while True:
+            try:
+                await self._rebalance_once()
+                self._rebalanced_at = time.monotonic()
+            except Exception as exception:
+                logger.warning(f"Failed to rebalance update partitions: {exception}")
+
+                # Our partition leases have expired by now and may be held by another process
+                if time.monotonic() - self._rebalanced_at > POLLING_LEASE_TTL:
+                    for partition in list(self._readers):
+                        logger.warning(f"Stopping update partition '{partition}', lease expired")
+                        self._readers.pop(partition).cancel()
+
+                await asyncio.sleep(POLLING_RETRY_DELAY)
+                continue
+
+            await asyncio.sleep(POLLING_HEARTBEAT_INTERVAL)
+
+    async def _rebalance_once(self) -> None:
+        workers_key = UpdateWorkersKey().pack()
+        now = time.time()
+
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.zadd(workers_key, {self.worker_id: now})
+            pipe.zremrangebyscore(workers_key, "-inf", now - POLLING_LEASE_TTL)
+            pipe.zcard(workers_key)
+            *_, workers = await pipe.execute()
+
+        share = math.ceil(self.partitions / max(1, workers))
+
+        # Partitions being released keep their lease until the last update is acknowledged
+        for partition in list(self._readers):
+            lease = UpdatePartitionLeaseKey(partition=partition).pack()
+            if not await self._hold_lease(lease):
+                logger.warning(f"Lost lease for update partition '{partition}'")
+                self._readers.pop(partition).cancel()
+
+        owned = [p for p in self._readers if p not in self._releasing]
+
+        for partition in owned[share:]:
+            self._releasing.add(partition)
+
+        for partition in range(self.partitions):
+            if len(owned) >= share:
+                break
+            if partition in self._readers:
+                continue
+
+            if await self._hold_lease(UpdatePartitionLeaseKey(partition=partition).pack()):
+                owned.append(partition)
+                self._readers[partition] = asyncio.create_task(
+                    self._read_partition(partition),
+                    name=f"update-partition-{partition}",
+                )
+
+    async def _read_partition(self, partition: int) -> None:
+        stream = UpdateStreamKey(partition=partition).pack()
+        reader = asyncio.current_task()
+        logger.info(f"Consuming update partition '{partition}'")
+
+        try:
+            # Entries delivered to us but never acknowledged come first, in order
+            await self._claim_pending(stream, partition)
+            claimed_at = time.monotonic()
+            last_id: Any = "0"
+
+            while partition not in self._releasing:
+                # Entries still too fresh to take over at startup are picked up later
+                if last_id == ">" and time.monotonic() - claimed_at > POLLING_HEARTBEAT_INTERVAL:
+                    for entry_id, fields in await self._claim_pending(stream, partition):
+                        await self._submit(partition, entry_id, fields)
+                    claimed_at = time.monotonic()
+
+                response = await self.redis_client.xreadgroup(
+                    UPDATE_STREAM_GROUP,
+                    self.worker_id,
+                    {stream: last_id},
+                    count=UPDATE_STREAM_BATCH_SIZE,
+                    block=None if last_id != ">" else POLLING_HEARTBEAT_INTERVAL * 1000,
+                )
+                entries = response[0][1] if response else []
+
+                if last_id != ">" and not entries:
+                    last_id = ">"
+                    continue
+
+                for entry_id, fields in entries:
+                    await self._submit(partition, entry_id, fields)
+                    if last_id != ">":
+                        last_id = entry_id
+
+            while self._submitted[partition]:
+                await asyncio.sleep(0.1)
+        finally:
+            self._releasing.discard(partition)
+
+            # A lost partition was already dropped by the rebalancer and is not ours to release
+            if self._readers.get(partition) is reader:
+                del self._readers[partition]
+
+                try:
+                    await release_lease(
+                        self.redis_client,
+                        UpdatePartitionLeaseKey(partition=partition).pack(),
+                        self.worker_id,
+                    )
+                except Exception as exception:
+                    # Left to expire on its own
+                    logger.warning(f"Failed to release update partition '{partition}': {exception}")
+
+                logger.info(f"Released update partition '{partition}'")
+
+    async def _submit(self, partition: int, entry_id: bytes, fields: dict[bytes, bytes]) -> None:
+        update = Update.model_validate(
+            json_utils.decode(fields[b"update"]),
+            context={"bot": self.bot},
+        )
+
+        while self.update_pool.pending >= self.update_pool.max_pending:
+            await asyncio.sleep(0.1)
+
+        self._entries[update.update_id] = (partition, entry_id, asyncio.current_task())
+        self._submitted[partition].add(entry_id)
+
+        if not self.update_pool.submit(update):
+            self._entries.pop(update.update_id, None)
+            self._submitted[partition].discard(entry_id)
+
+    async def _handle_update(self, update: Update) -> None:
+        partition, entry_id, reader = self._entries.pop(update.update_id)
+
+        # Once the lease is lost the entry belongs to the next owner, who claims it
+        # after it has been idle for a full lease. Neither handle nor acknowledge it here.
+        try:
+            if self._readers.get(partition) is reader:
+                await feed_update(self.dispatcher, self.bot, update)
+            else:
+                logger.warning(
+                    f"Dropping update '{update.update_id}', lost update partition '{partition}'"
+                )
+        finally:
+            self._submitted[partition].discard(entry_id)
+
+            if self._readers.get(partition) is reader:
+                await self.redis_client.xack(
+                    UpdateStreamKey(partition=partition).pack(),
+                    UPDATE_STREAM_GROUP,
+                    entry_id,
+                )
+
+    #
+
+    async def _ensure_group(self, stream: str) -> None:
+        try:
+            await self.redis_client.xgroup_create(
+                stream, UPDATE_STREAM_GROUP, id="0", mkstream=True
+            )
+        except ResponseError as exception:
+            if "BUSYGROUP" not in str(exception):
+                raise
+
+    async def _claim_pending(
+        self,
+        stream: str,
+        partition: int,
+    ) -> list[tuple[bytes, dict[bytes, bytes]]]:
+        # Take over what previous owners left unacknowledged. An entry idle for less than
+        # a lease may still be handled by a process that has not noticed it lost the lease.
+        cursor: Any = "0-0"
+        pending: list[tuple[bytes, dict[bytes, bytes]]] = []
+
+        while True:
+            cursor, claimed, *_ = await self.redis_client.xautoclaim(
+                stream,
+                UPDATE_STREAM_GROUP,
+                self.worker_id,
+                min_idle_time=POLLING_LEASE_TTL * 1000,
+                start_id=cursor,
+                count=UPDATE_STREAM_BATCH_SIZE,
+            )
+            pending.extend(
+                (entry_id, fields)
+                for entry_id, fields in claimed
+                if fields and entry_id not in self._submitted[partition]
+            )
+
+            if cursor in (b"0-0", "0-0"):
+                break
+
+        if pending:
+            logger.info(f"Claimed '{len(pending)}' pending updates from '{stream}'")
+
+        return pending
+
+    async def _hold_lease(self, key: str) -> bool:
+        return await hold_lease(self.redis_client, key, self.worker_id, POLLING_LEASE_TTL)
@@ -24,6 +24,7 @@ from src.core.utils.formatters import format_username_to_url
 from src.core.utils.message_payload import MessagePayload
 from src.core.utils.validators import is_double_click
 from src.infrastructure.database.models.dto import BroadcastDto, PlanDto, UserDto
+from src.infrastructure.database.repositories import LoadProfile
 from src.infrastructure.taskiq.tasks.broadcast import delete_broadcast_task, send_broadcast_task
 from src.services.broadcast import BroadcastService
 from src.services.notification import NotificationService
@@ -288,23 +289,20 @@ async def on_send(
         raise ValueError("BroadcastAudience not found in dialog data")
 
     if is_double_click(dialog_manager, key="broadcast_confirm", cooldown=10):
-        users = await broadcast_service.get_audience_users(audience, plan_id=plan_id)
+        audience_count = await broadcast_service.get_audience_count(audience, plan_id=plan_id)
 
         task_id = uuid.uuid4()
         broadcast = BroadcastDto(
             task_id=task_id,
             status=BroadcastStatus.PROCESSING,
-            total_count=len(users),
+            total_count=audience_count,
             audience=audience,
+            plan_id=plan_id,
             payload=payload,
         )
         broadcast = await broadcast_service.create(broadcast)
 
-        task = (
-            await send_broadcast_task.kicker()
-            .with_task_id(str(task_id))
-            .kiq(broadcast, users, payload)
-        )
+        task = await send_broadcast_task.kicker().with_task_id(str(task_id)).kiq(broadcast, payload)
 
         dialog_manager.dialog_data["task_id"] = task.task_id
         await dialog_manager.switch_to(state=DashboardBroadcast.VIEW)
@@ -358,7 +356,8 @@ async def on_delete(
 ) -> None:
     user: UserDto = dialog_manager.middleware_data[USER_KEY]
     task_id = dialog_manager.dialog_data["task_id"]
-    broadcast = await broadcast_service.get(task_id)
+    # Deleting needs every sent message
+    broadcast = await broadcast_service.get(task_id, profile=LoadProfile.FULL)
 
     if not broadcast:
         raise ValueError(f"Broadcast '{task_id}' not found")
@@ -5,6 +5,8 @@ from dishka import FromDishka
 from dishka.integrations.aiogram_dialog import inject
 from remnapy import RemnawaveSDK
 
+from src.core.constants import IMPORT_REPORT_MAX_USERNAMES
+
 
 async def from_xui_getter(
     dialog_manager: DialogManager,
@@ -52,7 +54,17 @@ async def import_completed_getter(
     **kwargs: Any,
 ) -> dict[str, Any]:
     completed: dict = dialog_manager.dialog_data["completed"]
-    return completed
+    failed_usernames: list[str] = completed["failed_usernames"]
+    hidden = len(failed_usernames) - IMPORT_REPORT_MAX_USERNAMES
+
+    return {
+        "total_count": completed["total"],
+        "success_count": completed["created"],
+        "skipped_count": completed["skipped"],
+        "failed_count": completed["failed"],
+        "failed_usernames": ", ".join(failed_usernames[:IMPORT_REPORT_MAX_USERNAMES])
+        + (f" (+{hidden})" if hidden > 0 else ""),
+    }
 
 
 async def sync_completed_getter(
@@ -11,7 +11,7 @@ from loguru import logger
 from remnapy import RemnawaveSDK
 
 from src.bot.states import DashboardImporter
-from src.core.constants import USER_KEY
+from src.core.constants import SYNC_RUNNING_TTL, USER_KEY
 from src.core.storage.keys import SyncRunningKey
 from src.core.utils.formatters import format_user_log as log
 from src.core.utils.message_payload import MessagePayload
@@ -166,16 +166,11 @@ async def on_import_all_xui(
 
     logger.info(f"{log(user)} Started import '{len(users['all'])}' users")
     result = await task.wait_result()
-    success_count, failed_count = result.return_value
 
     if notification:
         await notification.delete()
 
-    dialog_manager.dialog_data["completed"] = {
-        "total_count": len(users["all"]),
-        "success_count": success_count,
-        "failed_count": failed_count,
-    }
+    dialog_manager.dialog_data["completed"] = result.return_value
     await dialog_manager.switch_to(state=DashboardImporter.IMPORT_COMPLETED)
 
 
@@ -206,16 +201,11 @@ async def on_import_active_xui(
     task = await import_exported_users_task.kiq(users["active"], selected_squads)
     logger.info(f"{log(user)} Started import '{len(users['active'])}' users")
     result = await task.wait_result()
-    success_count, failed_count = result.return_value
 
     if notification:
         await notification.delete()
 
-    dialog_manager.dialog_data["completed"] = {
-        "total_count": len(users["active"]),
-        "success_count": success_count,
-        "failed_count": failed_count,
-    }
+    dialog_manager.dialog_data["completed"] = result.return_value
     await dialog_manager.switch_to(state=DashboardImporter.IMPORT_COMPLETED)
 
 
@@ -232,45 +222,75 @@ async def on_sync(
     dialog_manager.dialog_data["selected_bot"] = selected_bot
     key = SyncRunningKey()
 
-    if await redis_repository.get(key, str, False):
-        await notification_service.notify_user(
-            user=user,
-            payload=MessagePayload(i18n_key="ntf-importer-sync-already-running"),
-        )
+    progress = await redis_repository.get(key, dict[str, int])
+
+    if progress is not None:
+        await _notify_sync_running(notification_service, user, progress)
         return
 
-    if is_double_click(
+    if not is_double_click(
         dialog_manager,
         key="sync_confirm",
         cooldown=10,
     ):
-        await redis_repository.set(key, value=True, ex=3600)
-
-        notification = await notification_service.notify_user(
+        await notification_service.notify_user(
             user=user,
-            payload=MessagePayload.not_deleted(i18n_key="ntf-importer-sync-started"),
+            payload=MessagePayload(i18n_key="ntf-double-click-confirm"),
         )
+        return
 
-        task = await sync_all_users_from_panel_task.kiq()
-        result = await task.wait_result()
-        result = result.return_value
+    # The scheduled incremental sync claims the same key, only one of them may win
+    if not await redis_repository.set(
+        key,
+        value={"processed": 0, "total": 0},
+        ex=SYNC_RUNNING_TTL,
+        nx=True,
+    ):
+        progress = await redis_repository.get(key, dict[str, int])
+        await _notify_sync_running(notification_service, user, progress or {})
+        return
 
-        if not result:
-            await notification_service.notify_user(
-                user=user,
-                payload=MessagePayload(i18n_key="ntf-importer-users-not-found"),
-            )
-            return
+    notification = await notification_service.notify_user(
+        user=user,
+        payload=MessagePayload.not_deleted(i18n_key="ntf-importer-sync-started"),
+    )
 
-        dialog_manager.dialog_data["completed"] = result
+    try:
+        task = await sync_all_users_from_panel_task.kiq()
+    except Exception:
+        await redis_repository.delete(key)
+        raise
 
-        if notification:
-            await notification.delete()
+    result = await task.wait_result()
+    result = result.return_value
 
-        await dialog_manager.switch_to(state=DashboardImporter.SYNC_COMPLETED)
+    if not result:
+        await notification_service.notify_user(
+            user=user,
+            payload=MessagePayload(i18n_key="ntf-importer-users-not-found"),
+        )
         return
 
+    dialog_manager.dialog_data["completed"] = result
+
+    if notification:
+        await notification.delete()
+
+    await dialog_manager.switch_to(state=DashboardImporter.SYNC_COMPLETED)
+
+
+async def _notify_sync_running(
+    notification_service: NotificationService,
+    user: UserDto,
+    progress: dict[str, int],
+) -> None:
     await notification_service.notify_user(
         user=user,
-        payload=MessagePayload(i18n_key="ntf-double-click-confirm"),
+        payload=MessagePayload(
+            i18n_key="ntf-importer-sync-already-running",
+            i18n_kwargs={
+                "processed": progress.get("processed", 0),
+                "total": progress.get("total", 0),
+            },
+        ),
     )
@@ -62,6 +62,7 @@ async def duration_getter(
     dialog_manager: DialogManager,
     user: UserDto,
     i18n: FromDishka[TranslatorRunner],
+    plan_service: FromDishka[PlanService],
     settings_service: FromDishka[SettingsService],
     pricing_service: FromDishka[PricingService],
     **kwargs: Any,
@@ -72,14 +73,20 @@ async def duration_getter(
     if not plan:
         raise ValueError("PlanDto not found in dialog data")
 
+    catalog = await plan_service.get_catalog()
     currency = await settings_service.get_default_currency()
+    matrix = pricing_service.calculate_matrix(user, catalog.get_prices(plan))
     only_single_plan = dialog_manager.dialog_data.get("only_single_plan", False)
     dialog_manager.dialog_data["is_free"] = False
     durations = []
 
     for duration in plan.durations:
+        price = matrix.get(duration.days, {}).get(currency)
+
+        if price is None:
+            continue
+
         key, kw = i18n_format_days(duration.days)
-        price = pricing_service.calculate(user, duration.get_price(currency), currency)
         durations.append(
             {
                 "days": duration.days,
@@ -108,6 +115,7 @@ async def duration_getter(
 @inject
 async def payment_method_getter(
     dialog_manager: DialogManager,
+    plan_service: FromDishka[PlanService],
     payment_gateway_service: FromDishka[PaymentGatewayService],
     i18n: FromDishka[TranslatorRunner],
     **kwargs: Any,
@@ -118,6 +126,7 @@ async def payment_method_getter(
     if not plan:
         raise ValueError("PlanDto not found in dialog data")
 
+    catalog = await plan_service.get_catalog()
     gateways = await payment_gateway_service.filter_active()
     selected_duration = dialog_manager.dialog_data["selected_duration"]
     only_single_duration = dialog_manager.dialog_data.get("only_single_duration", False)
@@ -126,12 +135,16 @@ async def payment_method_getter(
     if not duration:
         raise ValueError(f"Duration '{selected_duration}' not found in plan '{plan.name}'")
 
+    prices = catalog.get_prices(plan).get(duration.days, {})
     payment_methods = []
     for gateway in gateways:
+        if gateway.currency not in prices:
+            continue
+
         payment_methods.append(
             {
                 "gateway_type": gateway.type,
-                "price": duration.get_price(gateway.currency),
+                "price": prices[gateway.currency],
                 "currency": gateway.currency.symbol,
             }
         )
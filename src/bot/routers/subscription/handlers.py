@@ -56,21 +56,23 @@ async def _create_payment_and_get_data(
     plan: PlanDto,
     duration_days: int,
     gateway_type: PaymentGatewayType,
+    plan_service: PlanService,
     payment_gateway_service: PaymentGatewayService,
     notification_service: NotificationService,
     pricing_service: PricingService,
 ) -> Optional[CachedPaymentData]:
     user: UserDto = dialog_manager.middleware_data[USER_KEY]
-    duration = plan.get_duration(duration_days)
+    catalog = await plan_service.get_catalog()
+    prices = catalog.get_prices(plan).get(duration_days, {})
     payment_gateway = await payment_gateway_service.get_by_type(gateway_type)
     purchase_type: PurchaseType = dialog_manager.dialog_data["purchase_type"]
 
-    if not duration or not payment_gateway:
+    if not payment_gateway or payment_gateway.currency not in prices:
         logger.error(f"{log(user)} Failed to find duration or gateway for payment creation")
         return None
 
-    transaction_plan = PlanSnapshotDto.from_plan(plan, duration.days)
-    price = duration.get_price(payment_gateway.currency)
+    transaction_plan = PlanSnapshotDto.from_plan(plan, duration_days)
+    price = prices[payment_gateway.currency]
     pricing = pricing_service.calculate(user, price, payment_gateway.currency)
 
     try:
@@ -265,6 +267,7 @@ async def on_subscription_plans(  # noqa: C901
                     plan=plans[0],
                     duration_days=plans[0].durations[0].days,
                     gateway_type=gateways[0].type,
+                    plan_service=plan_service,
                     payment_gateway_service=payment_gateway_service,
                     notification_service=notification_service,
                     pricing_service=pricing_service,
@@ -296,7 +299,7 @@ async def on_plan_select(
     plan_service: FromDishka[PlanService],
 ) -> None:
     user: UserDto = dialog_manager.middleware_data[USER_KEY]
-    plan = await plan_service.get(plan_id=selected_plan)
+    plan = await plan_service.get_available_plan(user, plan_id=selected_plan)
 
     if not plan:
         raise ValueError(f"Selected plan '{selected_plan}' not found")
@@ -324,6 +327,7 @@ async def on_duration_select(
     widget: Select,
     dialog_manager: DialogManager,
     selected_duration: int,
+    plan_service: FromDishka[PlanService],
     settings_service: FromDishka[SettingsService],
     payment_gateway_service: FromDishka[PaymentGatewayService],
     notification_service: FromDishka[NotificationService],
@@ -339,11 +343,12 @@ async def on_duration_select(
     if not plan:
         raise ValueError("PlanDto not found in dialog data")
 
+    catalog = await plan_service.get_catalog()
     gateways = await payment_gateway_service.filter_active()
     currency = await settings_service.get_default_currency()
     price = pricing_service.calculate(
         user=user,
-        price=plan.get_duration(selected_duration).get_price(currency),  # type: ignore[union-attr]
+        price=catalog.get_prices(plan)[selected_duration][currency],
         currency=currency,
     )
     dialog_manager.dialog_data["is_free"] = price.is_free
@@ -368,6 +373,7 @@ async def on_duration_select(
             plan=plan,
             duration_days=selected_duration,
             gateway_type=selected_payment_method,
+            plan_service=plan_service,
             payment_gateway_service=payment_gateway_service,
             notification_service=notification_service,
             pricing_service=pricing_service,
@@ -389,6 +395,7 @@ async def on_payment_method_select(
     widget: Select,
     dialog_manager: DialogManager,
     selected_payment_method: PaymentGatewayType,
+    plan_service: FromDishka[PlanService],
     payment_gateway_service: FromDishka[PaymentGatewayService],
     notification_service: FromDishka[NotificationService],
     pricing_service: FromDishka[PricingService],
@@ -420,6 +427,7 @@ async def on_payment_method_select(
         plan=plan,
         duration_days=selected_duration,
         gateway_type=selected_payment_method,
+        plan_service=plan_service,
         payment_gateway_service=payment_gateway_service,
         notification_service=notification_service,
         pricing_service=pricing_service,
@@ -0,0 +1,158 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from loguru import logger
+
+from src.core.constants import UPDATE_POOL_REPORT_INTERVAL
+
+
+async def feed_update(dispatcher: Dispatcher, bot: Bot, update: Update) -> None:
+    result = await dispatcher.feed_update(bot=bot, update=update)
+    if isinstance(result, TelegramMethod):
+        await dispatcher.silent_call_request(bot=bot, result=result)
+
+
+def get_chat_key(update: Update) -> int:
+    event = update.event
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return int(user.id)
+
+    chat = getattr(event, "chat", None)
+    if chat is not None:
+        return int(chat.id)
+
+    # No chat to keep in order, negative ids never clash with Telegram ids
+    return -update.update_id - 2**53
+
+
+# Fixed number of workers; updates from the same chat are processed one at a time, in order
+class UpdatePool:
+    def __init__(
+        self,
+        handler: Callable[[Update], Awaitable[None]],
+        workers: int,
+        max_pending: int,
+    ) -> None:
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+
+        self.pending = 0
+        self.peak_pending = 0
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._lanes: dict[int, deque[Update]] = {}
+        self._ready: asyncio.Queue[int] = asyncio.Queue()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._closing = False
+
+    @property
+    def active_chats(self) -> int:
+        return len(self._lanes)
+
+    def start(self) -> None:
+        self._closing = False
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"update-worker-{index}")
+            for index in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._reporter(), name="update-pool-reporter"))
+        logger.info(f"Update pool started with '{self.workers}' workers")
+
+    def submit(self, update: Update) -> bool:
+        if self._closing or self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning(
+                f"Update '{update.update_id}' rejected, pool is "
+                f"{'closing' if self._closing else 'full'} (pending: {self.pending})"
+            )
+            return False
+
+        key = get_chat_key(update)
+        lane = self._lanes.get(key)
+
+        # A lane that exists is either queued or being processed by a worker
+        if lane is None:
+            self._lanes[key] = deque([update])
+            self._ready.put_nowait(key)
+        else:
+            lane.append(update)
+
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        self._idle.clear()
+
+        logger.debug(
+            f"Update '{update.update_id}' queued "
+            f"(pending: {self.pending}, chats: {self.active_chats})"
+        )
+        return True
+
+    async def close(self, timeout: float) -> None:
+        self._closing = True
+
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            logger.info("Update pool drained")
+        except asyncio.TimeoutError:
+            logger.warning(f"Update pool drain timed out, dropping '{self.pending}' updates")
+
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._report()
+        logger.info("Update pool stopped")
+
+    def _report(self) -> None:
+        logger.info(
+            f"Update pool: pending '{self.pending}', in flight '{self.in_flight}', "
+            f"chats '{self.active_chats}', peak pending '{self.peak_pending}', "
+            f"processed '{self.processed}', failed '{self.failed}', rejected '{self.rejected}'"
+        )
+
+    async def _reporter(self) -> None:
+        # Counters are cumulative, quiet intervals are not reported
+        reported: tuple[int, ...] = ()
+
+        while True:
+            await asyncio.sleep(UPDATE_POOL_REPORT_INTERVAL)
+            current = (self.pending, self.processed, self.rejected)
+
+            if current != reported:
+                self._report()
+                reported = current
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            lane = self._lanes[key]
+            update = lane.popleft()
+            self.in_flight += 1
+
+            try:
+                await self.handler(update)
+            except Exception as exception:
+                self.failed += 1
+                logger.exception(f"Failed to process update '{update.update_id}': {exception}")
+            finally:
+                self.in_flight -= 1
+                self.processed += 1
+                self.pending -= 1
+
+                if lane:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._lanes[key]
+
+                if not self.pending:
+                    self._idle.set()
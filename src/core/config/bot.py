@@ -4,6 +4,7 @@ from pydantic import SecretStr, field_validator
 from pydantic_core.core_schema import FieldValidationInfo
 
 from src.core.constants import API_V1, BOT_WEBHOOK_PATH, URL_PATTERN
+from src.core.enums import UpdateMode
 
 from .base import BaseConfig
 from .validators import validate_not_change_me, validate_username
@@ -21,6 +22,13 @@ class BotConfig(BaseConfig, env_prefix="BOT_"):
     setup_commands: bool = True
     use_banners: bool = True
 
+    update_mode: UpdateMode = UpdateMode.WEBHOOK
+    update_partitions: int = 8
+    max_inflight_updates: int = 32
+    max_pending_updates: int = 10_000
+    # Upper bound on how long a buffered profile change can stay out of the database
+    user_updates_flush_interval: int = 30
+
     @property
     def webhook_path(self) -> str:
         return f"{API_V1}{BOT_WEBHOOK_PATH}"
@@ -18,6 +18,10 @@ class RemnawaveConfig(BaseConfig, env_prefix="REMNAWAVE_"):
     webhook_secret: SecretStr
     cookie: SecretStr = SecretStr("")
 
+    event_workers: int = 16
+    event_coalesce_window: float = 2
+    import_concurrency: int = 8
+
     @property
     def is_external(self) -> bool:
         return self.host.get_secret_value() != "remnawave"
@@ -19,6 +19,7 @@ API_V1: Final[str] = "/api/v1"
 BOT_WEBHOOK_PATH: Final[str] = "/telegram"
 PAYMENTS_WEBHOOK_PATH: Final[str] = "/payments"
 REMNAWAVE_WEBHOOK_PATH: Final[str] = "/remnawave"
+REMNAWAVE_METRICS_PATH: Final[str] = "/remnawave/metrics"
 REPOSITORY: Final[str] = "https://github.com/snoups/remnashop"
 
 TIMEZONE: Final[timezone] = timezone.utc
@@ -35,13 +36,74 @@ CONTAINER_KEY: Final[str] = "dishka_container"
 CONFIG_KEY: Final[str] = "config"
 USER_KEY: Final[str] = "user"
 IS_SUPER_DEV_KEY: Final[str] = "is_super_dev"
+UPDATE_CONTEXT_KEY: Final[str] = "update_context"
 
 TIME_1M: Final[int] = 60
 TIME_5M: Final[int] = TIME_1M * 5
 TIME_10M: Final[int] = TIME_1M * 10
 
+UPDATE_DRAIN_TIMEOUT: Final[int] = 30
+UPDATE_POOL_REPORT_INTERVAL: Final[int] = TIME_1M
+UPDATE_STREAM_GROUP: Final[str] = "dispatchers"
+UPDATE_STREAM_MAXLEN: Final[int] = 100_000
+UPDATE_STREAM_BATCH_SIZE: Final[int] = 100
+POLLING_TIMEOUT: Final[int] = 20
+POLLING_RETRY_DELAY: Final[int] = 5
+POLLING_LEASE_TTL: Final[int] = 30
+POLLING_HEARTBEAT_INTERVAL: Final[int] = POLLING_LEASE_TTL // 3
+
+REMNAWAVE_EVENT_GROUP: Final[str] = "remnawave"
+REMNAWAVE_EVENT_STREAM_MAXLEN: Final[int] = 100_000
+REMNAWAVE_EVENT_BATCH_SIZE: Final[int] = 1000
+
+CACHE_LOCAL_MAX_SIZE: Final[int] = 1024
+CACHE_LOCAL_TTL: Final[int] = 10
+CACHE_INVALIDATION_CHANNEL: Final[str] = "cache:invalidate"
+PRICING_CACHE_SIZE: Final[int] = 4096
+
+BULK_INSERT_BATCH_SIZE: Final[int] = 1000
+
+PAYMENT_WEBHOOK_TTL: Final[int] = TIME_5M
+PAYMENT_FULFILMENT_TTL: Final[int] = TIME_1M * 60 * 24
+TRANSACTION_PENDING_TTL: Final[int] = TIME_1M * 30
+
+# Allowed events per sliding window: (limit, window in milliseconds)
+THROTTLING_BUDGETS: Final[dict[str, tuple[int, int]]] = {
+    "Message": (3, 2000),
+    "CallbackQuery": (6, 2000),
+}
+DEFAULT_THROTTLING_BUDGET: Final[tuple[int, int]] = (3, 2000)
+# Throttle hits are counted per event type in hourly buckets kept for a day
+THROTTLING_HITS_BUCKET: Final[int] = TIME_1M * 60
+THROTTLING_HITS_TTL: Final[int] = THROTTLING_HITS_BUCKET * 24
+
+CHANNEL_MEMBER_TTL: Final[int] = TIME_10M
+CHANNEL_NON_MEMBER_TTL: Final[int] = 15
+
 RECENT_REGISTERED_MAX_COUNT: Final[int] = 25
 RECENT_ACTIVITY_MAX_COUNT: Final[int] = 25
 
-BATCH_SIZE: Final[int] = 20
-BATCH_DELAY: Final[int] = 1
+AUDIENCE_BATCH_SIZE: Final[int] = 500
+BROADCAST_BATCH_SIZE: Final[int] = 100
+BROADCAST_SHARD_COUNT: Final[int] = 4
+BROADCAST_LEASE_TTL: Final[int] = TIME_1M
+BROADCAST_HEARTBEAT_INTERVAL: Final[int] = BROADCAST_LEASE_TTL // 3
+
+TELEGRAM_RATE_LIMIT: Final[float] = 25
+TELEGRAM_MIN_RATE_LIMIT: Final[float] = 1
+TELEGRAM_CHAT_INTERVAL: Final[float] = 1
+TELEGRAM_MAX_RETRIES: Final[int] = 3
+
+SYNC_PAGE_SIZE: Final[int] = 500
+SYNC_FETCH_CONCURRENCY: Final[int] = 4
+SYNC_WORKERS: Final[int] = 16
+SYNC_BATCH_SIZE: Final[int] = 200
+SYNC_RUNNING_TTL: Final[int] = TIME_1M * 60
+SYNC_CHECKPOINT_DRIFT: Final[int] = TIME_1M
+
+IMPORT_MAX_ATTEMPTS: Final[int] = 5
+IMPORT_RETRY_DELAY: Final[float] = 1
+IMPORT_RETRY_MAX_DELAY: Final[float] = 30
+IMPORT_CHECKPOINT_BATCH_SIZE: Final[int] = 100
+IMPORT_CHECKPOINT_TTL: Final[int] = TIME_1M * 60 * 24 * 7
+IMPORT_REPORT_MAX_USERNAMES: Final[int] = 100
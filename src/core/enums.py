@@ -262,6 +262,11 @@ class Currency(UpperStrEnum):
             raise ValueError(f"Unknown payment gateway type: '{gateway_type}'")
 
 
+class UpdateMode(UpperStrEnum):
+    WEBHOOK = auto()
+    POLLING = auto()  # getUpdates into Redis streams, consumed by every app process
+
+
 class AccessMode(UpperStrEnum):
     PUBLIC = auto()  # Access is allowed for everyone
     INVITED = auto()  # Invited users only
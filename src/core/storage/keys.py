@@ -1,3 +1,6 @@
+from typing import Optional
+from uuid import UUID
+
 from src.core.storage.key_builder import StorageKey
 
 
@@ -6,13 +9,97 @@ class WebhookLockKey(StorageKey, prefix="webhook_lock"):
     webhook_hash: str
 
 
+class PollingLeaderKey(StorageKey, prefix="polling_leader"): ...
+
+
+class PollingOffsetKey(StorageKey, prefix="polling_offset"): ...
+
+
+class UpdateStreamKey(StorageKey, prefix="update_stream"):
+    partition: int
+
+
+class UpdatePartitionLeaseKey(StorageKey, prefix="update_partition_lease"):
+    partition: int
+
+
+class UpdateWorkersKey(StorageKey, prefix="update_workers"): ...
+
+
+class RemnawaveEventStreamKey(StorageKey, prefix="remnawave_events"): ...
+
+
+class RemnawaveEventLeaderKey(StorageKey, prefix="remnawave_events_leader"): ...
+
+
+class RemnawaveEventMetricsKey(StorageKey, prefix="remnawave_events_metrics"): ...
+
+
+class PaymentWebhookKey(StorageKey, prefix="payment_webhook"):
+    gateway_type: str
+    payment_id: UUID
+    status: str
+
+
+class PaymentFulfilmentKey(StorageKey, prefix="payment_fulfilment"):
+    payment_id: UUID
+
+
 class LastNotifiedVersionKey(StorageKey, prefix="last_notified_version"): ...
 
 
 class SyncRunningKey(StorageKey, prefix="sync_running"): ...
 
 
+class SyncCheckpointKey(StorageKey, prefix="sync_checkpoint"): ...
+
+
+class SyncFailedUsersKey(StorageKey, prefix="sync_failed_users"): ...
+
+
+class ImportCheckpointKey(StorageKey, prefix="import_checkpoint"):
+    import_id: str
+
+
 class AccessWaitListKey(StorageKey, prefix="access_wait_list"): ...
 
 
+class ChannelMemberKey(StorageKey, prefix="channel_member"):
+    chat_id: str
+    telegram_id: int
+
+
 class RecentActivityUsersKey(StorageKey, prefix="recent_activity_users"): ...
+
+
+class PendingProfileUpdatesKey(StorageKey, prefix="pending_profile_updates"): ...
+
+
+class StatisticsSnapshotKey(StorageKey, prefix="statistics_snapshot"): ...
+
+
+class StatisticsCountersKey(StorageKey, prefix="statistics_counters"): ...
+
+
+class BroadcastLeaseKey(StorageKey, prefix="broadcast_lease"):
+    task_id: UUID
+    shard: Optional[int] = None
+
+
+class ThrottlingWindowKey(StorageKey, prefix="throttling_window"):
+    event_type: str
+    telegram_id: int
+
+
+class ThrottlingNotifiedKey(StorageKey, prefix="throttling_notified"):
+    telegram_id: int
+
+
+class ThrottlingHitsKey(StorageKey, prefix="throttling_hits"):
+    bucket: int
+
+
+class TelegramRateLimitKey(StorageKey, prefix="telegram_rate_limit"): ...
+
+
+class TelegramRatePauseKey(StorageKey, prefix="telegram_rate_pause"): ...
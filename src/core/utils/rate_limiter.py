@@ -0,0 +1,194 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Final, Optional, TypeVar
+
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from loguru import logger
+from redis.asyncio import Redis
+
+from src.core.constants import (
+    TELEGRAM_CHAT_INTERVAL,
+    TELEGRAM_MAX_RETRIES,
+    TELEGRAM_MIN_RATE_LIMIT,
+    TELEGRAM_RATE_LIMIT,
+)
+from src.core.storage.keys import TelegramRateLimitKey, TelegramRatePauseKey
+
+T = TypeVar("T")
+
+# Shared token bucket: returns the delay (in seconds) before a token is available,
+# consuming one when it is. Uses the Redis clock so workers on different hosts agree.
+TAKE_TOKEN_SCRIPT: Final[str] = """
+local pause = redis.call("PTTL", KEYS[2])
+if pause > 0 then
+    return tostring(pause / 1000)
+end
+
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local rate = tonumber(ARGV[1])
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+local tokens = tonumber(bucket[1]) or rate
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(rate, tokens + math.max(0, now - updated_at) * rate)
+
+local delay = 0
+if tokens < 1 then
+    delay = (1 - tokens) / rate
+else
+    tokens = tokens - 1
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "updated_at", tostring(now))
+redis.call("EXPIRE", KEYS[1], 60)
+return tostring(delay)
+"""
+
+
+class TelegramRateLimiter:
+    _CHAT_CLEANUP_THRESHOLD = 10_000
+    _RECOVERY_STEP = 0.1
+
+    def __init__(
+        self,
+        rate: float = TELEGRAM_RATE_LIMIT,
+        min_rate: float = TELEGRAM_MIN_RATE_LIMIT,
+        chat_interval: float = TELEGRAM_CHAT_INTERVAL,
+        max_retries: int = TELEGRAM_MAX_RETRIES,
+        redis_client: Optional[Redis] = None,
+    ) -> None:
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.rate = rate
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+
+        self._tokens = rate
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._chat_available_at: dict[int, float] = {}
+        self._lock = asyncio.Lock()
+        self._redis_client = redis_client
+
+    async def acquire(self, chat_id: Optional[int] = None) -> None:
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+
+                if self._redis_client is None:
+                    delay = self._get_delay(now, chat_id)
+                else:
+                    delay = self._get_chat_delay(now, chat_id)
+                    if delay <= 0:
+                        delay = await self._take_shared_token(self._redis_client)
+
+                if delay <= 0:
+                    if self._redis_client is None:
+                        self._tokens -= 1
+                    if chat_id is not None:
+                        self._reserve_chat(chat_id, now)
+                    return
+
+            await asyncio.sleep(delay)
+
+    async def execute(self, chat_id: Optional[int], func: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+
+        while True:
+            await self.acquire(chat_id)
+
+            try:
+                result = await func()
+            except TelegramRetryAfter as exception:
+                attempt += 1
+                await self.backoff(exception.retry_after)
+
+                if attempt > self.max_retries:
+                    raise
+
+                logger.warning(
+                    f"Flood control for chat '{chat_id}', retry after "
+                    f"'{exception.retry_after}'s (attempt {attempt}/{self.max_retries})"
+                )
+                continue
+            except (TelegramNetworkError, TelegramServerError) as exception:
+                attempt += 1
+
+                if attempt > self.max_retries:
+                    raise
+
+                delay = min(2**attempt, 30)
+                logger.warning(
+                    f"Transient error for chat '{chat_id}': {exception}. "
+                    f"Retrying in '{delay}'s (attempt {attempt}/{self.max_retries})"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self._recover()
+            return result
+
+    async def backoff(self, retry_after: float) -> None:
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + retry_after)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = min(self._tokens, self.rate)
+
+        if self._redis_client is not None:
+            await self._redis_client.set(
+                TelegramRatePauseKey().pack(),
+                1,
+                px=max(1, int(retry_after * 1000)),
+            )
+
+        logger.warning(
+            f"Rate limiter paused for '{retry_after}'s, rate lowered to '{self.rate:.2f}' msg/s"
+        )
+
+    def _recover(self) -> None:
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self._RECOVERY_STEP)
+
+    def _get_delay(self, now: float, chat_id: Optional[int]) -> float:
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        self._tokens = min(self.rate, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+        delay = self._get_chat_delay(now, chat_id)
+
+        if self._tokens < 1:
+            delay = max(delay, (1 - self._tokens) / self.rate)
+
+        return delay
+
+    def _get_chat_delay(self, now: float, chat_id: Optional[int]) -> float:
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        if chat_id is None:
+            return 0.0
+
+        return self._chat_available_at.get(chat_id, 0.0) - now
+
+    async def _take_shared_token(self, redis_client: Redis) -> float:
+        delay = await redis_client.eval(  # type: ignore[misc]
+            TAKE_TOKEN_SCRIPT,
+            2,
+            TelegramRateLimitKey().pack(),
+            TelegramRatePauseKey().pack(),
+            self.rate,
+        )
+        return float(delay)
+
+    def _reserve_chat(self, chat_id: int, now: float) -> None:
+        if len(self._chat_available_at) >= self._CHAT_CLEANUP_THRESHOLD:
+            self._chat_available_at = {
+                key: available_at
+                for key, available_at in self._chat_available_at.items()
+                if available_at > now
+            }
+
+        self._chat_available_at[chat_id] = now + self.chat_interval
@@ -0,0 +1,37 @@
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from redis.asyncio.connection import AbstractConnection
+
+
+class UpdateStats:
+    __slots__ = ("queries", "redis_calls")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.redis_calls = 0
+
+
+# Set for the duration of a single update; tasks spawned from it share the same counters
+update_stats: ContextVar[Optional[UpdateStats]] = ContextVar("update_stats", default=None)
+
+
+def count_query(*args: Any, **kwargs: Any) -> None:
+    stats = update_stats.get()
+    if stats is not None:
+        stats.queries += 1
+
+
+def counting_connection_class(
+    connection_class: type[AbstractConnection],
+) -> type[AbstractConnection]:
+    # One packed command is one round trip, so a pipeline counts once
+    class CountingConnection(connection_class):  # type: ignore[valid-type, misc]
+        async def send_packed_command(self, *args: Any, **kwargs: Any) -> None:
+            stats = update_stats.get()
+            if stats is not None:
+                stats.redis_calls += 1
+            await super().send_packed_command(*args, **kwargs)
+
+    CountingConnection.__name__ = f"Counting{connection_class.__name__}"
+    return CountingConnection
@@ -0,0 +1,301 @@
+# Query plan regression check for the hot repository queries.
+#
+#   python -m src.infrastructure.database.explain --seed 50000 --max-seq-rows 1000
+#
+# Seeds synthetic users, subscriptions, transactions, referrals and a broadcast with one
+# message per user, runs every query below
+# through the real repositories and replays each captured statement under
+# EXPLAIN (ANALYZE, BUFFERS). Exits with 1 when a plan falls back to a sequential scan
+# over more rows than allowed. Everything happens in one transaction that is rolled back,
+# so it is safe to point at a development database.
+#
+# Statistics aggregates scan whole tables by design and are not listed.
+
+import argparse
+import asyncio
+import sys
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Final, Iterator
+from uuid import uuid4
+
+from loguru import logger
+from remnapy.enums.users import TrafficLimitStrategy
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.core.config import AppConfig
+from src.core.constants import BROADCAST_BATCH_SIZE, BROADCAST_SHARD_COUNT
+from src.core.enums import (
+    BroadcastAudience,
+    BroadcastMessageStatus,
+    BroadcastStatus,
+    Currency,
+    Locale,
+    PaymentGatewayType,
+    PurchaseType,
+    ReferralLevel,
+    SubscriptionStatus,
+    TransactionStatus,
+    UserRole,
+)
+from src.core.utils import json_utils
+from src.core.utils.message_payload import MessagePayload
+from src.core.utils.time import datetime_now
+from src.infrastructure.database.models.dto import PlanSnapshotDto, PriceDetailsDto
+from src.infrastructure.database.models.sql import Broadcast, User
+from src.infrastructure.database.repositories import LoadProfile, RepositoriesFacade
+
+SEED_TELEGRAM_ID: Final[int] = 7_000_000_000
+SEED_PLANS: Final[int] = 10
+SAMPLE_TELEGRAM_ID: Final[int] = SEED_TELEGRAM_ID + 42
+SAMPLE_PLAN_ID: Final[int] = 3
+# Explicit id so the hot queries can address the seeded broadcast, rolled back with the rest
+SAMPLE_BROADCAST_ID: Final[int] = 2_000_000_000
+
+HotQuery = Callable[[RepositoriesFacade], Awaitable[Any]]
+
+HOT_QUERIES: Final[dict[str, HotQuery]] = {
+    "users.get": lambda r: r.users.get(SAMPLE_TELEGRAM_ID),
+    "users.get_recipients": lambda r: r.users.get_recipients(
+        User.is_blocked.is_(False),
+        User.is_bot_blocked.is_(False),
+        after_id=0,
+        limit=500,
+    ),
+    "subscriptions.get_all_by_user": lambda r: r.subscriptions.get_all_by_user(SAMPLE_TELEGRAM_ID),
+    "subscriptions.filter_by_plan_id": lambda r: r.subscriptions.filter_by_plan_id(
+        SAMPLE_PLAN_ID,
+        profile=LoadProfile.BARE,
+    ),
+    "subscriptions.count_active_users_by_plan": lambda r: (
+        r.subscriptions.count_active_users_by_plan(SAMPLE_PLAN_ID)
+    ),
+    "transactions.get_by_user": lambda r: r.transactions.get_by_user(SAMPLE_TELEGRAM_ID),
+    "transactions.cancel_stale": lambda r: r.transactions.cancel_stale(timedelta(minutes=30)),
+    "referrals.get_referral_by_referred": lambda r: r.referrals.get_referral_by_referred(
+        SAMPLE_TELEGRAM_ID
+    ),
+    "referrals.get_referrals_by_referrer": lambda r: r.referrals.get_referrals_by_referrer(
+        SAMPLE_TELEGRAM_ID
+    ),
+    "referrals.count_referrals_by_referrer": lambda r: r.referrals.count_referrals_by_referrer(
+        SAMPLE_TELEGRAM_ID
+    ),
+    "referrals.get_rewards_by_user": lambda r: r.referrals.get_rewards_by_user(SAMPLE_TELEGRAM_ID),
+    "broadcasts.get_by_status": lambda r: r.broadcasts.get_by_status(
+        BroadcastStatus.PROCESSING,
+        profile=LoadProfile.BARE,
+    ),
+    "broadcasts.get_message_by_user": lambda r: r.broadcasts.get_message_by_user(
+        SAMPLE_BROADCAST_ID, SAMPLE_TELEGRAM_ID
+    ),
+    "broadcasts.get_pending_recipients": lambda r: r.broadcasts.get_pending_recipients(
+        SAMPLE_BROADCAST_ID,
+        after_id=0,
+        limit=BROADCAST_BATCH_SIZE,
+        shard=1,
+        shard_count=BROADCAST_SHARD_COUNT,
+    ),
+}
+
+
+async def seed(repository: RepositoriesFacade, count: int) -> None:
+    telegram_ids = [SEED_TELEGRAM_ID + n for n in range(count)]
+    plan = PlanSnapshotDto.test().model_dump(mode="json")
+    expire_at = datetime_now() + timedelta(days=30)
+
+    await repository.users.create_many(
+        [
+            {
+                "telegram_id": telegram_id,
+                "referral_code": f"explain{telegram_id}",
+                "name": str(telegram_id),
+                "role": UserRole.USER,
+                "language": Locale.EN,
+                "personal_discount": 0,
+                "purchase_discount": 0,
+                "points": 0,
+                "is_blocked": n % 50 == 0,
+                "is_bot_blocked": n % 20 == 0,
+                "is_rules_accepted": True,
+            }
+            for n, telegram_id in enumerate(telegram_ids)
+        ]
+    )
+
+    subscriptions = await repository.subscriptions.create_many(
+        [
+            {
+                "user_remna_id": uuid4(),
+                "user_telegram_id": telegram_id,
+                "status": SubscriptionStatus.ACTIVE if n % 3 else SubscriptionStatus.EXPIRED,
+                "is_trial": n % 10 == 0,
+                "traffic_limit": -1,
+                "device_limit": -1,
+                "traffic_limit_strategy": TrafficLimitStrategy.NO_RESET,
+                "internal_squads": [],
+                "expire_at": expire_at,
+                "url": "",
+                "plan": {**plan, "id": n % SEED_PLANS},
+                "plan_id": n % SEED_PLANS,
+            }
+            for n, telegram_id in enumerate(telegram_ids)
+        ]
+    )
+    await repository.users.bulk_set_current_subscriptions(
+        {s.user_telegram_id: s.id for s in subscriptions}
+    )
+
+    await repository.transactions.create_many(
+        [
+            {
+                "payment_id": uuid4(),
+                "user_telegram_id": telegram_id,
+                "status": TransactionStatus.COMPLETED if n % 5 else TransactionStatus.PENDING,
+                "is_test": False,
+                "purchase_type": PurchaseType.NEW,
+                "gateway_type": PaymentGatewayType.TELEGRAM_STARS,
+                "pricing": PriceDetailsDto().model_dump(mode="json"),
+                "currency": Currency.XTR,
+                "plan": plan,
+            }
+            for n, telegram_id in enumerate(telegram_ids)
+        ]
+    )
+
+    referrers = max(1, count // 10)
+    await repository.referrals.create_referrals(
+        [
+            {
+                "referrer_telegram_id": telegram_ids[n % referrers],
+                "referred_telegram_id": telegram_id,
+                "level": ReferralLevel.FIRST,
+            }
+            for n, telegram_id in enumerate(telegram_ids)
+            if n >= referrers
+        ]
+    )
+
+    # A broadcast halfway through delivery, so pending rows are spread over every shard
+    await repository.broadcasts.create(
+        Broadcast(
+            id=SAMPLE_BROADCAST_ID,
+            task_id=uuid4(),
+            status=BroadcastStatus.PROCESSING,
+            audience=BroadcastAudience.ALL,
+            total_count=count,
+            success_count=0,
+            failed_count=0,
+            payload=MessagePayload(i18n_key="explain").model_dump(mode="json"),
+        )
+    )
+    await repository.broadcasts.create_messages(
+        [
+            {
+                "broadcast_id": SAMPLE_BROADCAST_ID,
+                "user_id": telegram_id,
+                "status": BroadcastMessageStatus.PENDING if n % 2 else BroadcastMessageStatus.SENT,
+            }
+            for n, telegram_id in enumerate(telegram_ids)
+        ]
+    )
+
+    tables = (
+        "users",
+        "subscriptions",
+        "transactions",
+        "referrals",
+        "broadcasts",
+        "broadcast_messages",
+    )
+    for table in tables:
+        await repository.session.execute(text(f"ANALYZE {table}"))
+
+    logger.info(
+        f"Seeded '{count}' users with subscriptions, transactions, referrals and broadcast messages"
+    )
+
+
+def find_seq_scans(plan: dict[str, Any]) -> Iterator[tuple[str, int]]:
+    if plan["Node Type"] == "Seq Scan":
+        per_loop = plan["Actual Rows"] + plan.get("Rows Removed by Filter", 0)
+        yield plan["Relation Name"], per_loop * plan["Actual Loops"]
+
+    for child in plan.get("Plans", []):
+        yield from find_seq_scans(child)
+
+
+async def run(seed_count: int, max_seq_rows: int) -> int:
+    config = AppConfig.get()
+    engine = create_async_engine(url=config.database.dsn)
+    captured: list[tuple[str, Any]] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE")):
+            captured.append((statement, parameters))
+
+    regressions = 0
+
+    async with engine.connect() as connection:
+        await connection.begin()
+        repository = RepositoriesFacade(session=AsyncSession(bind=connection))
+
+        try:
+            if seed_count:
+                await seed(repository, seed_count)
+
+            for name, query in HOT_QUERIES.items():
+                captured.clear()
+                await query(repository)
+                statements = list(captured)
+
+                for statement, parameters in statements:
+                    result = await connection.exec_driver_sql(
+                        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}",
+                        parameters,
+                    )
+                    output = result.scalar_one()
+                    explained = (json_utils.decode(output) if isinstance(output, str) else output)[
+                        0
+                    ]
+
+                    for relation, rows in find_seq_scans(explained["Plan"]):
+                        if rows > max_seq_rows:
+                            regressions += 1
+                            logger.error(
+                                f"'{name}' scans '{rows}' rows of '{relation}' sequentially:\n"
+                                f"{statement}"
+                            )
+
+                logger.info(f"Checked '{name}' ({len(statements)} statements)")
+        finally:
+            await connection.rollback()
+            await engine.dispose()
+
+    if regressions:
+        logger.error(f"Found '{regressions}' sequential scans above '{max_seq_rows}' rows")
+        return 1
+
+    logger.info(f"All '{len(HOT_QUERIES)}' hot queries use indexed plans")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check hot repository queries for seq scans")
+    parser.add_argument("--seed", type=int, default=50_000, help="synthetic users, 0 to skip")
+    parser.add_argument("--max-seq-rows", type=int, default=1_000)
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run(args.seed, args.max_seq_rows)))
+
+
+if __name__ == "__main__":
+    main()
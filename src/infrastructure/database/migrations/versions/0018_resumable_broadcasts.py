@@ -0,0 +1,28 @@
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0018"
+down_revision: Union[str, None] = "0017"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("broadcasts", sa.Column("plan_id", sa.Integer(), nullable=True))
+
+    op.create_index(
+        "ix_broadcast_messages_broadcast_id_user_id",
+        "broadcast_messages",
+        ["broadcast_id", "user_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_broadcast_messages_broadcast_id_user_id",
+        table_name="broadcast_messages",
+    )
+
+    op.drop_column("broadcasts", "plan_id")
@@ -0,0 +1,25 @@
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0021"
+down_revision: Union[str, None] = "0020"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("subscriptions", sa.Column("plan_id", sa.Integer(), nullable=True))
+    op.execute("UPDATE subscriptions SET plan_id = (plan ->> 'id')::integer")
+    op.alter_column("subscriptions", "plan_id", nullable=False)
+    op.create_index(
+        "ix_subscriptions_plan_id_status",
+        "subscriptions",
+        ["plan_id", "status"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_subscriptions_plan_id_status", table_name="subscriptions")
+    op.drop_column("subscriptions", "plan_id")
@@ -0,0 +1,37 @@
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0022"
+down_revision: Union[str, None] = "0021"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES: list[tuple[str, str, list[str]]] = [
+    ("ix_users_current_subscription_id", "users", ["current_subscription_id"]),
+    ("ix_transactions_user_telegram_id", "transactions", ["user_telegram_id"]),
+    ("ix_referrals_referrer_telegram_id", "referrals", ["referrer_telegram_id"]),
+    ("ix_referrals_referred_telegram_id", "referrals", ["referred_telegram_id"]),
+    ("ix_referral_rewards_referral_id", "referral_rewards", ["referral_id"]),
+    ("ix_referral_rewards_user_telegram_id", "referral_rewards", ["user_telegram_id"]),
+]
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_users_reachable_id",
+        "users",
+        ["id"],
+        postgresql_where=sa.text("is_blocked = false AND is_bot_blocked = false"),
+    )
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    op.drop_index("ix_users_reachable_id", table_name="users")
@@ -1,5 +1,5 @@
 from .base import BaseDto, TrackableDto
-from .broadcast import BroadcastDto, BroadcastMessageDto
+from .broadcast import BroadcastDto, BroadcastMessageDto, BroadcastRecipientDto
 from .payment_gateway import (
     AnyGatewaySettingsDto,
     CryptomusGatewaySettingsDto,
@@ -11,10 +11,19 @@ from .payment_gateway import (
     YookassaGatewaySettingsDto,
     YoomoneyGatewaySettingsDto,
 )
-from .plan import PlanDto, PlanDurationDto, PlanPriceDto, PlanSnapshotDto
+from .plan import PlanCatalogDto, PlanDto, PlanDurationDto, PlanPriceDto, PlanSnapshotDto
 from .promocode import PromocodeActivationDto, PromocodeDto
 from .referral import ReferralDto, ReferralRewardDto
 from .settings import ReferralSettingsDto, SettingsDto, SystemNotificationDto, UserNotificationDto
+from .statistics import (
+    GatewayStatisticsDto,
+    PlanStatisticsDto,
+    PromocodesStatisticsDto,
+    StatisticsSnapshotDto,
+    SubscriptionsStatisticsDto,
+    TransactionsStatisticsDto,
+    UsersStatisticsDto,
+)
 from .subscription import BaseSubscriptionDto, RemnaSubscriptionDto, SubscriptionDto
 from .transaction import BaseTransactionDto, PriceDetailsDto, TransactionDto
 from .user import BaseUserDto, UserDto
@@ -34,6 +43,7 @@ __all__ = [
     "BaseDto",
     "BroadcastDto",
     "BroadcastMessageDto",
+    "BroadcastRecipientDto",
     "TrackableDto",
     "AnyGatewaySettingsDto",
     "CryptomusGatewaySettingsDto",
@@ -44,6 +54,7 @@ __all__ = [
     "RobokassaGatewaySettingsDto",
     "YookassaGatewaySettingsDto",
     "YoomoneyGatewaySettingsDto",
+    "PlanCatalogDto",
     "PlanDto",
     "PlanDurationDto",
     "PlanPriceDto",
@@ -56,6 +67,13 @@ __all__ = [
     "ReferralSettingsDto",
     "SystemNotificationDto",
     "UserNotificationDto",
+    "GatewayStatisticsDto",
+    "PlanStatisticsDto",
+    "PromocodesStatisticsDto",
+    "StatisticsSnapshotDto",
+    "SubscriptionsStatisticsDto",
+    "TransactionsStatisticsDto",
+    "UsersStatisticsDto",
     "SubscriptionDto",
     "RemnaSubscriptionDto",
     "PriceDetailsDto",
@@ -4,11 +4,11 @@ from uuid import UUID
 
 from pydantic import Field
 
-from src.core.enums import BroadcastAudience, BroadcastMessageStatus, BroadcastStatus
+from src.core.enums import BroadcastAudience, BroadcastMessageStatus, BroadcastStatus, Locale
 from src.core.utils.message_payload import MessagePayload
 from src.core.utils.time import datetime_now
 
-from .base import TrackableDto
+from .base import BaseDto, TrackableDto
 
 
 class BroadcastDto(TrackableDto):
@@ -17,6 +17,7 @@ class BroadcastDto(TrackableDto):
 
     status: BroadcastStatus
     audience: BroadcastAudience
+    plan_id: Optional[int] = None
 
     total_count: int = 0
     success_count: int = 0
@@ -45,3 +46,8 @@ class BroadcastMessageDto(TrackableDto):
     message_id: Optional[int] = None
 
     status: BroadcastMessageStatus
+
+
+class BroadcastRecipientDto(BaseDto):
+    telegram_id: int
+    language: Locale
@@ -7,7 +7,7 @@ from remnapy.enums.users import TrafficLimitStrategy
 
 from src.core.enums import Currency, PlanAvailability, PlanType
 
-from .base import TrackableDto
+from .base import BaseDto, TrackableDto
 
 
 class PlanSnapshotDto(TrackableDto):
@@ -129,3 +129,40 @@ class PlanPriceDto(TrackableDto):
 
     currency: Currency
     price: Decimal
+
+
+class PlanCatalogDto(BaseDto):
+    # Active plans in display order, plus lookups precomputed once per catalog build
+    plans: list[PlanDto] = []
+    allowed_users: dict[int, set[int]] = {}
+    prices: dict[int, dict[int, dict[Currency, Decimal]]] = {}
+
+    @classmethod
+    def from_plans(cls, plans: list[PlanDto]) -> "PlanCatalogDto":
+        return cls(
+            plans=plans,
+            allowed_users={
+                plan.id: set(plan.allowed_user_ids)
+                for plan in plans
+                if plan.id is not None and plan.availability == PlanAvailability.ALLOWED
+            },
+            prices={plan.id: cls._price_table(plan) for plan in plans if plan.id is not None},
+        )
+
+    def get_plan(self, plan_id: int) -> Optional[PlanDto]:
+        return next((p for p in self.plans if p.id == plan_id), None)
+
+    def get_prices(self, plan: PlanDto) -> dict[int, dict[Currency, Decimal]]:
+        # A plan picked before it left the catalog keeps the prices the user was shown
+        prices = self.prices.get(plan.id)  # type: ignore[arg-type]
+        return self._price_table(plan) if prices is None else prices
+
+    def is_allowed(self, plan_id: int, telegram_id: int) -> bool:
+        return telegram_id in self.allowed_users.get(plan_id, ())
+
+    @staticmethod
+    def _price_table(plan: PlanDto) -> dict[int, dict[Currency, Decimal]]:
+        return {
+            duration.days: {price.currency: price.price for price in duration.prices}
+            for duration in plan.durations
+        }
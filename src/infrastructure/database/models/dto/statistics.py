@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from src.core.enums import Currency, PaymentGatewayType, PromocodeRewardType
+
+from .base import BaseDto
+
+
+class UsersStatisticsDto(BaseDto):
+    total_users: int = 0
+    new_users_daily: int = 0
+    new_users_weekly: int = 0
+    new_users_monthly: int = 0
+
+    users_with_subscription: int = 0
+    users_with_trial: int = 0
+
+    blocked_users: int = 0
+    bot_blocked_users: int = 0
+
+    paying_users: int = 0
+    trial_users: int = 0
+    converted_from_trial: int = 0
+
+    @property
+    def users_without_subscription(self) -> int:
+        return self.total_users - self.users_with_subscription
+
+
+class GatewayStatisticsDto(BaseDto):
+    gateway_type: PaymentGatewayType
+
+    total: float = 0.0
+    daily: float = 0.0
+    weekly: float = 0.0
+    monthly: float = 0.0
+    discount: float = 0.0
+    paid_count: int = 0
+
+
+class TransactionsStatisticsDto(BaseDto):
+    total_transactions: int = 0
+    completed_transactions: int = 0
+    free_transactions: int = 0
+
+    gateways: list[GatewayStatisticsDto] = []
+
+
+class SubscriptionsStatisticsDto(BaseDto):
+    total_active_subscriptions: int = 0
+    total_expire_subscriptions: int = 0
+    active_trial_subscriptions: int = 0
+    expiring_subscriptions: int = 0
+    total_unlimited: int = 0
+    total_traffic: int = 0
+    total_devices: int = 0
+
+
+class PlanStatisticsDto(BaseDto):
+    plan_id: int
+
+    total_subscriptions: int = 0
+    active_subscriptions: int = 0
+    popular_duration: int = 0
+
+    incomes: dict[Currency, float] = {}
+
+
+class PromocodesStatisticsDto(BaseDto):
+    total_promo_activations: int = 0
+    most_popular_promo: str = "-"
+
+    rewards: dict[PromocodeRewardType, int] = {}
+
+
+class StatisticsSnapshotDto(BaseDto):
+    users: UsersStatisticsDto
+    transactions: TransactionsStatisticsDto
+    subscriptions: SubscriptionsStatisticsDto
+    plans: dict[int, PlanStatisticsDto] = {}
+    promocodes: PromocodesStatisticsDto
+
+    updated_at: datetime
@@ -6,6 +6,7 @@ if TYPE_CHECKING:
     from .plan import PlanSnapshotDto
     from .user import BaseUserDto
 
+import hashlib
 from datetime import datetime, timedelta
 from uuid import UUID
 
@@ -13,6 +14,7 @@ from pydantic import BaseModel, Field
 from remnapy.enums import TrafficLimitStrategy
 
 from src.core.enums import PlanType, SubscriptionStatus
+from src.core.utils import json_utils
 from src.core.utils.formatters import (
     format_bytes_to_gb,
     format_device_count,
@@ -53,6 +55,12 @@ class RemnaSubscriptionDto(BaseModel):
             external_squad=remna_user.external_squad_uuid,
         )
 
+    @property
+    def fingerprint(self) -> str:
+        data = self.model_dump(mode="json")
+        data["internal_squads"] = sorted(data["internal_squads"])
+        return hashlib.sha256(json_utils.bytes_encode(data)).hexdigest()
+
 
 class BaseSubscriptionDto(TrackableDto):
     id: Optional[int] = Field(default=None, frozen=True)
@@ -74,6 +82,7 @@ class BaseSubscriptionDto(TrackableDto):
     url: str
 
     plan: "PlanSnapshotDto"
+    sync_fingerprint: Optional[str] = None
 
     created_at: Optional[datetime] = Field(default=None, frozen=True)
     updated_at: Optional[datetime] = Field(default=None, frozen=True)
@@ -14,6 +14,7 @@ from uuid import UUID
 
 from pydantic import Field
 
+from src.core.constants import TRANSACTION_PENDING_TTL
 from src.core.enums import Currency, PaymentGatewayType, PurchaseType, TransactionStatus
 
 from .base import TrackableDto
@@ -56,7 +57,7 @@ class BaseTransactionDto(TrackableDto):
             return False
         return (
             self.status == TransactionStatus.PENDING
-            and datetime_now() - self.created_at > timedelta(minutes=30)
+            and datetime_now() - self.created_at > timedelta(seconds=TRANSACTION_PENDING_TTL)
         )
 
 
@@ -94,6 +94,9 @@ class UserDto(BaseUserDto):
     ) -> Optional["UserDto"]:
         dto = super().from_model(model_instance, decrypt=decrypt)
         if dto and model_instance:
-            dto._has_any_subscription = bool(getattr(model_instance, "subscriptions", []))
-            dto._is_invited_user = bool(getattr(model_instance, "referral", None))
+            loaded = model_instance.__dict__
+            dto._has_any_subscription = bool(
+                loaded.get("subscriptions") or loaded.get("has_subscriptions")
+            )
+            dto._is_invited_user = bool(loaded.get("referral") or loaded.get("is_invited"))
         return dto
@@ -1,6 +1,7 @@
+from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import JSON, BigInteger, Enum, ForeignKey, Integer
+from sqlalchemy import JSON, BigInteger, Enum, ForeignKey, Index, Integer
 from sqlalchemy import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -36,6 +37,7 @@ class Broadcast(BaseSql, TimestampMixin):
         ),
         nullable=False,
     )
+    plan_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
     total_count: Mapped[int] = mapped_column(Integer, nullable=False)
     success_count: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -51,6 +53,9 @@ class Broadcast(BaseSql, TimestampMixin):
 
 class BroadcastMessage(BaseSql):
     __tablename__ = "broadcast_messages"
+    __table_args__ = (
+        Index("ix_broadcast_messages_broadcast_id_user_id", "broadcast_id", "user_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
@@ -22,11 +22,13 @@ class Referral(BaseSql, TimestampMixin):
         BigInteger,
         ForeignKey("users.telegram_id"),
         nullable=False,
+        index=True,
     )
     referred_telegram_id: Mapped[int] = mapped_column(
         BigInteger,
         ForeignKey("users.telegram_id"),
         nullable=False,
+        index=True,
     )
 
     level: Mapped[ReferralLevel] = mapped_column(
@@ -62,11 +64,17 @@ class ReferralReward(BaseSql, TimestampMixin):
     __tablename__ = "referral_rewards"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    referral_id: Mapped[int] = mapped_column(Integer, ForeignKey("referrals.id"), nullable=False)
+    referral_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("referrals.id"),
+        nullable=False,
+        index=True,
+    )
     user_telegram_id: Mapped[int] = mapped_column(
         BigInteger,
         ForeignKey("users.telegram_id"),
         nullable=False,
+        index=True,
     )
 
     type: Mapped[ReferralRewardType] = mapped_column(
@@ -9,7 +9,18 @@ from datetime import datetime
 from uuid import UUID
 
 from remnapy.enums import TrafficLimitStrategy
-from sqlalchemy import ARRAY, JSON, BigInteger, Boolean, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import (
+    ARRAY,
+    JSON,
+    BigInteger,
+    Boolean,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -22,6 +33,7 @@ from .timestamp import TimestampMixin
 
 class Subscription(BaseSql, TimestampMixin):
     __tablename__ = "subscriptions"
+    __table_args__ = (Index("ix_subscriptions_plan_id_status", "plan_id", "status"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
@@ -64,6 +76,9 @@ class Subscription(BaseSql, TimestampMixin):
     url: Mapped[str] = mapped_column(String, nullable=False)
 
     plan: Mapped[PlanSnapshotDto] = mapped_column(JSON, nullable=False)
+    # Mirrors plan["id"] so plan lookups can use an index
+    plan_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    sync_fingerprint: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     user: Mapped["User"] = relationship(
         "User",
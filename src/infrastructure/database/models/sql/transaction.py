@@ -7,7 +7,7 @@ if TYPE_CHECKING:
 
 from uuid import UUID
 
-from sqlalchemy import JSON, BigInteger, Boolean, Enum, ForeignKey, Integer
+from sqlalchemy import JSON, BigInteger, Boolean, Enum, ForeignKey, Index, Integer, text
 from sqlalchemy import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -20,6 +20,13 @@ from .timestamp import TimestampMixin
 
 class Transaction(BaseSql, TimestampMixin):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index(
+            "ix_transactions_pending_created_at",
+            "created_at",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     payment_id: Mapped[UUID] = mapped_column(PG_UUID, nullable=False, unique=True)
@@ -28,6 +35,7 @@ class Transaction(BaseSql, TimestampMixin):
         BigInteger,
         ForeignKey("users.telegram_id"),
         nullable=False,
+        index=True,
     )
 
     status: Mapped[TransactionStatus] = mapped_column(
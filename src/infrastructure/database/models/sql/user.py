@@ -6,8 +6,8 @@ if TYPE_CHECKING:
     from .referral import Referral
     from .subscription import Subscription
 
-from sqlalchemy import BigInteger, Boolean, Enum, ForeignKey, Integer, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import BigInteger, Boolean, Enum, ForeignKey, Index, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column, query_expression, relationship
 
 from src.core.enums import Locale, UserRole
 
@@ -17,6 +17,14 @@ from .timestamp import TimestampMixin
 
 class User(BaseSql, TimestampMixin):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination over broadcast recipients only walks reachable users
+        Index(
+            "ix_users_reachable_id",
+            "id",
+            postgresql_where=text("is_blocked = false AND is_bot_blocked = false"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     telegram_id: Mapped[int] = mapped_column(BigInteger, nullable=False, unique=True)
@@ -54,6 +62,7 @@ class User(BaseSql, TimestampMixin):
     current_subscription_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("subscriptions.id", ondelete="SET NULL"),
         nullable=True,
+        index=True,
     )
 
     current_subscription: Mapped[Optional["Subscription"]] = relationship(
@@ -77,3 +86,7 @@ class User(BaseSql, TimestampMixin):
         uselist=False,
         lazy="selectin",
     )
+
+    # Populated only by load profiles that skip the collections above
+    has_subscriptions: Mapped[Optional[bool]] = query_expression()
+    is_invited: Mapped[Optional[bool]] = query_expression()
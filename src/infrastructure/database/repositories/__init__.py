@@ -1,5 +1,7 @@
 from .facade import RepositoriesFacade
+from .loading import LoadProfile
 
 __all__ = [
+    "LoadProfile",
     "RepositoriesFacade",
 ]
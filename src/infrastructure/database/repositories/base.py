@@ -1,11 +1,14 @@
 from typing import Any, Optional, Type, TypeVar, Union
 
-from sqlalchemy import ColumnExpressionArgument, delete, func, select, update
+from sqlalchemy import ColumnExpressionArgument, delete, func, insert, inspect, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import InstrumentedAttribute
 
+from src.core.constants import BULK_INSERT_BATCH_SIZE
 from src.infrastructure.database.models.sql import BaseSql
 
+from .loading import LoadProfile, get_load_options
+
 T = TypeVar("T", bound=BaseSql)
 ModelType = Type[T]
 
@@ -29,11 +32,13 @@ class BaseRepository:
         if not instances:
             return []
 
-        self.session.add_all(instances)
-        await self.session.flush()
-        for instance in instances:
-            await self.session.refresh(instance)
-        return instances
+        model = type(instances[0])
+        keys = [attr.key for attr in inspect(model).column_attrs]
+        rows = [
+            {k: v for k in keys if (v := instance.__dict__.get(k)) is not None}
+            for instance in instances
+        ]
+        return await self._create_many(model, rows)
 
     async def merge_instance(self, instance: T) -> T:
         return await self.session.merge(instance)
@@ -41,8 +46,13 @@ class BaseRepository:
     async def delete_instance(self, instance: T) -> None:
         await self.session.delete(instance)
 
-    async def _get_one(self, model: ModelType[T], *conditions: ConditionType) -> Optional[T]:
-        stmt = select(model).where(*conditions)
+    async def _get_one(
+        self,
+        model: ModelType[T],
+        *conditions: ConditionType,
+        profile: LoadProfile = LoadProfile.FULL,
+    ) -> Optional[T]:
+        stmt = select(model).where(*conditions).options(*get_load_options(model, profile))
         result = await self.session.execute(stmt)
         return result.unique().scalar_one_or_none()
 
@@ -53,8 +63,9 @@ class BaseRepository:
         order_by: Optional[OrderByArgument] = None,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
+        profile: LoadProfile = LoadProfile.FULL,
     ) -> list[T]:
-        query = select(model).where(*conditions)
+        query = select(model).where(*conditions).options(*get_load_options(model, profile))
 
         if order_by is not None:
             if isinstance(order_by, (list, tuple)):
@@ -91,6 +102,23 @@ class BaseRepository:
         await self.session.execute(stmt)
         return None
 
+    async def _create_many(self, model: ModelType[T], rows: list[dict[str, Any]]) -> list[T]:
+        # Multi-row INSERT ... RETURNING, so server defaults come back without a refresh per row
+        created: list[T] = []
+        stmt = insert(model).returning(model, sort_by_parameter_order=True)
+
+        for offset in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            result = await self.session.scalars(
+                stmt, rows[offset : offset + BULK_INSERT_BATCH_SIZE]
+            )
+            created.extend(result.all())
+
+        return created
+
+    async def _bulk_update(self, model: ModelType[T], values: list[dict[str, Any]]) -> None:
+        if values:
+            await self.session.execute(update(model), values)
+
     async def _delete(self, model: ModelType[T], *conditions: ConditionType) -> int:
         result = await self.session.execute(delete(model).where(*conditions))
         return result.rowcount  # type: ignore[attr-defined, no-any-return]
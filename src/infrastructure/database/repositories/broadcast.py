@@ -1,25 +1,43 @@
 from typing import Any, Optional
 from uuid import UUID
 
-from sqlalchemy import update
+from sqlalchemy import Row, select, update
 
-from src.infrastructure.database.models.sql import Broadcast, BroadcastMessage
+from src.core.enums import BroadcastMessageStatus, BroadcastStatus, Locale
+from src.infrastructure.database.models.sql import Broadcast, BroadcastMessage, User
 
 from .base import BaseRepository
+from .loading import LoadProfile
 
 
 class BroadcastRepository(BaseRepository):
     async def create(self, broadcast: Broadcast) -> Broadcast:
         return await self.create_instance(broadcast)
 
-    async def create_messages(self, messages: list[BroadcastMessage]) -> list[BroadcastMessage]:
-        return await self.create_instances(messages)
+    async def create_messages(self, messages: list[dict[str, Any]]) -> list[BroadcastMessage]:
+        return await self._create_many(BroadcastMessage, messages)
 
-    async def get(self, task_id: UUID) -> Optional[Broadcast]:
-        return await self._get_one(Broadcast, Broadcast.task_id == task_id)
+    async def get(
+        self,
+        task_id: UUID,
+        profile: LoadProfile = LoadProfile.FULL,
+    ) -> Optional[Broadcast]:
+        return await self._get_one(Broadcast, Broadcast.task_id == task_id, profile=profile)
 
-    async def get_all(self) -> list[Broadcast]:
-        return await self._get_many(Broadcast, order_by=Broadcast.id.asc())
+    async def get_all(self, profile: LoadProfile = LoadProfile.FULL) -> list[Broadcast]:
+        return await self._get_many(Broadcast, order_by=Broadcast.id.asc(), profile=profile)
+
+    async def get_by_status(
+        self,
+        status: BroadcastStatus,
+        profile: LoadProfile = LoadProfile.FULL,
+    ) -> list[Broadcast]:
+        return await self._get_many(Broadcast, Broadcast.status == status, profile=profile)
+
+    async def get_status(self, task_id: UUID) -> Optional[BroadcastStatus]:
+        query = select(Broadcast.status).where(Broadcast.task_id == task_id)
+        status: Optional[BroadcastStatus] = await self.session.scalar(query)
+        return status
 
     async def get_message_by_user(
         self, broadcast_id: int, user_id: int
@@ -30,9 +48,50 @@ class BroadcastRepository(BaseRepository):
             BroadcastMessage.user_id == user_id,
         )
 
+    async def get_pending_recipients(
+        self,
+        broadcast_id: int,
+        after_id: int,
+        limit: int,
+        shard: int = 0,
+        shard_count: int = 1,
+    ) -> list[Row[tuple[int, int, Locale]]]:
+        query = (
+            select(BroadcastMessage.id, BroadcastMessage.user_id, User.language)
+            .outerjoin(User, User.telegram_id == BroadcastMessage.user_id)
+            .where(
+                BroadcastMessage.broadcast_id == broadcast_id,
+                BroadcastMessage.status == BroadcastMessageStatus.PENDING,
+                BroadcastMessage.id > after_id,
+            )
+            .order_by(BroadcastMessage.id.asc())
+            .limit(limit)
+        )
+
+        if shard_count > 1:
+            query = query.where(BroadcastMessage.user_id % shard_count == shard)
+
+        result = await self.session.execute(query)
+        return list(result.all())
+
+    async def count_pending_messages(self, broadcast_id: int) -> int:
+        return await self._count(
+            BroadcastMessage,
+            BroadcastMessage.broadcast_id == broadcast_id,
+            BroadcastMessage.status == BroadcastMessageStatus.PENDING,
+        )
+
     async def update(self, task_id: UUID, **data: Any) -> Optional[Broadcast]:
         return await self._update(Broadcast, Broadcast.task_id == task_id, **data)
 
+    async def complete(self, broadcast_id: int) -> Optional[Broadcast]:
+        return await self._update(
+            Broadcast,
+            Broadcast.id == broadcast_id,
+            Broadcast.status == BroadcastStatus.PROCESSING,
+            status=BroadcastStatus.COMPLETED,
+        )
+
     async def update_message(
         self, broadcast_id: int, user_id: int, **data: Any
     ) -> Optional[BroadcastMessage]:
@@ -48,3 +107,13 @@ class BroadcastRepository(BaseRepository):
             return
 
         await self.session.execute(update(BroadcastMessage), data)
+
+    async def increment_counters(self, broadcast_id: int, success: int, failed: int) -> None:
+        await self.session.execute(
+            update(Broadcast)
+            .where(Broadcast.id == broadcast_id)
+            .values(
+                success_count=Broadcast.success_count + success,
+                failed_count=Broadcast.failed_count + failed,
+            )
+        )
@@ -0,0 +1,56 @@
+from enum import StrEnum
+from typing import Any, Sequence
+
+from sqlalchemy import exists
+from sqlalchemy.orm import joinedload, raiseload, selectinload, with_expression
+from sqlalchemy.sql.base import ExecutableOption
+
+from src.infrastructure.database.models.sql import (
+    BaseSql,
+    Broadcast,
+    Referral,
+    Subscription,
+    User,
+)
+
+
+class LoadProfile(StrEnum):
+    BARE = "bare"
+    WITH_CURRENT_SUBSCRIPTION = "with_current_subscription"
+    WITH_USER = "with_user"
+    FULL = "full"
+
+
+# FULL keeps the relationship defaults declared on the models
+LOAD_PROFILES: dict[tuple[type[BaseSql], LoadProfile], Sequence[ExecutableOption]] = {
+    (User, LoadProfile.BARE): (raiseload("*"),),
+    (User, LoadProfile.WITH_CURRENT_SUBSCRIPTION): (
+        joinedload(User.current_subscription).raiseload("*"),
+        raiseload(User.subscriptions),
+        raiseload(User.referral),
+        with_expression(
+            User.has_subscriptions,
+            exists().where(Subscription.user_telegram_id == User.telegram_id),
+        ),
+        with_expression(
+            User.is_invited,
+            exists().where(Referral.referred_telegram_id == User.telegram_id),
+        ),
+    ),
+    (Subscription, LoadProfile.BARE): (raiseload("*"),),
+    (Subscription, LoadProfile.WITH_USER): (selectinload(Subscription.user).raiseload("*"),),
+    # Without the messages, which can be hundreds of thousands of rows per broadcast
+    (Broadcast, LoadProfile.BARE): (raiseload("*"),),
+}
+
+
+def get_load_options(model: type[Any], profile: LoadProfile) -> Sequence[ExecutableOption]:
+    if profile == LoadProfile.FULL:
+        return ()
+
+    try:
+        return LOAD_PROFILES[(model, profile)]
+    except KeyError:
+        raise ValueError(
+            f"Load profile '{profile}' is not defined for model '{model.__name__}'"
+        ) from None
@@ -12,6 +12,9 @@ class ReferralRepository(BaseRepository):
     async def create_referral(self, referral: Referral) -> Referral:
         return await self.create_instance(referral)
 
+    async def create_referrals(self, referrals: list[dict[str, Any]]) -> List[Referral]:
+        return await self._create_many(Referral, referrals)
+
     async def get_referral_by_id(self, referral_id: int) -> Optional[Referral]:
         return await self._get_one(Referral, Referral.id == referral_id)
 
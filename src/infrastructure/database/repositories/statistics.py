@@ -0,0 +1,238 @@
+from datetime import datetime, timedelta
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import (
+    ColumnElement,
+    Numeric,
+    RowMapping,
+    and_,
+    distinct,
+    extract,
+    func,
+    or_,
+    select,
+)
+
+from src.core.enums import SubscriptionStatus, TransactionStatus
+from src.infrastructure.database.models.sql import (
+    Promocode,
+    PromocodeActivation,
+    Subscription,
+    Transaction,
+    User,
+)
+
+from .base import BaseRepository
+
+
+class StatisticsRepository(BaseRepository):
+    async def get_users_statistics(self, now: datetime) -> RowMapping:
+        users_with_trial = (
+            select(func.count())
+            .select_from(User)
+            .join(Subscription, User.current_subscription_id == Subscription.id)
+            .where(Subscription.is_trial.is_(True))
+            .correlate(None)
+            .scalar_subquery()
+        )
+        paying_users = (
+            select(func.count(distinct(Transaction.user_telegram_id)))
+            .where(Transaction.status == TransactionStatus.COMPLETED, self._final_amount() != 0)
+            .scalar_subquery()
+        )
+
+        query = select(
+            func.count().label("total_users"),
+            func.count().filter(User.created_at > now - timedelta(days=1)).label("new_users_daily"),
+            func.count()
+            .filter(User.created_at > now - timedelta(days=8))
+            .label("new_users_weekly"),
+            func.count()
+            .filter(User.created_at > now - timedelta(days=31))
+            .label("new_users_monthly"),
+            func.count(User.current_subscription_id).label("users_with_subscription"),
+            func.count().filter(User.is_blocked.is_(True)).label("blocked_users"),
+            func.count().filter(User.is_bot_blocked.is_(True)).label("bot_blocked_users"),
+            users_with_trial.label("users_with_trial"),
+            paying_users.label("paying_users"),
+        ).select_from(User)
+
+        result = await self.session.execute(query)
+        return result.mappings().one()
+
+    async def get_trial_conversion(self) -> RowMapping:
+        per_user = (
+            select(
+                func.bool_or(Subscription.is_trial).label("had_trial"),
+                func.bool_or(Subscription.is_trial.is_(False)).label("had_paid"),
+            )
+            .group_by(Subscription.user_telegram_id)
+            .subquery()
+        )
+
+        query = select(
+            func.count().filter(per_user.c.had_trial).label("trial_users"),
+            func.count()
+            .filter(and_(per_user.c.had_trial, per_user.c.had_paid))
+            .label("converted_from_trial"),
+        ).select_from(per_user)
+
+        result = await self.session.execute(query)
+        return result.mappings().one()
+
+    async def get_transactions_totals(self) -> RowMapping:
+        query = select(
+            func.count().label("total_transactions"),
+            func.count()
+            .filter(Transaction.status == TransactionStatus.COMPLETED)
+            .label("completed_transactions"),
+            func.count().filter(self._final_amount() == 0).label("free_transactions"),
+        ).select_from(Transaction)
+
+        result = await self.session.execute(query)
+        return result.mappings().one()
+
+    async def get_gateways_statistics(self, now: datetime) -> Sequence[RowMapping]:
+        final_amount = self._final_amount()
+        original_amount = Transaction.pricing["original_amount"].as_string().cast(Numeric)
+
+        query = (
+            select(
+                Transaction.gateway_type,
+                self._sum(final_amount).label("total"),
+                self._sum(final_amount, Transaction.created_at > now - timedelta(days=1)).label(
+                    "daily"
+                ),
+                self._sum(final_amount, Transaction.created_at > now - timedelta(days=8)).label(
+                    "weekly"
+                ),
+                self._sum(final_amount, Transaction.created_at > now - timedelta(days=31)).label(
+                    "monthly"
+                ),
+                self._sum(original_amount - final_amount).label("discount"),
+                func.count().filter(final_amount != 0).label("paid_count"),
+            )
+            .where(Transaction.status == TransactionStatus.COMPLETED)
+            .group_by(Transaction.gateway_type)
+            .order_by(Transaction.gateway_type)
+        )
+
+        result = await self.session.execute(query)
+        return result.mappings().all()
+
+    async def get_subscriptions_statistics(self, now: datetime) -> RowMapping:
+        is_active = self._is_active(now)
+
+        query = select(
+            func.count().filter(is_active).label("total_active_subscriptions"),
+            func.count()
+            .filter(
+                ~is_active,
+                or_(
+                    Subscription.expire_at < now,
+                    Subscription.status == SubscriptionStatus.EXPIRED,
+                ),
+            )
+            .label("total_expire_subscriptions"),
+            func.count()
+            .filter(is_active, Subscription.is_trial.is_(True))
+            .label("active_trial_subscriptions"),
+            func.count()
+            .filter(is_active, Subscription.expire_at < now + timedelta(days=8))
+            .label("expiring_subscriptions"),
+            # TODO: separate unlim for traffic, device, duration
+            func.count()
+            .filter(
+                is_active,
+                or_(
+                    Subscription.device_limit <= 0,
+                    Subscription.traffic_limit <= 0,
+                    extract("year", Subscription.expire_at) == 2099,
+                ),
+            )
+            .label("total_unlimited"),
+            func.count().filter(is_active, Subscription.traffic_limit != -1).label("total_traffic"),
+            func.count().filter(is_active, Subscription.device_limit != -1).label("total_devices"),
+        ).select_from(Subscription)
+
+        result = await self.session.execute(query)
+        return result.mappings().one()
+
+    async def get_plans_statistics(self, now: datetime) -> Sequence[RowMapping]:
+        plan_id = Subscription.plan_id
+        duration = Subscription.plan["duration"].as_integer()
+
+        query = (
+            select(
+                plan_id.label("plan_id"),
+                func.count().label("total_subscriptions"),
+                func.count().filter(self._is_active(now)).label("active_subscriptions"),
+                func.mode().within_group(duration).label("popular_duration"),
+            )
+            .group_by(plan_id)
+            .order_by(plan_id)
+        )
+
+        result = await self.session.execute(query)
+        return result.mappings().all()
+
+    async def get_plans_income(self) -> Sequence[RowMapping]:
+        plan_id = Transaction.plan["id"].as_integer()
+
+        query = (
+            select(
+                plan_id.label("plan_id"),
+                Transaction.currency,
+                self._sum(self._final_amount()).label("income"),
+            )
+            .where(Transaction.status == TransactionStatus.COMPLETED, plan_id > 0)
+            .group_by(plan_id, Transaction.currency)
+            .order_by(plan_id, Transaction.currency)
+        )
+
+        result = await self.session.execute(query)
+        return result.mappings().all()
+
+    async def get_promocode_rewards(self) -> Sequence[RowMapping]:
+        query = (
+            select(
+                Promocode.reward_type,
+                func.count(PromocodeActivation.id).label("activations"),
+                func.coalesce(func.sum(Promocode.reward), 0).label("reward"),
+            )
+            .join(PromocodeActivation, PromocodeActivation.promocode_id == Promocode.id)
+            .group_by(Promocode.reward_type)
+        )
+
+        result = await self.session.execute(query)
+        return result.mappings().all()
+
+    async def get_most_popular_promocode(self) -> Optional[str]:
+        query = (
+            select(Promocode.code)
+            .outerjoin(PromocodeActivation, PromocodeActivation.promocode_id == Promocode.id)
+            .group_by(Promocode.id)
+            .order_by(func.count(PromocodeActivation.id).desc(), Promocode.id.asc())
+            .limit(1)
+        )
+        result: Optional[str] = await self.session.scalar(query)
+        return result
+
+    @staticmethod
+    def _final_amount() -> ColumnElement[Any]:
+        final_amount: ColumnElement[Any] = Transaction.pricing["final_amount"].as_string()
+        return final_amount.cast(Numeric)
+
+    @staticmethod
+    def _sum(value: ColumnElement[Any], *conditions: ColumnElement[bool]) -> ColumnElement[Any]:
+        aggregate = func.sum(value)
+        if conditions:
+            return func.coalesce(aggregate.filter(*conditions), 0)
+        return func.coalesce(aggregate, 0)
+
+    @staticmethod
+    def _is_active(now: datetime) -> ColumnElement[bool]:
+        return and_(
+            Subscription.status == SubscriptionStatus.ACTIVE,
+            Subscription.expire_at >= now,
+        )
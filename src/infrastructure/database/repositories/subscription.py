@@ -1,16 +1,29 @@
 from typing import Any, Optional
 
-from src.infrastructure.database.models.sql import Subscription
+from sqlalchemy import func, select
+
+from src.core.enums import SubscriptionStatus
+from src.infrastructure.database.models.sql import Subscription, User
 
 from .base import BaseRepository
+from .loading import LoadProfile, get_load_options
 
 
 class SubscriptionRepository(BaseRepository):
     async def create(self, subscription: Subscription) -> Subscription:
         return await self.create_instance(subscription)
 
-    async def get(self, subscription_id: int) -> Optional[Subscription]:
-        return await self._get_one(Subscription, Subscription.id == subscription_id)
+    async def create_many(self, subscriptions: list[dict[str, Any]]) -> list[Subscription]:
+        return await self._create_many(Subscription, subscriptions)
+
+    async def get(
+        self,
+        subscription_id: int,
+        profile: LoadProfile = LoadProfile.FULL,
+    ) -> Optional[Subscription]:
+        return await self._get_one(
+            Subscription, Subscription.id == subscription_id, profile=profile
+        )
 
     async def get_all_by_user(self, telegram_id: int) -> list[Subscription]:
         return await self._get_many(Subscription, Subscription.user_telegram_id == telegram_id)
@@ -18,8 +31,60 @@ class SubscriptionRepository(BaseRepository):
     async def get_all(self) -> list[Subscription]:
         return await self._get_many(Subscription)
 
+    async def get_all_current(
+        self,
+        telegram_ids: Optional[list[int]] = None,
+    ) -> list[Subscription]:
+        query = (
+            select(Subscription)
+            .join(User, User.current_subscription_id == Subscription.id)
+            .options(*get_load_options(Subscription, LoadProfile.BARE))
+        )
+
+        if telegram_ids is not None:
+            query = query.where(User.telegram_id.in_(telegram_ids))
+
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def get_statuses(self, subscription_ids: list[int]) -> dict[int, SubscriptionStatus]:
+        query = select(Subscription.id, Subscription.status).where(
+            Subscription.id.in_(subscription_ids)
+        )
+        result = await self.session.execute(query)
+        return dict(result.tuples().all())
+
+    async def get_status(self, subscription_id: int) -> Optional[SubscriptionStatus]:
+        query = select(Subscription.status).where(Subscription.id == subscription_id)
+        status: Optional[SubscriptionStatus] = await self.session.scalar(query)
+        return status
+
     async def update(self, subscription_id: int, **data: Any) -> Optional[Subscription]:
         return await self._update(Subscription, Subscription.id == subscription_id, **data)
 
-    async def filter_by_plan_id(self, plan_id: int) -> list[Subscription]:
-        return await self._get_many(Subscription, Subscription.plan["id"].as_integer() == plan_id)
+    async def bulk_update(self, values: list[dict[str, Any]]) -> None:
+        await self._bulk_update(Subscription, values)
+
+    async def filter_by_plan_id(
+        self,
+        plan_id: int,
+        profile: LoadProfile = LoadProfile.FULL,
+    ) -> list[Subscription]:
+        return await self._get_many(
+            Subscription,
+            Subscription.plan_id == plan_id,
+            profile=profile,
+        )
+
+    async def count_active_users_by_plan(self, plan_id: int) -> int:
+        query = (
+            select(func.count(func.distinct(Subscription.user_telegram_id)))
+            .join(User, User.telegram_id == Subscription.user_telegram_id)
+            .where(
+                Subscription.plan_id == plan_id,
+                Subscription.status == SubscriptionStatus.ACTIVE,
+                User.is_blocked.is_(False),
+                User.is_bot_blocked.is_(False),
+            )
+        )
+        return await self.session.scalar(query) or 0
@@ -1,8 +1,12 @@
+from datetime import timedelta
 from typing import Any, Optional
 from uuid import UUID
 
+from sqlalchemy import update
+
 from src.core.enums import TransactionStatus
 from src.infrastructure.database.models.sql import Transaction
+from src.infrastructure.database.models.sql.timestamp import NOW_FUNC
 
 from .base import BaseRepository
 
@@ -11,6 +15,9 @@ class TransactionRepository(BaseRepository):
     async def create(self, transaction: Transaction) -> Transaction:
         return await self.create_instance(transaction)
 
+    async def create_many(self, transactions: list[dict[str, Any]]) -> list[Transaction]:
+        return await self._create_many(Transaction, transactions)
+
     async def get(self, payment_id: UUID) -> Optional[Transaction]:
         return await self._get_one(Transaction, Transaction.payment_id == payment_id)
 
@@ -26,6 +33,33 @@ class TransactionRepository(BaseRepository):
     async def update(self, payment_id: UUID, **data: Any) -> Optional[Transaction]:
         return await self._update(Transaction, Transaction.payment_id == payment_id, **data)
 
+    async def transition(
+        self,
+        payment_id: UUID,
+        from_status: TransactionStatus,
+        to_status: TransactionStatus,
+    ) -> Optional[Transaction]:
+        return await self._update(
+            Transaction,
+            Transaction.payment_id == payment_id,
+            Transaction.status == from_status,
+            status=to_status,
+        )
+
+    async def cancel_stale(self, older_than: timedelta) -> list[UUID]:
+        stmt = (
+            update(Transaction)
+            .where(
+                Transaction.status == TransactionStatus.PENDING,
+                Transaction.created_at < NOW_FUNC - older_than,
+            )
+            .values(status=TransactionStatus.CANCELED)
+            .returning(Transaction.payment_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
     async def count(self) -> int:
         return await self._count(Transaction, Transaction.id)
 
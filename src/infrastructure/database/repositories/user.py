@@ -1,22 +1,34 @@
 from typing import Any, Optional
 
-from sqlalchemy import func, or_
+from sqlalchemy import BigInteger, Integer, Row, String, column, func, or_, select, update, values
 
-from src.core.enums import UserRole
+from src.core.enums import Locale, UserRole
 from src.infrastructure.database.models.sql import User
 
-from .base import BaseRepository
+from .base import BaseRepository, ConditionType
+from .loading import LoadProfile
 
 
 class UserRepository(BaseRepository):
     async def create(self, user: User) -> User:
         return await self.create_instance(user)
 
-    async def get(self, telegram_id: int) -> Optional[User]:
-        return await self._get_one(User, User.telegram_id == telegram_id)
+    async def create_many(self, users: list[dict[str, Any]]) -> list[User]:
+        return await self._create_many(User, users)
 
-    async def get_by_ids(self, telegram_ids: list[int]) -> list[User]:
-        return await self._get_many(User, User.telegram_id.in_(telegram_ids))
+    async def get(
+        self,
+        telegram_id: int,
+        profile: LoadProfile = LoadProfile.FULL,
+    ) -> Optional[User]:
+        return await self._get_one(User, User.telegram_id == telegram_id, profile=profile)
+
+    async def get_by_ids(
+        self,
+        telegram_ids: list[int],
+        profile: LoadProfile = LoadProfile.FULL,
+    ) -> list[User]:
+        return await self._get_many(User, User.telegram_id.in_(telegram_ids), profile=profile)
 
     async def get_by_partial_name(self, query: str) -> list[User]:
         search_pattern = f"%{query.lower()}%"
@@ -29,12 +41,51 @@ class UserRepository(BaseRepository):
     async def get_by_referral_code(self, referral_code: str) -> Optional[User]:
         return await self._get_one(User, User.referral_code == referral_code)
 
-    async def get_all(self) -> list[User]:
-        return await self._get_many(User)
+    async def get_all(self, profile: LoadProfile = LoadProfile.FULL) -> list[User]:
+        return await self._get_many(User, profile=profile)
+
+    async def get_recent_registered(self, limit: int) -> list[User]:
+        return await self._get_many(User, order_by=User.created_at.desc(), limit=limit)
 
     async def update(self, telegram_id: int, **data: Any) -> Optional[User]:
         return await self._update(User, User.telegram_id == telegram_id, **data)
 
+    async def bulk_update_profiles(self, profiles: list[dict[str, Any]]) -> int:
+        if not profiles:
+            return 0
+
+        rows = values(
+            column("telegram_id", BigInteger),
+            column("name", String),
+            column("username", String),
+            name="profiles",
+        ).data([(p["telegram_id"], p["name"], p["username"]) for p in profiles])
+        stmt = (
+            update(User)
+            .where(User.telegram_id == rows.c.telegram_id)
+            .values(name=rows.c.name, username=rows.c.username)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount  # type: ignore[attr-defined, no-any-return]
+
+    async def bulk_set_current_subscriptions(self, subscriptions: dict[int, int]) -> None:
+        if not subscriptions:
+            return
+
+        rows = values(
+            column("telegram_id", BigInteger),
+            column("subscription_id", Integer),
+            name="current_subscriptions",
+        ).data(list(subscriptions.items()))
+        stmt = (
+            update(User)
+            .where(User.telegram_id == rows.c.telegram_id)
+            .values(current_subscription_id=rows.c.subscription_id)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
+
     async def delete(self, telegram_id: int) -> bool:
         return bool(await self._delete(User, User.telegram_id == telegram_id))
 
@@ -44,5 +95,20 @@ class UserRepository(BaseRepository):
     async def filter_by_role(self, role: UserRole) -> list[User]:
         return await self._get_many(User, User.role == role)
 
+    async def get_recipients(
+        self,
+        *conditions: ConditionType,
+        after_id: int,
+        limit: int,
+    ) -> list[Row[tuple[int, int, Locale]]]:
+        query = (
+            select(User.id, User.telegram_id, User.language)
+            .where(User.id > after_id, *conditions)
+            .order_by(User.id.asc())
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return list(result.all())
+
     async def filter_by_blocked(self, blocked: bool) -> list[User]:
         return await self._get_many(User, User.is_blocked == blocked)
@@ -6,8 +6,10 @@ from aiogram.enums import ParseMode
 from aiogram_dialog import BgManagerFactory
 from dishka import Provider, Scope, from_context, provide
 from loguru import logger
+from redis.asyncio import Redis
 
 from src.core.config import AppConfig
+from src.core.utils.rate_limiter import TelegramRateLimiter
 
 
 class BotProvider(Provider):
@@ -27,3 +29,8 @@ class BotProvider(Provider):
 
         logger.debug("Closing Bot session")
         await bot.session.close()
+
+    @provide
+    def get_rate_limiter(self, redis_client: Redis) -> TelegramRateLimiter:
+        logger.debug("Initializing TelegramRateLimiter")
+        return TelegramRateLimiter(redis_client=redis_client)
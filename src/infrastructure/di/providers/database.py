@@ -2,6 +2,7 @@ from collections.abc import AsyncIterable
 
 from dishka import Provider, Scope, provide
 from loguru import logger
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -10,6 +11,7 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from src.core.config import AppConfig
+from src.core.utils.update_stats import count_query
 from src.infrastructure.database import UnitOfWork
 
 
@@ -28,6 +30,7 @@ class DatabaseProvider(Provider):
             pool_timeout=config.database.pool_timeout,
             pool_recycle=config.database.pool_recycle,
         )
+        event.listen(engine.sync_engine, "before_cursor_execute", count_query)
         yield engine
         logger.debug("Disposing AsyncEngine")
         await engine.dispose()
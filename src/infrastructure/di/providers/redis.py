@@ -5,6 +5,7 @@ from loguru import logger
 from redis.asyncio import ConnectionPool, Redis
 
 from src.core.config import AppConfig
+from src.core.utils.update_stats import counting_connection_class
 from src.infrastructure.redis import RedisRepository
 
 
@@ -15,6 +16,9 @@ class RedisProvider(Provider):
     async def get_redis_client(self, config: AppConfig) -> AsyncGenerator[Redis, None]:
         logger.debug("Connecting to Redis")
         connection_pool = ConnectionPool.from_url(url=config.redis.dsn)
+        connection_pool.connection_class = counting_connection_class(
+            connection_pool.connection_class
+        )
         client = Redis(connection_pool=connection_pool)
 
         try:
@@ -1,7 +1,8 @@
-from .cache import redis_cache
+from .cache import invalidate_cache, redis_cache
 from .repository import RedisRepository
 
 __all__ = [
+    "invalidate_cache",
     "redis_cache",
     "RedisRepository",
 ]
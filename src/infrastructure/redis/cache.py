@@ -1,17 +1,67 @@
+import asyncio
+import time
+from collections import OrderedDict
 from functools import wraps
-from typing import Any, Awaitable, Callable, Optional, ParamSpec, TypeVar, get_type_hints
+from typing import Any, Awaitable, Callable, Final, Optional, ParamSpec, TypeVar, get_type_hints
 
 from loguru import logger
 from pydantic import SecretStr, TypeAdapter
 from redis.asyncio import Redis
 from redis.typing import ExpiryT
 
-from src.core.constants import TIME_1M
+from src.core.constants import CACHE_INVALIDATION_CHANNEL, CACHE_LOCAL_MAX_SIZE, TIME_1M
 from src.core.utils import json_utils
+from src.core.utils.update_stats import update_stats
 
 T = TypeVar("T", bound=Any)
 P = ParamSpec("P")
 
+_MISSING: Final = object()
+
+
+class LocalCache:
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.version = 0
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        entry = self._data.get(key)
+
+        if entry is None:
+            return _MISSING
+
+        expires_at, value = entry
+
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return _MISSING
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def evict(self, *keys: str) -> None:
+        self.version += 1
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self.version += 1
+        self._data.clear()
+
+
+local_cache = LocalCache(max_size=CACHE_LOCAL_MAX_SIZE)
+
+_inflight: dict[str, asyncio.Future[Any]] = {}
+_listener: Optional[asyncio.Task[None]] = None
+
 
 def prepare_for_cache(obj: Any) -> Any:
     if isinstance(obj, SecretStr):
@@ -23,9 +73,120 @@ def prepare_for_cache(obj: Any) -> Any:
     return obj
 
 
+async def invalidate_cache(redis: Redis, *keys: str) -> None:
+    if not keys:
+        return
+
+    local_cache.evict(*keys)
+    await redis.delete(*keys)
+
+    try:
+        await redis.publish(CACHE_INVALIDATION_CHANNEL, json_utils.encode({"keys": keys}))
+    except Exception as exception:
+        logger.warning(f"Failed to publish cache invalidation for {list(keys)}: {exception}")
+
+
+async def _listen_invalidations(redis: Redis) -> None:
+    # Started lazily from within an update; keep it out of that update's counters
+    update_stats.set(None)
+
+    while True:
+        try:
+            async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                # Anything published while we were not subscribed is lost
+                local_cache.clear()
+                logger.debug(f"Subscribed to cache invalidations on '{CACHE_INVALIDATION_CHANNEL}'")
+
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+
+                    keys: list[str] = json_utils.decode(message["data"])["keys"]
+                    local_cache.evict(*keys)
+                    logger.debug(f"Local cache evicted: {keys}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exception:
+            logger.warning(f"Cache invalidation listener failed: {exception}")
+            await asyncio.sleep(1)
+
+
+def _ensure_listener(redis: Redis) -> None:
+    global _listener
+
+    if _listener is None or _listener.done():
+        _listener = asyncio.create_task(_listen_invalidations(redis))
+
+
+async def _fetch(
+    redis: Redis,
+    key: str,
+    ttl: ExpiryT,
+    type_adapter: TypeAdapter[T],
+    call: Callable[[], Awaitable[T]],
+) -> tuple[T, Any]:
+    try:
+        cached_value: Optional[bytes] = await redis.get(key)
+        if cached_value is not None:
+            logger.debug(f"Cache hit: '{key}'")
+            parsed = json_utils.decode(cached_value.decode())
+            return type_adapter.validate_python(parsed), parsed
+    except Exception as exception:
+        logger.warning(f"Cache read failed for key '{key}': {exception}")
+
+    logger.debug(f"Cache miss: '{key}'. Executing function")
+    result: T = await call()
+    safe_result = prepare_for_cache(type_adapter.dump_python(result))
+
+    try:
+        await redis.setex(key, ttl, json_utils.encode(safe_result))
+        logger.debug(f"Result cached: '{key}' (ttl={ttl})")
+    except Exception as exception:
+        logger.warning(f"Cache write failed for key '{key}': {exception}")
+
+    return result, safe_result
+
+
+# Concurrent misses for the same key share a single load. The load runs in the first
+# caller's own scope, if it gives up the waiters load on their own instead
+async def _join_inflight(key: str) -> Any:
+    while (inflight := _inflight.get(key)) is not None:
+        logger.debug(f"Cache load in flight: '{key}'. Waiting")
+        try:
+            _, shared_value = await asyncio.shield(inflight)
+            return shared_value
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+
+    return _MISSING
+
+
+async def _lead_inflight(
+    key: str,
+    load: Callable[[], Awaitable[tuple[T, Any]]],
+) -> tuple[T, Any]:
+    loading: asyncio.Future[tuple[T, Any]] = asyncio.get_running_loop().create_future()
+    _inflight[key] = loading
+
+    try:
+        loaded = await load()
+    except BaseException:
+        loading.cancel()
+        raise
+    finally:
+        if _inflight.get(key) is loading:
+            del _inflight[key]
+
+    loading.set_result(loaded)
+    return loaded
+
+
 def redis_cache(
     prefix: Optional[str] = None,
     ttl: ExpiryT = TIME_1M,
+    local_ttl: Optional[float] = None,
 ) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
     def decorator(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
         return_type: Any = get_type_hints(func)["return"]
@@ -45,24 +206,24 @@ def redis_cache(
             ]
             key: str = ":".join(key_parts)
 
-            try:
-                cached_value: Optional[bytes] = await redis.get(key)
-                if cached_value is not None:
-                    logger.debug(f"Cache hit: '{key}'")
-                    parsed = json_utils.decode(cached_value.decode())
-                    return type_adapter.validate_python(parsed)
-            except Exception as exception:
-                logger.warning(f"Cache read failed for key '{key}': {exception}")
-
-            logger.debug(f"Cache miss: '{key}'. Executing function")
-            result: T = await func(*args, **kwargs)
-
-            try:
-                safe_result = prepare_for_cache(type_adapter.dump_python(result))
-                await redis.setex(key, ttl, json_utils.encode(safe_result))
-                logger.debug(f"Result cached: '{key}' (ttl={ttl})")
-            except Exception as exception:
-                logger.warning(f"Cache write failed for key '{key}': {exception}")
+            if local_ttl is not None:
+                _ensure_listener(redis)
+                value = local_cache.get(key)
+                if value is not _MISSING:
+                    return type_adapter.validate_python(value)
+
+            shared_value = await _join_inflight(key)
+            if shared_value is not _MISSING:
+                return type_adapter.validate_python(shared_value)
+
+            version = local_cache.version
+            result, value = await _lead_inflight(
+                key, lambda: _fetch(redis, key, ttl, type_adapter, lambda: func(*args, **kwargs))
+            )
+
+            # Skip the local tier if the key was invalidated while loading
+            if local_ttl is not None and local_cache.version == version:
+                local_cache.set(key, value, local_ttl)
 
             return result
 
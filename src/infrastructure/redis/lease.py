@@ -0,0 +1,36 @@
+from typing import Final
+
+from redis.asyncio import Redis
+
+# A lease is a key holding its owner's token; only the owner may extend or drop it
+
+RENEW_LEASE_SCRIPT: Final[str] = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LEASE_SCRIPT: Final[str] = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+async def hold_lease(redis_client: Redis, key: str, token: str, ttl: int) -> bool:
+    # Takes a free lease or extends one we already own
+    if await redis_client.set(key, token, ex=ttl, nx=True):
+        return True
+
+    return await renew_lease(redis_client, key, token, ttl)
+
+
+async def renew_lease(redis_client: Redis, key: str, token: str, ttl: int) -> bool:
+    renewed = await redis_client.eval(RENEW_LEASE_SCRIPT, 1, key, token, ttl)  # type: ignore[misc]
+    return bool(renewed)
+
+
+async def release_lease(redis_client: Redis, key: str, token: str) -> None:
+    await redis_client.eval(RELEASE_LEASE_SCRIPT, 1, key, token)  # type: ignore[misc]
@@ -33,10 +33,18 @@ class RedisRepository:
         value = json_utils.decode(value)
         return TypeAdapter[T](validator).validate_python(value)
 
-    async def set(self, key: StorageKey, value: Any, ex: Optional[ExpiryT] = None) -> None:
+    async def set(
+        self,
+        key: StorageKey,
+        value: Any,
+        ex: Optional[ExpiryT] = None,
+        nx: bool = False,
+    ) -> bool:
         if isinstance(value, BaseModel):
             value = value.model_dump(exclude_defaults=True)
-        await self.client.set(name=key.pack(), value=json_utils.encode(value), ex=ex)
+        return bool(
+            await self.client.set(name=key.pack(), value=json_utils.encode(value), ex=ex, nx=nx)
+        )
 
     async def exists(self, key: StorageKey) -> bool:
         return cast(bool, await self.client.exists(key.pack()))
@@ -44,6 +52,9 @@ class RedisRepository:
     async def delete(self, key: StorageKey) -> None:
         await self.client.delete(key.pack())
 
+    async def expire(self, key: StorageKey, ex: ExpiryT) -> bool:
+        return bool(await self.client.expire(key.pack(), ex))
+
     async def close(self) -> None:
         await self.client.aclose(close_connection_pool=True)
 
@@ -1,4 +1,13 @@
-from . import notifications, payments, redirects, referrals, subscriptions, updates
+from . import (
+    notifications,
+    payments,
+    redirects,
+    referrals,
+    statistics,
+    subscriptions,
+    updates,
+    users,
+)
 
 __all__ = [
     "notifications",
@@ -7,4 +16,6 @@ __all__ = [
     "subscriptions",
     "updates",
     "referrals",
+    "statistics",
+    "users",
 ]
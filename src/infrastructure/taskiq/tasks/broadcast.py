@@ -1,14 +1,30 @@
 import asyncio
+from contextlib import suppress
+from datetime import timedelta
+from functools import partial
 from typing import Optional, cast
+from uuid import UUID
 
 from aiogram import Bot
 from dishka.integrations.taskiq import FromDishka, inject
 from loguru import logger
 
+from src.core.constants import (
+    BROADCAST_BATCH_SIZE,
+    BROADCAST_HEARTBEAT_INTERVAL,
+    BROADCAST_LEASE_TTL,
+    BROADCAST_SHARD_COUNT,
+)
 from src.core.enums import BroadcastMessageStatus, BroadcastStatus
 from src.core.utils.iterables import chunked
 from src.core.utils.message_payload import MessagePayload
-from src.infrastructure.database.models.dto import BroadcastDto, BroadcastMessageDto, UserDto
+from src.core.utils.rate_limiter import TelegramRateLimiter
+from src.core.utils.time import datetime_now
+from src.infrastructure.database.models.dto import (
+    BroadcastDto,
+    BroadcastMessageDto,
+    BroadcastRecipientDto,
+)
 from src.infrastructure.taskiq.broker import broker
 from src.services.broadcast import BroadcastService
 from src.services.notification import NotificationService
@@ -18,93 +34,265 @@ from src.services.notification import NotificationService
 @inject
 async def send_broadcast_task(
     broadcast: BroadcastDto,
-    users: list[UserDto],
     payload: MessagePayload,
-    notification_service: FromDishka[NotificationService],
     broadcast_service: FromDishka[BroadcastService],
 ) -> None:
     broadcast_id = cast(int, broadcast.id)
-    total_users = len(users)
-    loop = asyncio.get_running_loop()
-    start_time = loop.time()
+    task_id = broadcast.task_id
 
-    logger.info(f"Started sending broadcast '{broadcast_id}', total users: {total_users}")
+    lease = await broadcast_service.acquire_lease(task_id)
+    if not lease:
+        logger.warning(f"Broadcast '{broadcast_id}' is already processed by another worker")
+        return
+
+    heartbeat = asyncio.create_task(_keep_lease(broadcast_service, task_id, lease))
+    dispatched = False
 
     try:
-        broadcast_messages = await broadcast_service.create_messages(
-            broadcast_id,
-            [
-                BroadcastMessageDto(user_id=user.telegram_id, status=BroadcastMessageStatus.PENDING)
-                for user in users
-            ],
+        if await broadcast_service.get_status(task_id) != BroadcastStatus.PROCESSING:
+            logger.info(f"Broadcast '{broadcast_id}' is no longer processing, skipping")
+            return
+
+        logger.info(
+            f"Started preparing broadcast '{broadcast_id}' for audience '{broadcast.audience}' "
+            f"(plan={broadcast.plan_id}), expected users: {broadcast.total_count}"
         )
-        logger.debug(
-            f"Created '{len(broadcast_messages)}' message DTOs for broadcast '{broadcast_id}'"
+
+        if not await _create_pending_messages(broadcast, heartbeat, broadcast_service):
+            return
+
+        for shard in range(BROADCAST_SHARD_COUNT):
+            await send_broadcast_shard_task.kiq(broadcast, payload, shard, BROADCAST_SHARD_COUNT)
+
+        dispatched = True
+        logger.info(
+            f"Dispatched broadcast '{broadcast_id}' to '{BROADCAST_SHARD_COUNT}' shard tasks"
+        )
+    finally:
+        await _stop_heartbeat(heartbeat)
+
+        # Queued shards hold no lease until a worker picks them up, so the parent lease
+        # is left to expire and covers them meanwhile
+        if dispatched:
+            await broadcast_service.renew_lease(task_id, lease)
+        else:
+            await broadcast_service.release_lease(task_id, lease)
+
+
+@broker.task
+@inject
+async def send_broadcast_shard_task(
+    broadcast: BroadcastDto,
+    payload: MessagePayload,
+    shard: int,
+    shard_count: int,
+    notification_service: FromDishka[NotificationService],
+    broadcast_service: FromDishka[BroadcastService],
+    rate_limiter: FromDishka[TelegramRateLimiter],
+) -> None:
+    broadcast_id = cast(int, broadcast.id)
+    task_id = broadcast.task_id
+
+    lease = await broadcast_service.acquire_lease(task_id, shard)
+    if not lease:
+        logger.warning(
+            f"Shard '{shard}' of broadcast '{broadcast_id}' is already processed by another worker"
         )
+        return
+
+    heartbeat = asyncio.create_task(_keep_lease(broadcast_service, task_id, lease, shard))
+
+    try:
+        await _process_shard(
+            broadcast,
+            payload,
+            shard,
+            shard_count,
+            heartbeat,
+            notification_service,
+            broadcast_service,
+            rate_limiter,
+        )
+    finally:
+        await _stop_heartbeat(heartbeat)
+        await broadcast_service.release_lease(task_id, lease, shard)
+
+
+@broker.task(schedule=[{"cron": "*/5 * * * *"}])
+@inject
+async def resume_broadcasts_task(broadcast_service: FromDishka[BroadcastService]) -> None:
+    broadcasts = await broadcast_service.get_by_status(BroadcastStatus.PROCESSING)
+
+    for broadcast in broadcasts:
+        if await broadcast_service.has_lease(broadcast.task_id):
+            continue
+
+        if broadcast.updated_at and datetime_now() - broadcast.updated_at < timedelta(
+            seconds=BROADCAST_LEASE_TTL
+        ):
+            continue
+
+        logger.warning(f"Broadcast '{broadcast.id}' has no active worker, resuming")
+        await send_broadcast_task.kiq(broadcast, broadcast.payload)
+
+
+async def _keep_lease(
+    broadcast_service: BroadcastService,
+    task_id: UUID,
+    lease: str,
+    shard: Optional[int] = None,
+) -> None:
+    while True:
+        await asyncio.sleep(BROADCAST_HEARTBEAT_INTERVAL)
+
+        if not await broadcast_service.renew_lease(task_id, lease, shard):
+            logger.warning(f"Lost lease for broadcast '{task_id}' (shard '{shard}')")
+            return
+
+
+async def _stop_heartbeat(heartbeat: asyncio.Task[None]) -> None:
+    heartbeat.cancel()
+    with suppress(asyncio.CancelledError):
+        await heartbeat
+
+
+async def _create_pending_messages(
+    broadcast: BroadcastDto,
+    heartbeat: asyncio.Task[None],
+    broadcast_service: BroadcastService,
+) -> bool:
+    broadcast_id = cast(int, broadcast.id)
+
+    try:
+        async for recipients in broadcast_service.iter_audience(
+            broadcast.audience,
+            broadcast.plan_id,
+            exclude_broadcast_id=broadcast_id,
+        ):
+            if heartbeat.done():
+                return False
+
+            await broadcast_service.create_messages(
+                broadcast_id,
+                [
+                    BroadcastMessageDto(
+                        user_id=recipient.telegram_id,
+                        status=BroadcastMessageStatus.PENDING,
+                    )
+                    for recipient in recipients
+                ],
+            )
     except Exception:
         logger.exception(f"Failed to create message DTOs for broadcast '{broadcast_id}'")
         broadcast.status = BroadcastStatus.ERROR
         await broadcast_service.update(broadcast)
-        return
+        return False
 
-    async def send_message(user: UserDto, message: BroadcastMessageDto) -> None:
-        try:
-            tg_message = await notification_service.notify_user(user=user, payload=payload)
-            if tg_message:
-                message.message_id = tg_message.message_id
-                message.status = BroadcastMessageStatus.SENT
-            else:
-                message.status = BroadcastMessageStatus.FAILED
-        except Exception:
-            logger.exception(
-                f"Failed to send broadcast '{broadcast_id}' message for '{user.telegram_id}'",
-            )
-            message.status = BroadcastMessageStatus.FAILED
-
-    user_message_pairs = list(zip(users, broadcast_messages))
-    last_known_status: Optional[BroadcastStatus] = broadcast.status
+    return True
 
-    for i, batch in enumerate(chunked(user_message_pairs, 20), start=1):
-        batch_start = loop.time()
 
-        last_known_status = await broadcast_service.get_status(broadcast.task_id)
-        if last_known_status == BroadcastStatus.CANCELED:
-            break
+async def _send_message(
+    broadcast_id: int,
+    recipient: BroadcastRecipientDto,
+    message: BroadcastMessageDto,
+    payload: MessagePayload,
+    notification_service: NotificationService,
+    rate_limiter: TelegramRateLimiter,
+) -> None:
+    try:
+        tg_message = await rate_limiter.execute(
+            recipient.telegram_id,
+            partial(notification_service.notify_user, user=recipient, payload=payload),
+        )
+        if tg_message:
+            message.message_id = tg_message.message_id
+            message.status = BroadcastMessageStatus.SENT
+        else:
+            message.status = BroadcastMessageStatus.FAILED
+    except Exception:
+        logger.exception(
+            f"Failed to send broadcast '{broadcast_id}' message for '{recipient.telegram_id}'",
+        )
+        message.status = BroadcastMessageStatus.FAILED
 
-        tasks = [send_message(u, m) for u, m in batch]
-        await asyncio.gather(*tasks)
 
-        _, messages_batch = zip(*batch)
-        await broadcast_service.bulk_update_messages(list(messages_batch))
+async def _process_shard(
+    broadcast: BroadcastDto,
+    payload: MessagePayload,
+    shard: int,
+    shard_count: int,
+    heartbeat: asyncio.Task[None],
+    notification_service: NotificationService,
+    broadcast_service: BroadcastService,
+    rate_limiter: TelegramRateLimiter,
+) -> None:
+    broadcast_id = cast(int, broadcast.id)
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
 
-        batch_elapsed = loop.time() - batch_start
-        logger.info(f"Batch {i}: sent {len(batch)} messages in {batch_elapsed:.2f}s")
+    logger.info(f"Started sending broadcast '{broadcast_id}' shard {shard + 1}/{shard_count}")
 
-        wait_time = 1.0 - batch_elapsed
-        if wait_time > 0:
-            await asyncio.sleep(wait_time)
+    last_known_status: Optional[BroadcastStatus] = broadcast.status
+    success_count = 0
+    failed_count = 0
+    i = 0
+
+    async for pending in broadcast_service.iter_pending_messages(
+        broadcast_id,
+        shard=shard,
+        shard_count=shard_count,
+    ):
+        for batch in chunked(pending, BROADCAST_BATCH_SIZE):
+            i += 1
+            batch_start = loop.time()
+
+            if heartbeat.done():
+                logger.warning(f"Stopped broadcast '{broadcast_id}' after losing its lease")
+                return
+
+            last_known_status = await broadcast_service.get_status(broadcast.task_id)
+            if last_known_status != BroadcastStatus.PROCESSING:
+                break
+
+            await asyncio.gather(
+                *(
+                    _send_message(broadcast_id, r, m, payload, notification_service, rate_limiter)
+                    for r, m in batch
+                )
+            )
 
-    broadcast.success_count = sum(
-        1 for m in broadcast_messages if m.status == BroadcastMessageStatus.SENT
-    )
-    broadcast.failed_count = sum(
-        1 for m in broadcast_messages if m.status == BroadcastMessageStatus.FAILED
-    )
+            sent, failed = await broadcast_service.commit_messages(
+                broadcast_id,
+                [m for _, m in batch],
+            )
+            success_count += sent
+            failed_count += failed
 
-    broadcast.status = (
-        BroadcastStatus.CANCELED
-        if last_known_status == BroadcastStatus.CANCELED
-        else BroadcastStatus.COMPLETED
-    )
+            batch_elapsed = loop.time() - batch_start
+            logger.info(
+                f"Shard {shard + 1}/{shard_count}, batch {i}: sent {len(batch)} messages "
+                f"in {batch_elapsed:.2f}s (rate: {rate_limiter.rate:.2f} msg/s)"
+            )
 
-    await broadcast_service.update(broadcast)
+        if last_known_status != BroadcastStatus.PROCESSING:
+            break
 
     total_elapsed = loop.time() - start_time
     logger.info(
-        f"Finished broadcast '{broadcast_id}' in {total_elapsed:.2f}s "
-        f"(sent: {broadcast.success_count}, failed: {broadcast.failed_count})"
+        f"Finished broadcast '{broadcast_id}' shard {shard + 1}/{shard_count} "
+        f"in {total_elapsed:.2f}s (sent: {success_count}, failed: {failed_count})"
     )
 
+    if last_known_status != BroadcastStatus.PROCESSING:
+        return
+
+    completed = await broadcast_service.complete_if_done(broadcast_id)
+    if completed:
+        logger.info(
+            f"Completed broadcast '{broadcast_id}' "
+            f"(sent: {completed.success_count}, failed: {completed.failed_count})"
+        )
+
 
 @broker.task
 @inject
@@ -112,6 +300,7 @@ async def delete_broadcast_task(
     broadcast: BroadcastDto,
     bot: FromDishka[Bot],
     broadcast_service: FromDishka[BroadcastService],
+    rate_limiter: FromDishka[TelegramRateLimiter],
 ) -> tuple[int, int, int]:
     broadcast_id = cast(int, broadcast.id)
     logger.info(f"Started deleting messages for broadcast '{broadcast_id}'")
@@ -137,7 +326,10 @@ async def delete_broadcast_task(
             return message
 
         try:
-            deleted = await bot.delete_message(chat_id=user_id, message_id=message_id)
+            deleted = await rate_limiter.execute(
+                user_id,
+                partial(bot.delete_message, chat_id=user_id, message_id=message_id),
+            )
             if deleted:
                 message.status = BroadcastMessageStatus.DELETED
             else:
@@ -146,7 +338,7 @@ async def delete_broadcast_task(
             logger.exception(f"Exception deleting message for user '{user_id}'. ID: '{message_id}'")
         return message
 
-    for i, batch in enumerate(chunked(broadcast.messages, 20), start=1):
+    for i, batch in enumerate(chunked(broadcast.messages, BROADCAST_BATCH_SIZE), start=1):
         batch_start = loop.time()
         tasks = [delete_message(m) for m in batch]
         results = await asyncio.gather(*tasks)
@@ -156,11 +348,10 @@ async def delete_broadcast_task(
         await broadcast_service.bulk_update_messages(results)
 
         batch_elapsed = loop.time() - batch_start
-        logger.info(f"Batch {i}: processed {len(batch)} messages in {batch_elapsed:.2f}s")
-
-        wait_time = 1.0 - batch_elapsed
-        if wait_time > 0:
-            await asyncio.sleep(wait_time)
+        logger.info(
+            f"Batch {i}: processed {len(batch)} messages in {batch_elapsed:.2f}s "
+            f"(rate: {rate_limiter.rate:.2f} msg/s)"
+        )
 
     total_elapsed = loop.time() - start_time
     logger.info(
@@ -1,48 +1,72 @@
+import asyncio
+import hashlib
+import random
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional, TypeVar, cast
 from uuid import UUID
 
+import httpx
 from dishka.integrations.taskiq import FromDishka, inject
 from loguru import logger
 from remnapy import RemnawaveSDK
-from remnapy.exceptions import BadRequestError
+from remnapy.exceptions import ApiError, ConflictError, NetworkError
 from remnapy.models import CreateUserRequestDto, UserResponseDto
 
-from src.core.storage.keys import SyncRunningKey
+from src.core.config import AppConfig
+from src.core.constants import (
+    IMPORT_CHECKPOINT_BATCH_SIZE,
+    IMPORT_CHECKPOINT_TTL,
+    IMPORT_MAX_ATTEMPTS,
+    IMPORT_RETRY_DELAY,
+    IMPORT_RETRY_MAX_DELAY,
+    SYNC_BATCH_SIZE,
+    SYNC_CHECKPOINT_DRIFT,
+    SYNC_FETCH_CONCURRENCY,
+    SYNC_PAGE_SIZE,
+    SYNC_RUNNING_TTL,
+    SYNC_WORKERS,
+)
+from src.core.storage.keys import (
+    ImportCheckpointKey,
+    SyncCheckpointKey,
+    SyncFailedUsersKey,
+    SyncRunningKey,
+)
+from src.core.utils.time import datetime_now
+from src.infrastructure.database.models.dto import SubscriptionDto, UserDto
 from src.infrastructure.redis.repository import RedisRepository
 from src.infrastructure.taskiq.broker import broker
 from src.services.remnawave import RemnawaveService
 from src.services.subscription import SubscriptionService
 from src.services.user import UserService
 
+T = TypeVar("T")
+
 
 @broker.task(retry_on_error=False)
 @inject
 async def import_exported_users_task(
     imported_users: list[dict],
     active_internal_squads: list[UUID],
+    config: FromDishka[AppConfig],
+    redis_repository: FromDishka[RedisRepository],
     remnawave: FromDishka[RemnawaveSDK],
-) -> tuple[int, int]:
+) -> dict[str, Any]:
     logger.info(f"Starting import of '{len(imported_users)}' users")
 
-    success_count = 0
-    failed_count = 0
-
-    for user in imported_users:
-        try:
-            username = user["username"]
-            created_user = CreateUserRequestDto.model_validate(user)
-            created_user.active_internal_squads = active_internal_squads
-            await remnawave.users.create_user(created_user)
-            success_count += 1
-        except BadRequestError as error:
-            logger.warning(f"User '{username}' already exists, skipping. Error: {error}")
-            failed_count += 1
-
-        except Exception as exception:
-            logger.exception(f"Failed to create user '{username}' exception: {exception}")
-            failed_count += 1
+    panel_import = PanelImport(
+        redis_repository,
+        remnawave,
+        active_internal_squads,
+        concurrency=config.remnawave.import_concurrency,
+    )
+    result = await panel_import.run(imported_users)
 
-    logger.info(f"Import completed: '{success_count}' successful, '{failed_count}' failed")
-    return success_count, failed_count
+    logger.info(
+        f"Import completed: '{result['created']}' created, '{result['skipped']}' skipped, "
+        f"'{result['failed']}' failed"
+    )
+    return result
 
 
 @broker.task(retry_on_error=False)
@@ -54,75 +78,500 @@ async def sync_all_users_from_panel_task(
     user_service: FromDishka[UserService],
     subscription_service: FromDishka[SubscriptionService],
 ) -> dict[str, int]:
-    key = SyncRunningKey()
-    all_remna_users: list[UserResponseDto] = []
-    start = 0
-    size = 50
-
-    stats = await remnawave.system.get_stats()
-    total_users = stats.users.total_users
+    panel_sync = PanelSync(
+        redis_repository,
+        remnawave,
+        remnawave_service,
+        user_service,
+        subscription_service,
+    )
+    return await _run_panel_sync(panel_sync, redis_repository)
 
-    for start in range(0, total_users, size):
-        response = await remnawave.users.get_all_users(start=start, size=size)
-        if not response.users:
-            break
 
-        all_remna_users.extend(response.users)
-        start += len(response.users)
+@broker.task(schedule=[{"cron": "*/10 * * * *"}], retry_on_error=False)
+@inject
+async def sync_updated_users_from_panel_task(
+    redis_repository: FromDishka[RedisRepository],
+    remnawave: FromDishka[RemnawaveSDK],
+    remnawave_service: FromDishka[RemnawaveService],
+    user_service: FromDishka[UserService],
+    subscription_service: FromDishka[SubscriptionService],
+) -> None:
+    progress = {"processed": 0, "total": 0}
 
-        if len(response.users) < size:
-            break
+    if not await redis_repository.set(SyncRunningKey(), progress, ex=SYNC_RUNNING_TTL, nx=True):
+        logger.debug("Panel sync is already running, skipping incremental sync")
+        return
 
-    bot_users = await user_service.get_all()
-    bot_users_map = {user.telegram_id: user for user in bot_users}
+    since = await redis_repository.get(SyncCheckpointKey(), datetime)
+    panel_sync = PanelSync(
+        redis_repository,
+        remnawave,
+        remnawave_service,
+        user_service,
+        subscription_service,
+        since=since,
+    )
+    await _run_panel_sync(panel_sync, redis_repository)
 
-    logger.info(f"Total users in panel: '{len(all_remna_users)}'")
-    logger.info(f"Total users in bot: '{len(bot_users)}'")
 
-    added_users = 0
-    added_subscription = 0
-    updated = 0
-    errors = 0
-    missing_telegram = 0
+async def _run_panel_sync(
+    panel_sync: "PanelSync",
+    redis_repository: RedisRepository,
+) -> dict[str, int]:
+    # Leave room for clock drift between the bot and the panel
+    started_at = datetime_now() - timedelta(seconds=SYNC_CHECKPOINT_DRIFT)
 
     try:
-        for remna_user in all_remna_users:
-            try:
-                if not remna_user.telegram_id:
-                    missing_telegram += 1
-                    continue
-
-                user = bot_users_map.get(remna_user.telegram_id)
-
-                if not user:
-                    await remnawave_service.sync_user(remna_user)
-                    added_users += 1
-                else:
-                    current_subscription = await subscription_service.get_current(user.telegram_id)
-                    if not current_subscription:
-                        await remnawave_service.sync_user(remna_user)
-                        added_subscription += 1
-                    else:
-                        await remnawave_service.sync_user(remna_user)
-                        updated += 1
+        result = await panel_sync.run()
+        logger.info(f"Sync users summary: '{result}'")
+    finally:
+        await redis_repository.delete(SyncRunningKey())
+
+    # The checkpoint always moves on, failed users are retried by ID on the next run
+    await redis_repository.delete(SyncFailedUsersKey())
+    if panel_sync.failed:
+        await redis_repository.collection_add(SyncFailedUsersKey(), *panel_sync.failed)
+        logger.warning(f"'{len(panel_sync.failed)}' users failed to sync, retrying them next run")
+
+    await redis_repository.set(SyncCheckpointKey(), started_at)
+    return result
+
+
+class PanelSync:
+    def __init__(
+        self,
+        redis_repository: RedisRepository,
+        remnawave: RemnawaveSDK,
+        remnawave_service: RemnawaveService,
+        user_service: UserService,
+        subscription_service: SubscriptionService,
+        since: Optional[datetime] = None,
+    ) -> None:
+        self.redis_repository = redis_repository
+        self.remnawave = remnawave
+        self.remnawave_service = remnawave_service
+        self.user_service = user_service
+        self.subscription_service = subscription_service
+        self.since = since
+
+        self.total = 0
+        self.processed = 0
+        self.result = {
+            "total_panel_users": 0,
+            "total_bot_users": 0,
+            "added_users": 0,
+            "added_subscription": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "errors": 0,
+            "missing_telegram": 0,
+        }
+
+        self.failed: set[int] = set()
+
+        self._retry: set[int] = set()
+        self._loaded: set[int] = set()
+        self._bot_users: set[int] = set()
+        self._subscriptions: dict[int, SubscriptionDto] = {}
+        self._pending: dict[int, SubscriptionDto] = {}
+        self._created: dict[int, tuple[UserResponseDto, SubscriptionDto]] = {}
+        # Services share one unit of work, so every database call goes through this lock
+        self._db_lock = asyncio.Lock()
+        self._queue: asyncio.Queue[Optional[UserResponseDto]] = asyncio.Queue(
+            maxsize=SYNC_PAGE_SIZE * SYNC_FETCH_CONCURRENCY
+        )
+
+    async def run(self) -> dict[str, int]:
+        stats = await self.remnawave.system.get_stats()
+        self.total = stats.users.total_users
+
+        # An incremental run only loads the users that changed, page by page
+        if self.since is None:
+            self._bot_users = {user.telegram_id for user in await self.user_service.get_all()}
+            self._subscriptions = await self.subscription_service.get_all_current()
+            self.result["total_bot_users"] = len(self._bot_users)
+        else:
+            self._retry = {
+                int(telegram_id)
+                for telegram_id in await self.redis_repository.collection_members(
+                    SyncFailedUsersKey()
+                )
+            }
+            self.result["total_bot_users"] = await self.user_service.count()
+
+        logger.info(f"Total users in panel: '{self.total}'")
+        logger.info(f"Total users in bot: '{self.result['total_bot_users']}'")
 
+        workers = [asyncio.create_task(self._worker()) for _ in range(SYNC_WORKERS)]
+
+        try:
+            await self._fetch_pages()
+        finally:
+            for _ in workers:
+                await self._queue.put(None)
+            await asyncio.gather(*workers)
+            await self._flush()
+
+        await self._report_progress()
+        return self.result
+
+    async def _fetch_pages(self) -> None:
+        semaphore = asyncio.Semaphore(SYNC_FETCH_CONCURRENCY)
+
+        async def fetch_page(start: int) -> int:
+            async with semaphore:
+                response = await self.remnawave.users.get_all_users(
+                    start=start,
+                    size=SYNC_PAGE_SIZE,
+                )
+                changed = [u for u in response.users if self._is_changed(u)]
+
+                self.result["unchanged"] += len(response.users) - len(changed)
+                self.processed += len(response.users) - len(changed)
+
+                if self.since is not None:
+                    await self._load(changed)
+
+                for remna_user in changed:
+                    await self._queue.put(remna_user)
+
+            self.result["total_panel_users"] += len(response.users)
+            return len(response.users)
+
+        starts = range(0, self.total, SYNC_PAGE_SIZE)
+        sizes = await asyncio.gather(*(fetch_page(start) for start in starts))
+
+        # Users created after the stats snapshot land on pages past the expected total
+        start = len(starts) * SYNC_PAGE_SIZE
+        if not sizes or sizes[-1] == SYNC_PAGE_SIZE:
+            while await fetch_page(start) == SYNC_PAGE_SIZE:
+                start += SYNC_PAGE_SIZE
+
+    async def _worker(self) -> None:
+        while (remna_user := await self._queue.get()) is not None:
+            try:
+                await self._sync_user(remna_user)
             except Exception as exception:
                 logger.exception(
                     f"Error syncing RemnaUser '{remna_user.telegram_id}' exception: {exception}"
                 )
-                errors += 1
-
-        result = {
-            "total_panel_users": len(all_remna_users),
-            "total_bot_users": len(bot_users),
-            "added_users": added_users,
-            "added_subscription": added_subscription,
-            "updated": updated,
-            "errors": errors,
-            "missing_telegram": missing_telegram,
+                self.result["errors"] += 1
+
+                if remna_user.telegram_id:
+                    self.failed.add(remna_user.telegram_id)
+
+            self.processed += 1
+            if self.processed % SYNC_BATCH_SIZE == 0:
+                await self._report_progress()
+
+    async def _sync_user(self, remna_user: UserResponseDto) -> None:
+        telegram_id = remna_user.telegram_id
+
+        if not telegram_id:
+            self.result["missing_telegram"] += 1
+            return
+
+        subscription = self._subscriptions.get(telegram_id)
+        synced = await self.remnawave_service.build_synced_subscription(remna_user, subscription)
+
+        if synced is None:
+            self.result["unchanged"] += 1
+            return
+
+        if subscription:
+            self._pending[telegram_id] = synced
+            self.result["updated"] += 1
+
+            if len(self._pending) >= SYNC_BATCH_SIZE:
+                await self._flush()
+            return
+
+        async with self._db_lock:
+            # Another panel user with the same Telegram ID may have been created meanwhile
+            created = telegram_id not in self._subscriptions
+            if created:
+                # Within a batch the last panel user for a Telegram ID wins
+                self._created[telegram_id] = (remna_user, synced)
+
+        if not created:
+            await self._sync_user(remna_user)
+        elif len(self._created) >= SYNC_BATCH_SIZE:
+            await self._flush()
+
+    def _is_changed(self, remna_user: UserResponseDto) -> bool:
+        return (
+            self.since is None
+            or not remna_user.telegram_id
+            or remna_user.updated_at >= self.since
+            or remna_user.telegram_id in self._retry
+        )
+
+    async def _load(self, remna_users: list[UserResponseDto]) -> None:
+        telegram_ids = list(
+            {cast(int, u.telegram_id) for u in remna_users if u.telegram_id} - self._loaded
+        )
+
+        if not telegram_ids:
+            return
+
+        async with self._db_lock:
+            users = await self.user_service.get_by_ids(telegram_ids)
+            subscriptions = await self.subscription_service.get_all_current(telegram_ids)
+
+            self._bot_users.update(user.telegram_id for user in users)
+            # Never replace a subscription created by this run with a stale read
+            for telegram_id, subscription in subscriptions.items():
+                self._subscriptions.setdefault(telegram_id, subscription)
+            self._loaded.update(telegram_ids)
+
+    async def _create_many(
+        self, created: dict[int, tuple[UserResponseDto, SubscriptionDto]]
+    ) -> None:
+        new_users = [
+            remna_user
+            for telegram_id, (remna_user, _) in created.items()
+            if telegram_id not in self._bot_users
+        ]
+
+        await self.user_service.create_many_from_panel(new_users)
+        self._bot_users.update(cast(int, u.telegram_id) for u in new_users)
+        self.result["added_users"] += len(new_users)
+
+        subscriptions = await self.subscription_service.create_many(
+            {telegram_id: synced for telegram_id, (_, synced) in created.items()}
+        )
+        self._subscriptions.update(subscriptions)
+        self.result["added_subscription"] += len(created) - len(new_users)
+
+    async def _create(self, remna_user: UserResponseDto, synced: SubscriptionDto) -> None:
+        telegram_id = cast(int, remna_user.telegram_id)
+
+        if telegram_id in self._bot_users:
+            user = await self.user_service.get(telegram_id)
+            self.result["added_subscription"] += 1
+        else:
+            user = await self.user_service.create_from_panel(remna_user)
+            self._bot_users.add(telegram_id)
+            self.result["added_users"] += 1
+
+        self._subscriptions[telegram_id] = await self.subscription_service.create(
+            cast(UserDto, user), synced
+        )
+
+    async def _flush(self) -> None:
+        async with self._db_lock:
+            created, self._created = self._created, {}
+            pending, self._pending = self._pending, {}
+
+            try:
+                await self._create_many(created)
+            except Exception as exception:
+                # One conflicting row fails the whole batch, so retry the rest one by one
+                logger.warning(
+                    f"Failed to bulk create '{len(created)}' synced users: {exception}. "
+                    "Retrying one by one"
+                )
+                for telegram_id, (remna_user, synced) in created.items():
+                    if telegram_id in self._subscriptions:
+                        continue
+                    try:
+                        await self._create(remna_user, synced)
+                    except Exception as error:
+                        logger.exception(
+                            f"Error creating RemnaUser '{telegram_id}' exception: {error}"
+                        )
+                        self.result["errors"] += 1
+                        self.failed.add(telegram_id)
+
+            try:
+                await self.subscription_service.update_many(pending)
+            except Exception as exception:
+                logger.exception(
+                    f"Failed to save '{len(pending)}' synced subscriptions: {exception}"
+                )
+                self.result["updated"] -= len(pending)
+                self.result["errors"] += len(pending)
+                self.failed.update(pending)
+
+    async def _report_progress(self) -> None:
+        await self.redis_repository.set(
+            SyncRunningKey(),
+            value={**self.result, "processed": self.processed, "total": self.total},
+            ex=SYNC_RUNNING_TTL,
+        )
+
+
+def get_import_id(imported_users: list[dict], active_internal_squads: list[UUID]) -> str:
+    # The same export with the same squads resumes from the same checkpoint
+    digest = hashlib.sha256()
+
+    for value in sorted(user["username"] for user in imported_users):
+        digest.update(f"{value}\n".encode())
+    for squad in sorted(map(str, active_internal_squads)):
+        digest.update(f"{squad}\n".encode())
+
+    return digest.hexdigest()[:32]
+
+
+def is_retryable(exception: Exception) -> bool:
+    # Timeouts and dropped connections, 5xx and rate limiting; anything else will fail again
+    if isinstance(exception, httpx.TransportError):
+        return True
+
+    if isinstance(exception, ApiError):
+        return (
+            isinstance(exception, NetworkError)
+            or exception.status_code == 429
+            or exception.status_code >= 500
+        )
+
+    return False
+
+
+class PanelImport:
+    # Usernames already present in the panel are looked up before creating anything, so an
+    # existing user is skipped instead of being discovered through a failed request. Every
+    # finished username is checkpointed in Redis: running the same import again only creates
+    # what the previous run did not get to.
+
+    def __init__(
+        self,
+        redis_repository: RedisRepository,
+        remnawave: RemnawaveSDK,
+        active_internal_squads: list[UUID],
+        concurrency: int,
+    ) -> None:
+        self.redis_repository = redis_repository
+        self.remnawave = remnawave
+        self.active_internal_squads = active_internal_squads
+        self.concurrency = concurrency
+
+        self.processed = 0
+        self.result = {
+            "total": 0,
+            "created": 0,
+            "skipped": 0,
+            "failed": 0,
         }
+        self.failed_usernames: list[str] = []
+        self._finished: list[str] = []
 
-        logger.info(f"Sync users summary: '{result}'")
-        return result
-    finally:
-        await redis_repository.delete(key)
+    async def run(self, imported_users: list[dict]) -> dict[str, Any]:
+        key = ImportCheckpointKey(
+            import_id=get_import_id(imported_users, self.active_internal_squads)
+        )
+        checkpointed = set(await self.redis_repository.collection_members(key))
+        existing = await self._fetch_usernames()
+
+        # The same username twice in the export is created once, with the last entry
+        pending: dict[str, dict] = {}
+        for user in imported_users:
+            username = user["username"]
+
+            if username in checkpointed or username in existing:
+                self.result["skipped"] += 1
+                continue
+
+            if pending.pop(username, None) is not None:
+                self.result["skipped"] += 1
+            pending[username] = user
+
+        self.result["total"] = len(imported_users)
+        logger.info(
+            f"Importing '{len(pending)}' users with concurrency '{self.concurrency}' "
+            f"('{len(checkpointed)}' checkpointed, '{len(existing)}' in panel)"
+        )
+
+        users = iter(pending.values())
+
+        async def worker() -> None:
+            for user in users:
+                await self._create(user)
+
+                self.processed += 1
+                if len(self._finished) >= IMPORT_CHECKPOINT_BATCH_SIZE:
+                    await self._checkpoint(key)
+                    logger.info(f"Import progress: '{self.processed}' / '{len(pending)}'")
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            await self._checkpoint(key)
+
+        if not self.failed_usernames:
+            await self.redis_repository.delete(key)
+        else:
+            logger.warning(f"Failed to import users: {self.failed_usernames}")
+
+        return {**self.result, "failed_usernames": self.failed_usernames}
+
+    async def _fetch_usernames(self) -> set[str]:
+        stats = await self._retry("Fetching panel stats", self.remnawave.system.get_stats)
+        semaphore = asyncio.Semaphore(SYNC_FETCH_CONCURRENCY)
+
+        async def fetch_page(start: int) -> list[str]:
+            async with semaphore:
+                response = await self._retry(
+                    f"Fetching panel users from '{start}'",
+                    lambda: self.remnawave.users.get_all_users(start=start, size=SYNC_PAGE_SIZE),
+                )
+            return [remna_user.username for remna_user in response.users]
+
+        # Users created after the stats snapshot are caught as conflicts when creating
+        starts = range(0, stats.users.total_users, SYNC_PAGE_SIZE)
+        pages = await asyncio.gather(*(fetch_page(start) for start in starts))
+        return {username for page in pages for username in page}
+
+    async def _create(self, user: dict) -> None:
+        username = user["username"]
+        attempts = 0
+
+        async def create_user() -> None:
+            nonlocal attempts
+            attempts += 1
+            await self.remnawave.users.create_user(request)
+
+        try:
+            request = CreateUserRequestDto.model_validate(user)
+            request.active_internal_squads = self.active_internal_squads
+            await self._retry(f"Creating user '{username}'", create_user)
+        except ConflictError:
+            # The username was not in the panel when the import started: either an earlier
+            # attempt went through before timing out or someone else created it meanwhile
+            self.result["created" if attempts > 1 else "skipped"] += 1
+        except Exception as exception:
+            logger.error(f"Failed to create user '{username}' exception: {exception}")
+            self.result["failed"] += 1
+            self.failed_usernames.append(username)
+            return
+        else:
+            self.result["created"] += 1
+
+        self._finished.append(username)
+
+    async def _retry(self, description: str, call: Callable[[], Awaitable[T]]) -> T:
+        for attempt in range(1, IMPORT_MAX_ATTEMPTS + 1):
+            try:
+                return await call()
+            except Exception as exception:
+                if attempt == IMPORT_MAX_ATTEMPTS or not is_retryable(exception):
+                    raise
+
+                delay = min(IMPORT_RETRY_MAX_DELAY, IMPORT_RETRY_DELAY * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1)
+                logger.warning(
+                    f"{description} failed with '{exception}', "
+                    f"retrying in '{delay:.1f}s' (attempt {attempt}/{IMPORT_MAX_ATTEMPTS})"
+                )
+                await asyncio.sleep(delay)
+
+        raise RuntimeError("unreachable")
+
+    async def _checkpoint(self, key: ImportCheckpointKey) -> None:
+        if not self._finished:
+            return
+
+        finished, self._finished = self._finished, []
+        await self.redis_repository.collection_add(key, *finished)
+        await self.redis_repository.expire(key, IMPORT_CHECKPOINT_TTL)
@@ -1,14 +1,18 @@
 import asyncio
+from functools import partial
 from typing import Any, Union, cast
 
 from dishka.integrations.taskiq import FromDishka, inject
+from loguru import logger
 
 from src.bot.keyboards import get_buy_keyboard, get_renew_keyboard
-from src.core.constants import BATCH_DELAY, BATCH_SIZE
+from src.core.constants import BROADCAST_BATCH_SIZE
 from src.core.enums import UserNotificationType
 from src.core.utils.iterables import chunked
 from src.core.utils.message_payload import MessagePayload
+from src.core.utils.rate_limiter import TelegramRateLimiter
 from src.core.utils.types import RemnaUserDto
+from src.infrastructure.database.models.dto import UserDto
 from src.infrastructure.taskiq.broker import broker
 from src.services.notification import NotificationService
 from src.services.user import UserService
@@ -35,19 +39,26 @@ async def send_access_opened_notifications_task(
     waiting_user_ids: list[int],
     user_service: FromDishka[UserService],
     notification_service: FromDishka[NotificationService],
+    rate_limiter: FromDishka[TelegramRateLimiter],
 ) -> None:
-    for batch in chunked(waiting_user_ids, BATCH_SIZE):
-        for user_telegram_id in batch:
-            user = await user_service.get(user_telegram_id)
-            await notification_service.notify_user(
-                user=user,
-                payload=MessagePayload(
-                    i18n_key="ntf-access-allowed",
-                    auto_delete_after=None,
-                    add_close_button=True,
-                ),
+    payload = MessagePayload(
+        i18n_key="ntf-access-allowed",
+        auto_delete_after=None,
+        add_close_button=True,
+    )
+
+    async def notify(user: UserDto) -> None:
+        try:
+            await rate_limiter.execute(
+                user.telegram_id,
+                partial(notification_service.notify_user, user=user, payload=payload),
             )
-        await asyncio.sleep(BATCH_DELAY)
+        except Exception as exception:
+            logger.warning(f"Failed to notify user '{user.telegram_id}': {exception}")
+
+    for batch in chunked(waiting_user_ids, BROADCAST_BATCH_SIZE):
+        users = [user for user_id in batch if (user := await user_service.get(user_id))]
+        await asyncio.gather(*(notify(user) for user in users))
 
 
 @broker.task(retry_on_error=True)
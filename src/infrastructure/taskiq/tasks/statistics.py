@@ -0,0 +1,10 @@
+from dishka.integrations.taskiq import FromDishka, inject
+
+from src.infrastructure.taskiq.broker import broker
+from src.services.statistics import StatisticsService
+
+
+@broker.task(schedule=[{"cron": "*/5 * * * *"}], retry_on_error=False)
+@inject
+async def refresh_statistics_task(statistics_service: FromDishka[StatisticsService]) -> None:
+    await statistics_service.refresh_snapshot()
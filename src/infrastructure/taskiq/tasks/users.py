@@ -0,0 +1,14 @@
+from dishka.integrations.taskiq import FromDishka, inject
+
+from src.core.config import AppConfig
+from src.infrastructure.taskiq.broker import broker
+from src.services.user import UserService
+
+
+@broker.task(
+    schedule=[{"interval": AppConfig.get().bot.user_updates_flush_interval}],
+    retry_on_error=False,
+)
+@inject
+async def flush_user_updates_task(user_service: FromDishka[UserService]) -> None:
+    await user_service.flush_pending_updates()
@@ -9,11 +9,14 @@ from aiogram.utils.formatting import Text
 from dishka import AsyncContainer, Scope
 from fastapi import FastAPI
 from loguru import logger
+from redis.asyncio import Redis
 
 from src.__version__ import __version__
 from src.api.endpoints import TelegramWebhookEndpoint
+from src.api.remnawave_events import RemnawaveEventConsumer
+from src.bot.polling import UpdateStreamIngestion
 from src.core.config.app import AppConfig
-from src.core.enums import SystemNotificationType
+from src.core.enums import SystemNotificationType, UpdateMode
 from src.core.utils.message_payload import MessagePayload
 from src.infrastructure.taskiq.tasks.updates import check_bot_update
 from src.services.command import CommandService
@@ -45,22 +48,49 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     await startup_container.close()
 
     allowed_updates = dispatcher.resolve_used_update_types()
-    webhook_info: WebhookInfo = await webhook_service.setup(allowed_updates)
+    is_polling = config.bot.update_mode == UpdateMode.POLLING
+    update_ingestion: Optional[UpdateStreamIngestion] = None
+
+    if is_polling:
+        # getUpdates is rejected by Telegram while a webhook is set
+        await webhook_service.delete(force=True)
+    else:
+        webhook_info: WebhookInfo = await webhook_service.setup(allowed_updates)
+
+        if webhook_service.has_error(webhook_info):
+            logger.critical(
+                f"Webhook has a last error message: '{webhook_info.last_error_message}'"
+            )
+            await notification_service.system_notify(
+                ntf_type=SystemNotificationType.BOT_LIFETIME,
+                payload=MessagePayload.not_deleted(
+                    i18n_key="ntf-event-error-webhook",
+                    i18n_kwargs={"error": webhook_info.last_error_message},
+                ),
+            )
 
-    if webhook_service.has_error(webhook_info):
-        logger.critical(f"Webhook has a last error message: '{webhook_info.last_error_message}'")
-        await notification_service.system_notify(
-            ntf_type=SystemNotificationType.BOT_LIFETIME,
-            payload=MessagePayload.not_deleted(
-                i18n_key="ntf-event-error-webhook",
-                i18n_kwargs={"error": webhook_info.last_error_message},
-            ),
-        )
+    bot: Bot = await container.get(Bot)
 
     await command_service.setup()
-    await telegram_webhook_endpoint.startup()
+    await telegram_webhook_endpoint.startup(bot)
+
+    if is_polling:
+        update_ingestion = UpdateStreamIngestion(
+            dispatcher=dispatcher,
+            bot=bot,
+            redis_client=await container.get(Redis),
+            config=config.bot,
+            allowed_updates=allowed_updates,
+        )
+        await update_ingestion.start()
+
+    remnawave_event_consumer = RemnawaveEventConsumer(
+        container=container,
+        redis_client=await container.get(Redis),
+        config=config.remnawave,
+    )
+    await remnawave_event_consumer.start()
 
-    bot: Bot = await container.get(Bot)
     bot_info = await bot.get_me()
     states: dict[Optional[bool], str] = {True: "Enabled", False: "Disabled", None: "Unknown"}
 
@@ -128,8 +158,15 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         payload=MessagePayload.not_deleted(i18n_key="ntf-event-bot-shutdown"),
     )
 
+    if update_ingestion:
+        await update_ingestion.stop()
+
+    await remnawave_event_consumer.stop()
+
     await telegram_webhook_endpoint.shutdown()
     await command_service.delete()
-    await webhook_service.delete()
+
+    if not is_polling:
+        await webhook_service.delete()
 
     await container.close()
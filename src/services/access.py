@@ -1,3 +1,5 @@
+from typing import Optional
+
 from aiogram import Bot
 from aiogram.types import CallbackQuery, TelegramObject
 from aiogram.types import User as AiogramUser
@@ -11,7 +13,7 @@ from src.core.constants import PURCHASE_PREFIX
 from src.core.enums import AccessMode
 from src.core.storage.keys import AccessWaitListKey
 from src.core.utils.message_payload import MessagePayload
-from src.infrastructure.database.models.dto import UserDto
+from src.infrastructure.database.models.dto import SettingsDto, UserDto
 from src.infrastructure.redis.repository import RedisRepository
 from src.infrastructure.taskiq.tasks.notifications import send_access_opened_notifications_task
 from src.infrastructure.taskiq.tasks.redirects import redirect_to_main_menu_task
@@ -47,9 +49,13 @@ class AccessService(BaseService):
         self.referral_service = referral_service
         self.notification_service = notification_service
 
-    async def is_access_allowed(self, aiogram_user: AiogramUser, event: TelegramObject) -> bool:  # noqa: C901
-        user = await self.user_service.get(aiogram_user.id)
-        settings = await self.settings_service.get()
+    async def is_access_allowed(  # noqa: C901
+        self,
+        aiogram_user: AiogramUser,
+        event: TelegramObject,
+        user: Optional[UserDto],
+        settings: SettingsDto,
+    ) -> bool:
         mode = settings.access_mode
 
         is_purchase_blocked = not settings.purchases_allowed
@@ -1,24 +1,33 @@
-from typing import Optional
-from uuid import UUID
+from typing import AsyncIterator, Optional
+from uuid import UUID, uuid4
 
 from aiogram import Bot
 from fluentogram import TranslatorHub
 from loguru import logger
 from redis.asyncio import Redis
-from sqlalchemy import and_
+from sqlalchemy import ColumnElement, and_, exists
 
 from src.core.config import AppConfig
+from src.core.constants import AUDIENCE_BATCH_SIZE, BROADCAST_LEASE_TTL, BROADCAST_SHARD_COUNT
 from src.core.enums import (
     BroadcastAudience,
+    BroadcastMessageStatus,
     BroadcastStatus,
     PlanAvailability,
     SubscriptionStatus,
 )
+from src.core.storage.keys import BroadcastLeaseKey
 from src.infrastructure.database import UnitOfWork
-from src.infrastructure.database.models.dto import BroadcastDto, BroadcastMessageDto, UserDto
+from src.infrastructure.database.models.dto import (
+    BroadcastDto,
+    BroadcastMessageDto,
+    BroadcastRecipientDto,
+)
 from src.infrastructure.database.models.sql import Broadcast, BroadcastMessage, Subscription, User
 from src.infrastructure.database.models.sql.plan import Plan
+from src.infrastructure.database.repositories import LoadProfile
 from src.infrastructure.redis import RedisRepository
+from src.infrastructure.redis.lease import release_lease, renew_lease
 
 from .base import BaseService
 
@@ -54,11 +63,7 @@ class BroadcastService(BaseService):
         messages: list[BroadcastMessageDto],
     ) -> list[BroadcastMessageDto]:
         db_messages = [
-            BroadcastMessage(
-                broadcast_id=broadcast_id,
-                user_id=m.user_id,
-                status=m.status,
-            )
+            {"broadcast_id": broadcast_id, "user_id": m.user_id, "status": m.status}
             for m in messages
         ]
 
@@ -67,9 +72,13 @@ class BroadcastService(BaseService):
 
         return BroadcastMessageDto.from_model_list(db_created_messages)
 
-    async def get(self, task_id: UUID) -> Optional[BroadcastDto]:
+    async def get(
+        self,
+        task_id: UUID,
+        profile: LoadProfile = LoadProfile.BARE,
+    ) -> Optional[BroadcastDto]:
         async with self.uow:
-            db_broadcast = await self.uow.repository.broadcasts.get(task_id)
+            db_broadcast = await self.uow.repository.broadcasts.get(task_id, profile=profile)
 
         if db_broadcast:
             logger.debug(f"Retrieved broadcast '{task_id}'")
@@ -80,10 +89,19 @@ class BroadcastService(BaseService):
 
     async def get_all(self) -> list[BroadcastDto]:
         async with self.uow:
-            db_broadcasts = await self.uow.repository.broadcasts.get_all()
+            db_broadcasts = await self.uow.repository.broadcasts.get_all(profile=LoadProfile.BARE)
 
         return BroadcastDto.from_model_list(list(reversed(db_broadcasts)))
 
+    async def get_by_status(self, status: BroadcastStatus) -> list[BroadcastDto]:
+        async with self.uow:
+            db_broadcasts = await self.uow.repository.broadcasts.get_by_status(
+                status,
+                profile=LoadProfile.BARE,
+            )
+
+        return BroadcastDto.from_model_list(db_broadcasts)
+
     async def update(self, broadcast: BroadcastDto) -> Optional[BroadcastDto]:
         async with self.uow:
             db_updated_broadcast = await self.uow.repository.broadcasts.update(
@@ -115,15 +133,91 @@ class BroadcastService(BaseService):
                 data=[m.model_dump() for m in messages],
             )
 
+    async def commit_messages(
+        self,
+        broadcast_id: int,
+        messages: list[BroadcastMessageDto],
+    ) -> tuple[int, int]:
+        success_count = sum(1 for m in messages if m.status == BroadcastMessageStatus.SENT)
+        failed_count = sum(1 for m in messages if m.status == BroadcastMessageStatus.FAILED)
+
+        async with self.uow:
+            await self.uow.repository.broadcasts.bulk_update_messages(
+                data=[m.model_dump() for m in messages],
+            )
+            await self.uow.repository.broadcasts.increment_counters(
+                broadcast_id=broadcast_id,
+                success=success_count,
+                failed=failed_count,
+            )
+
+        return success_count, failed_count
+
+    async def complete_if_done(self, broadcast_id: int) -> Optional[BroadcastDto]:
+        async with self.uow:
+            pending_count = await self.uow.repository.broadcasts.count_pending_messages(
+                broadcast_id
+            )
+            if pending_count:
+                logger.debug(
+                    f"Broadcast '{broadcast_id}' still has '{pending_count}' pending messages"
+                )
+                return None
+
+            db_broadcast = await self.uow.repository.broadcasts.complete(broadcast_id)
+
+        return BroadcastDto.from_model(db_broadcast)
+
     async def delete_broadcast(self, broadcast_id: int) -> None:
         async with self.uow:
             await self.uow.repository.broadcasts._delete(Broadcast, Broadcast.id == broadcast_id)
 
     async def get_status(self, task_id: UUID) -> Optional[BroadcastStatus]:
         async with self.uow:
-            db_broadcast = await self.uow.repository.broadcasts.get(task_id)
+            return await self.uow.repository.broadcasts.get_status(task_id)
+
+    #
+
+    async def acquire_lease(self, task_id: UUID, shard: Optional[int] = None) -> Optional[str]:
+        token = uuid4().hex
+        acquired = await self.redis_client.set(
+            BroadcastLeaseKey(task_id=task_id, shard=shard).pack(),
+            token,
+            nx=True,
+            ex=BROADCAST_LEASE_TTL,
+        )
+
+        if not acquired:
+            logger.debug(
+                f"Lease for broadcast '{task_id}' (shard '{shard}') is held by another worker"
+            )
+            return None
 
-        return db_broadcast.status if db_broadcast else None
+        logger.debug(f"Acquired lease for broadcast '{task_id}' (shard '{shard}')")
+        return token
+
+    async def renew_lease(self, task_id: UUID, token: str, shard: Optional[int] = None) -> bool:
+        return await renew_lease(
+            self.redis_client,
+            BroadcastLeaseKey(task_id=task_id, shard=shard).pack(),
+            token,
+            BROADCAST_LEASE_TTL,
+        )
+
+    async def release_lease(self, task_id: UUID, token: str, shard: Optional[int] = None) -> None:
+        await release_lease(
+            self.redis_client,
+            BroadcastLeaseKey(task_id=task_id, shard=shard).pack(),
+            token,
+        )
+        logger.debug(f"Released lease for broadcast '{task_id}' (shard '{shard}')")
+
+    async def has_lease(self, task_id: UUID, shard_count: int = BROADCAST_SHARD_COUNT) -> bool:
+        # The parent lease is gone once the shards are dispatched, they hold their own
+        keys = [BroadcastLeaseKey(task_id=task_id).pack()] + [
+            BroadcastLeaseKey(task_id=task_id, shard=shard).pack() for shard in range(shard_count)
+        ]
+        return bool(await self.redis_client.exists(*keys))
 
     #
 
@@ -142,16 +236,9 @@ class BroadcastService(BaseService):
         if audience == BroadcastAudience.PLAN:
             if plan_id:
                 async with self.uow:
-                    db_subs = await self.uow.repository.subscriptions.filter_by_plan_id(plan_id)
-
-                active_subs = [
-                    s
-                    for s in db_subs
-                    if s.status == SubscriptionStatus.ACTIVE
-                    and not s.user.is_blocked
-                    and not s.user.is_bot_blocked
-                ]
-                return len(active_subs)
+                    return await self.uow.repository.subscriptions.count_active_users_by_plan(
+                        plan_id
+                    )
 
             async with self.uow:
                 count = await self.uow.repository.plans._count(
@@ -212,86 +299,136 @@ class BroadcastService(BaseService):
 
         raise Exception(f"Unknown broadcast audience: {audience}")
 
-    async def get_audience_users(
+    async def iter_audience(
         self,
         audience: BroadcastAudience,
         plan_id: Optional[int] = None,
-    ) -> list[UserDto]:
-        logger.debug(f"Retrieving users for audience '{audience}', plan_id: {plan_id}")
+        exclude_broadcast_id: Optional[int] = None,
+        batch_size: int = AUDIENCE_BATCH_SIZE,
+    ) -> AsyncIterator[list[BroadcastRecipientDto]]:
+        logger.debug(f"Streaming recipients for audience '{audience}', plan_id: {plan_id}")
 
-        is_not_block = and_(
-            User.is_blocked.is_(False),
-            User.is_bot_blocked.is_(False),
-        )
+        conditions = self._get_audience_conditions(audience, plan_id)
 
-        if audience == BroadcastAudience.PLAN and plan_id:
+        if exclude_broadcast_id is not None:
+            conditions = and_(
+                conditions,
+                ~exists().where(
+                    BroadcastMessage.broadcast_id == exclude_broadcast_id,
+                    BroadcastMessage.user_id == User.telegram_id,
+                ),
+            )
+
+        last_id = 0
+
+        while True:
             async with self.uow:
-                db_subscriptions = await self.uow.repository.subscriptions.filter_by_plan_id(
-                    plan_id
+                rows = await self.uow.repository.users.get_recipients(
+                    conditions,
+                    after_id=last_id,
+                    limit=batch_size,
                 )
 
-            active_subs = [
-                s
-                for s in db_subscriptions
-                if s.status == SubscriptionStatus.ACTIVE
-                and not s.user.is_blocked
-                and not s.user.is_bot_blocked
+            if not rows:
+                break
+
+            last_id = rows[-1].id
+            yield [
+                BroadcastRecipientDto(telegram_id=row.telegram_id, language=row.language)
+                for row in rows
             ]
-            user_ids = [sub.user_telegram_id for sub in active_subs]
 
+            if len(rows) < batch_size:
+                break
+
+    async def iter_pending_messages(
+        self,
+        broadcast_id: int,
+        shard: int = 0,
+        shard_count: int = 1,
+        batch_size: int = AUDIENCE_BATCH_SIZE,
+    ) -> AsyncIterator[list[tuple[BroadcastRecipientDto, BroadcastMessageDto]]]:
+        logger.debug(
+            f"Streaming pending messages for broadcast '{broadcast_id}' "
+            f"(shard {shard + 1}/{shard_count})"
+        )
+        last_id = 0
+
+        while True:
             async with self.uow:
-                db_users = await self.uow.repository.users.get_by_ids(telegram_ids=user_ids)
+                rows = await self.uow.repository.broadcasts.get_pending_recipients(
+                    broadcast_id=broadcast_id,
+                    after_id=last_id,
+                    limit=batch_size,
+                    shard=shard,
+                    shard_count=shard_count,
+                )
 
-            logger.debug(
-                f"Retrieved '{len(db_users)}' users for audience '{audience}' (plan={plan_id})"
+            if not rows:
+                break
+
+            last_id = rows[-1].id
+            yield [
+                (
+                    BroadcastRecipientDto(
+                        telegram_id=row.user_id,
+                        language=row.language or self.config.default_locale,
+                    ),
+                    BroadcastMessageDto(
+                        id=row.id,
+                        user_id=row.user_id,
+                        status=BroadcastMessageStatus.PENDING,
+                    ),
+                )
+                for row in rows
+            ]
+
+            if len(rows) < batch_size:
+                break
+
+    def _get_audience_conditions(
+        self,
+        audience: BroadcastAudience,
+        plan_id: Optional[int] = None,
+    ) -> ColumnElement[bool]:
+        is_not_block = and_(
+            User.is_blocked.is_(False),
+            User.is_bot_blocked.is_(False),
+        )
+
+        if audience == BroadcastAudience.PLAN and plan_id:
+            return and_(
+                is_not_block,
+                User.subscriptions.any(
+                    and_(
+                        Subscription.status == SubscriptionStatus.ACTIVE,
+                        Subscription.plan_id == plan_id,
+                    )
+                ),
             )
-            return UserDto.from_model_list(db_users)
 
         if audience == BroadcastAudience.ALL:
-            async with self.uow:
-                db_users = await self.uow.repository.users._get_many(User, is_not_block)
-
-            return UserDto.from_model_list(db_users)
+            return is_not_block
 
         if audience == BroadcastAudience.SUBSCRIBED:
-            conditions = and_(
+            return and_(
                 is_not_block,
                 User.current_subscription.has(Subscription.status == SubscriptionStatus.ACTIVE),
             )
 
-            async with self.uow:
-                db_users = await self.uow.repository.users._get_many(User, conditions)
-
-            return UserDto.from_model_list(db_users)
-
         if audience == BroadcastAudience.UNSUBSCRIBED:
-            conditions = and_(is_not_block, User.current_subscription_id.is_(None))
-
-            async with self.uow:
-                db_users = await self.uow.repository.users._get_many(User, conditions)
-
-            return UserDto.from_model_list(db_users)
+            return and_(is_not_block, User.current_subscription_id.is_(None))
 
         if audience == BroadcastAudience.EXPIRED:
-            conditions = and_(
+            return and_(
                 is_not_block,
                 User.current_subscription.has(Subscription.status == SubscriptionStatus.EXPIRED),
             )
 
-            async with self.uow:
-                db_users = await self.uow.repository.users._get_many(User, conditions)
-
-            return UserDto.from_model_list(db_users)
-
         if audience == BroadcastAudience.TRIAL:
-            conditions = and_(
+            return and_(
                 is_not_block,
                 User.current_subscription.has(Subscription.is_trial.is_(True)),
             )
 
-            async with self.uow:
-                db_users = await self.uow.repository.users._get_many(User, conditions)
-
-            return UserDto.from_model_list(db_users)
-
         raise Exception(f"Unknown broadcast audience: {audience}")
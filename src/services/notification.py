@@ -33,7 +33,7 @@ from src.core.i18n.translator import get_translated_kwargs
 from src.core.utils.formatters import i18n_postprocess_text
 from src.core.utils.message_payload import MessagePayload
 from src.core.utils.types import AnyKeyboard
-from src.infrastructure.database.models.dto import UserDto
+from src.infrastructure.database.models.dto import BroadcastRecipientDto, UserDto
 from src.infrastructure.database.models.dto.user import BaseUserDto
 from src.infrastructure.redis.repository import RedisRepository
 from src.services.settings import SettingsService
@@ -63,7 +63,7 @@ class NotificationService(BaseService):
 
     async def notify_user(
         self,
-        user: Optional[BaseUserDto],
+        user: Optional[Union[BaseUserDto, BroadcastRecipientDto]],
         payload: MessagePayload,
         ntf_type: Optional[UserNotificationType] = None,
     ) -> Optional[Message]:
@@ -151,7 +151,11 @@ class NotificationService(BaseService):
 
     #
 
-    async def _send_message(self, user: BaseUserDto, payload: MessagePayload) -> Optional[Message]:
+    async def _send_message(
+        self,
+        user: Union[BaseUserDto, BroadcastRecipientDto],
+        payload: MessagePayload,
+    ) -> Optional[Message]:
         reply_markup = self._prepare_reply_markup(
             payload.reply_markup,
             payload.add_close_button,
@@ -190,7 +194,7 @@ class NotificationService(BaseService):
 
     async def _send_media_message(
         self,
-        user: BaseUserDto,
+        user: Union[BaseUserDto, BroadcastRecipientDto],
         payload: MessagePayload,
         reply_markup: Optional[AnyKeyboard],
     ) -> Message:
@@ -219,7 +223,7 @@ class NotificationService(BaseService):
 
     async def _send_text_message(
         self,
-        user: BaseUserDto,
+        user: Union[BaseUserDto, BroadcastRecipientDto],
         payload: MessagePayload,
         reply_markup: Optional[AnyKeyboard],
     ) -> Message:
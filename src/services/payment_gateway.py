@@ -9,6 +9,7 @@ from redis.asyncio import Redis
 
 from src.bot.keyboards import get_user_keyboard
 from src.core.config import AppConfig
+from src.core.constants import PAYMENT_FULFILMENT_TTL, PAYMENT_WEBHOOK_TTL
 from src.core.enums import (
     Currency,
     PaymentGatewayType,
@@ -16,6 +17,7 @@ from src.core.enums import (
     SystemNotificationType,
     TransactionStatus,
 )
+from src.core.storage.keys import PaymentFulfilmentKey, PaymentWebhookKey
 from src.core.utils.formatters import (
     i18n_format_days,
     i18n_format_device_limit,
@@ -38,6 +40,7 @@ from src.infrastructure.database.models.dto import (
     YookassaGatewaySettingsDto,
     YoomoneyGatewaySettingsDto,
 )
+from src.infrastructure.database.models.dto.user import BaseUserDto
 from src.infrastructure.database.models.sql import PaymentGateway
 from src.infrastructure.payment_gateways import BasePaymentGateway, PaymentGatewayFactory
 from src.infrastructure.redis import RedisRepository
@@ -304,22 +307,27 @@ class PaymentGatewayService(BaseService):
         return test_payment
 
     async def handle_payment_succeeded(self, payment_id: UUID) -> None:
+        # The marker holds whether the subscription was already granted and outlives a
+        # failed delivery, so a retry finishes what the committed transition started.
+        # A marker we had to create means there is nothing left over to finish.
+        fulfilment = PaymentFulfilmentKey(payment_id=payment_id)
+        is_new = await self.redis_repository.set(
+            fulfilment, False, ex=PAYMENT_FULFILMENT_TTL, nx=True
+        )
+
+        if not await self.transaction_service.transition(payment_id, TransactionStatus.COMPLETED):
+            if is_new:
+                await self.redis_repository.delete(fulfilment)
+                return
+
+            logger.warning(f"Resuming interrupted fulfilment of payment '{payment_id}'")
+
         transaction = await self.transaction_service.get(payment_id)
 
         if not transaction or not transaction.user:
             logger.critical(f"Transaction or user not found for '{payment_id}'")
             return
 
-        if transaction.is_completed:
-            logger.warning(
-                f"Transaction '{payment_id}' for user "
-                f"'{transaction.user.telegram_id}' already completed"
-            )
-            return
-
-        transaction.status = TransactionStatus.COMPLETED
-        await self.transaction_service.update(transaction)
-
         logger.info(f"Payment succeeded '{payment_id}' for user '{transaction.user.telegram_id}'")
 
         if transaction.is_test:
@@ -329,8 +337,20 @@ class PaymentGatewayService(BaseService):
                     i18n_key="ntf-gateway-test-payment-confirmed",
                 ),
             )
+            await self.redis_repository.delete(fulfilment)
             return
 
+        if not await self.redis_repository.get(fulfilment, bool, default=False):
+            await self._grant_subscription(transaction, transaction.user)
+            await self.redis_repository.set(fulfilment, True, ex=PAYMENT_FULFILMENT_TTL)
+
+        if not transaction.pricing.is_free:
+            await self.referral_service.assign_referral_rewards(transaction=transaction)
+
+        await self.redis_repository.delete(fulfilment)
+        logger.debug(f"Called tasks payment for user '{transaction.user.telegram_id}'")
+
+    async def _grant_subscription(self, transaction: TransactionDto, user: BaseUserDto) -> None:
         i18n_keys = {
             PurchaseType.NEW: "ntf-event-subscription-new",
             PurchaseType.RENEW: "ntf-event-subscription-renew",
@@ -338,7 +358,7 @@ class PaymentGatewayService(BaseService):
         }
         i18n_key = i18n_keys[transaction.purchase_type]
 
-        subscription = await self.subscription_service.get_current(transaction.user.telegram_id)
+        subscription = await self.subscription_service.get_current(user.telegram_id)
         extra_i18n_kwargs = {}
 
         if transaction.purchase_type == PurchaseType.CHANGE:
@@ -366,9 +386,9 @@ class PaymentGatewayService(BaseService):
             "discount_percent": transaction.pricing.discount_percent,
             "original_amount": transaction.pricing.original_amount,
             "currency": transaction.currency.symbol,
-            "user_id": str(transaction.user.telegram_id),
-            "user_name": transaction.user.name,
-            "username": transaction.user.username or False,
+            "user_id": str(user.telegram_id),
+            "user_name": user.name,
+            "username": user.username or False,
             "plan_name": transaction.plan.name,
             "plan_type": transaction.plan.type,
             "plan_traffic_limit": i18n_format_traffic_limit(transaction.plan.traffic_limit),
@@ -381,27 +401,52 @@ class PaymentGatewayService(BaseService):
             payload=MessagePayload.not_deleted(
                 i18n_key=i18n_key,
                 i18n_kwargs={**i18n_kwargs, **extra_i18n_kwargs},
-                reply_markup=get_user_keyboard(transaction.user.telegram_id),
+                reply_markup=get_user_keyboard(user.telegram_id),
             ),
         )
 
         await purchase_subscription_task.kiq(transaction, subscription)
 
-        if not transaction.pricing.is_free:
-            await self.referral_service.assign_referral_rewards(transaction=transaction)
+    async def handle_payment_canceled(self, payment_id: UUID) -> None:
+        transaction = await self.transaction_service.transition(
+            payment_id,
+            TransactionStatus.CANCELED,
+        )
 
-        logger.debug(f"Called tasks payment for user '{transaction.user.telegram_id}'")
+        if transaction:
+            logger.info(f"Payment canceled '{payment_id}'")
 
-    async def handle_payment_canceled(self, payment_id: UUID) -> None:
-        transaction = await self.transaction_service.get(payment_id)
+    async def claim_webhook(
+        self,
+        gateway_type: PaymentGatewayType,
+        payment_id: UUID,
+        payment_status: TransactionStatus,
+    ) -> bool:
+        key = PaymentWebhookKey(
+            gateway_type=gateway_type,
+            payment_id=payment_id,
+            status=payment_status,
+        )
 
-        if not transaction or not transaction.user:
-            logger.critical(f"Transaction or user not found for '{payment_id}'")
-            return
+        if await self.redis_repository.set(key, None, ex=PAYMENT_WEBHOOK_TTL, nx=True):
+            return True
 
-        transaction.status = TransactionStatus.CANCELED
-        await self.transaction_service.update(transaction)
-        logger.info(f"Payment canceled '{payment_id}' for user '{transaction.user.telegram_id}'")
+        logger.info(f"Duplicate '{gateway_type}' webhook for '{payment_id}' ({payment_status})")
+        return False
+
+    async def release_webhook(
+        self,
+        gateway_type: PaymentGatewayType,
+        payment_id: UUID,
+        payment_status: TransactionStatus,
+    ) -> None:
+        await self.redis_repository.delete(
+            PaymentWebhookKey(
+                gateway_type=gateway_type,
+                payment_id=payment_id,
+                status=payment_status,
+            )
+        )
 
     #
 
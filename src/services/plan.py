@@ -6,11 +6,14 @@ from loguru import logger
 from redis.asyncio import Redis
 
 from src.core.config import AppConfig
+from src.core.constants import CACHE_LOCAL_TTL, TIME_10M
 from src.core.enums import PlanAvailability
+from src.core.storage.key_builder import build_key
 from src.infrastructure.database import UnitOfWork
-from src.infrastructure.database.models.dto import PlanDto, UserDto
+from src.infrastructure.database.models.dto import PlanCatalogDto, PlanDto, UserDto
 from src.infrastructure.database.models.sql import Plan, PlanDuration, PlanPrice
 from src.infrastructure.redis import RedisRepository
+from src.infrastructure.redis.cache import invalidate_cache, redis_cache
 
 from .base import BaseService
 
@@ -39,6 +42,7 @@ class PlanService(BaseService):
             db_plan = self._dto_to_model(plan)
             db_created_plan = await self.uow.repository.plans.create(db_plan)
 
+        await self._clear_cache()
         logger.info(f"Created plan '{plan.name}' with ID '{db_created_plan.id}'")
         return PlanDto.from_model(db_created_plan)  # type: ignore[return-value]
 
@@ -77,6 +81,8 @@ class PlanService(BaseService):
         async with self.uow:
             db_updated_plan = await self.uow.repository.plans.update(db_plan)
 
+        await self._clear_cache()
+
         if db_updated_plan:
             logger.info(f"Updated plan '{plan.name}' (ID: '{plan.id}') successfully")
         else:
@@ -91,6 +97,8 @@ class PlanService(BaseService):
         async with self.uow:
             result = await self.uow.repository.plans.delete(plan_id)
 
+        await self._clear_cache()
+
         if result:
             logger.info(f"Plan '{plan_id}' deleted successfully")
         else:
@@ -106,73 +114,47 @@ class PlanService(BaseService):
 
     #
 
-    async def get_trial_plan(self) -> Optional[PlanDto]:
+    @redis_cache(prefix="get_plan_catalog", ttl=TIME_10M, local_ttl=CACHE_LOCAL_TTL)
+    async def get_catalog(self) -> PlanCatalogDto:
         async with self.uow:
-            db_plans: list[Plan] = await self.uow.repository.plans.filter_by_availability(
-                availability=PlanAvailability.TRIAL
-            )
+            db_plans: list[Plan] = await self.uow.repository.plans.filter_active(is_active=True)
 
-        if db_plans:
-            if len(db_plans) > 1:
-                logger.warning(
-                    f"Multiple trial plans found ({len(db_plans)}). "
-                    f"Using the first one: '{db_plans[0].name}'"
-                )
+        logger.debug(f"Built plan catalog from '{len(db_plans)}' active plans")
+        return PlanCatalogDto.from_plans(PlanDto.from_model_list(db_plans))
 
-            db_plan = db_plans[0]
+    async def get_trial_plan(self) -> Optional[PlanDto]:
+        catalog = await self.get_catalog()
+        trial_plans = [p for p in catalog.plans if p.availability == PlanAvailability.TRIAL]
 
-            if db_plan.is_active:
-                logger.debug(f"Available trial plan '{db_plans[0].name}'")
-                return PlanDto.from_model(db_plans[0])
-            else:
-                logger.warning(f"Trial plan '{db_plans[0].name}' found but is not active")
+        if not trial_plans:
+            logger.debug("No active trial plan found")
+            return None
 
-        logger.debug("No active trial plan found")
-        return None
+        if len(trial_plans) > 1:
+            logger.warning(
+                f"Multiple trial plans found ({len(trial_plans)}). "
+                f"Using the first one: '{trial_plans[0].name}'"
+            )
+
+        logger.debug(f"Available trial plan '{trial_plans[0].name}'")
+        return trial_plans[0]
 
     async def get_available_plans(self, user: UserDto) -> list[PlanDto]:
-        logger.debug(f"Fetching available plans for user '{user.telegram_id}'")
+        catalog = await self.get_catalog()
+        plans = [p for p in catalog.plans if self._is_available(catalog, p, user)]
 
-        async with self.uow:
-            db_plans: list[Plan] = await self.uow.repository.plans.filter_active(is_active=True)
+        logger.debug(f"Available plans filtered: '{len(plans)}' for user '{user.telegram_id}'")
+        return plans
+
+    async def get_available_plan(self, user: UserDto, plan_id: int) -> Optional[PlanDto]:
+        catalog = await self.get_catalog()
+        plan = catalog.get_plan(plan_id)
 
-        logger.debug(f"Total active plans retrieved: '{len(db_plans)}'")
-        db_filtered_plans = []
-
-        for db_plan in db_plans:
-            match db_plan.availability:
-                case PlanAvailability.ALL:
-                    db_filtered_plans.append(db_plan)
-                case PlanAvailability.NEW if not user.has_any_subscription:
-                    logger.debug(
-                        f"User {user.telegram_id} has no subscription, "
-                        f"eligible for new user plan '{db_plan.name}'"
-                    )
-                    db_filtered_plans.append(db_plan)
-
-                case PlanAvailability.EXISTING if user.has_any_subscription:
-                    logger.debug(
-                        f"User {user.telegram_id} has an existing subscription, "
-                        f"eligible for existing user plan '{db_plan.name}'"
-                    )
-                    db_filtered_plans.append(db_plan)
-
-                case PlanAvailability.INVITED if user.is_invited_user:
-                    logger.debug(
-                        f"User {user.telegram_id} was invited, "
-                        f"eligible for invited user plan '{db_plan.name}'"
-                    )
-                    db_filtered_plans.append(db_plan)
-
-                case PlanAvailability.ALLOWED if user.telegram_id in db_plan.allowed_user_ids:
-                    logger.debug(
-                        f"User {user.telegram_id} is explicitly allowed for plan '{db_plan.name}'"
-                    )
-                    db_filtered_plans.append(db_plan)
-        logger.info(
-            f"Available plans filtered: '{len(db_filtered_plans)}' for user '{user.telegram_id}'"
-        )
-        return PlanDto.from_model_list(db_filtered_plans)
+        if plan is None or not self._is_available(catalog, plan, user):
+            logger.warning(f"Plan '{plan_id}' is not available for user '{user.telegram_id}'")
+            return None
+
+        return plan
 
     async def get_allowed_plans(self) -> list[PlanDto]:
         async with self.uow:
@@ -210,11 +192,33 @@ class PlanService(BaseService):
             for i, plan in enumerate(db_plans, start=1):
                 plan.order_index = i
 
+        await self._clear_cache()
         logger.info(f"Plan '{plan_id}' reorder successfully")
         return True
 
     #
 
+    @staticmethod
+    def _is_available(catalog: PlanCatalogDto, plan: PlanDto, user: UserDto) -> bool:
+        match plan.availability:
+            case PlanAvailability.ALL:
+                return True
+            case PlanAvailability.NEW:
+                return not user.has_any_subscription
+            case PlanAvailability.EXISTING:
+                return user.has_any_subscription
+            case PlanAvailability.INVITED:
+                return user.is_invited_user
+            case PlanAvailability.ALLOWED:
+                return catalog.is_allowed(plan.id, user.telegram_id)  # type: ignore[arg-type]
+            case _:
+                return False
+
+    async def _clear_cache(self) -> None:
+        catalog_cache_key: str = build_key("cache", "get_plan_catalog")
+        logger.debug(f"Cache '{catalog_cache_key}' cleared")
+        await invalidate_cache(self.redis_client, catalog_cache_key)
+
     def _dto_to_model(self, plan_dto: PlanDto) -> Plan:
         db_plan = Plan(**plan_dto.model_dump(exclude={"durations"}))
 
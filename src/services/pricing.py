@@ -1,53 +1,84 @@
 from decimal import ROUND_DOWN, Decimal, InvalidOperation
+from functools import lru_cache
 
 from loguru import logger
 
+from src.core.constants import PRICING_CACHE_SIZE
 from src.core.enums import Currency
 from src.infrastructure.database.models.dto import PriceDetailsDto, UserDto
 
 from .base import BaseService
 
+PriceTable = dict[int, dict[Currency, Decimal]]
+PriceMatrix = dict[int, dict[Currency, PriceDetailsDto]]
+
+# (days, currency, price) cells; the prices themselves identify the plan version
+_PriceCells = tuple[tuple[int, Currency, Decimal], ...]
+
+
+def _round_to_currency(amount: Decimal, currency: Currency) -> Decimal:
+    match currency:
+        case Currency.XTR | Currency.RUB:
+            amount = amount.to_integral_value(rounding=ROUND_DOWN)
+            min_amount = Decimal(1)
+        case _:
+            amount = amount.quantize(Decimal("0.01"))
+            min_amount = Decimal("0.01")
+
+    return max(amount, min_amount)
+
+
+@lru_cache(maxsize=PRICING_CACHE_SIZE)
+def _discount(price: Decimal, currency: Currency, discount_percent: int) -> tuple[int, Decimal]:
+    if price <= 0:
+        return 0, Decimal(0)
+
+    if discount_percent >= 100:
+        return 100, Decimal(0)
+
+    discounted = price * (Decimal(100) - Decimal(discount_percent)) / Decimal(100)
+    final_amount = _round_to_currency(discounted, currency)
+
+    return (0 if final_amount == price else discount_percent), final_amount
+
+
+@lru_cache(maxsize=PRICING_CACHE_SIZE)
+def _price_matrix(cells: _PriceCells, discount_percent: int) -> tuple[tuple[int, Decimal], ...]:
+    return tuple(_discount(price, currency, discount_percent) for _, currency, price in cells)
+
 
 class PricingService(BaseService):
     def calculate(self, user: UserDto, price: Decimal, currency: Currency) -> PriceDetailsDto:
+        discount_percent = self.get_discount_percent(user)
+        pricing = self._build_details(price, *_discount(price, currency, discount_percent))
+
         logger.debug(
-            f"Calculating price for amount '{price}' and currency "
-            f"'{currency}' for user '{user.telegram_id}'"
+            f"Price calculated for user '{user.telegram_id}': original='{price}', "
+            f"discount_percent='{pricing.discount_percent}', final='{pricing.final_amount}' "
+            f"({currency})"
         )
+        return pricing
 
-        if price <= 0:
-            logger.debug("Price is zero, returning without discount")
-            return PriceDetailsDto(
-                original_amount=Decimal(0),
-                final_amount=Decimal(0),
-            )
-
-        discount_percent = min(user.purchase_discount or user.personal_discount or 0, 100)
-
-        if discount_percent >= 100:
-            logger.info(f"100% discount applied, price is free for user '{user.telegram_id}'")
-            return PriceDetailsDto(
-                original_amount=price,
-                discount_percent=100,
-                final_amount=Decimal(0),
-            )
+    def calculate_matrix(self, user: UserDto, prices: PriceTable) -> PriceMatrix:
+        cells: _PriceCells = tuple(
+            (days, currency, price)
+            for days, by_currency in prices.items()
+            for currency, price in by_currency.items()
+        )
+        matrix: PriceMatrix = {days: {} for days in prices}
 
-        discounted = price * (Decimal(100) - Decimal(discount_percent)) / Decimal(100)
-        final_amount = self.apply_currency_rules(discounted, currency)
+        discounts = _price_matrix(cells, self.get_discount_percent(user))
 
-        if final_amount == price:
-            discount_percent = 0
+        for (days, currency, price), (discount_percent, final_amount) in zip(cells, discounts):
+            matrix[days][currency] = self._build_details(price, discount_percent, final_amount)
 
-        logger.info(
-            f"Price calculated: original='{price}', "
-            f"discount_percent='{discount_percent}', final='{final_amount}'"
+        logger.debug(
+            f"Price matrix calculated for user '{user.telegram_id}': '{len(cells)}' prices"
         )
+        return matrix
 
-        return PriceDetailsDto(
-            original_amount=price,
-            discount_percent=discount_percent,
-            final_amount=final_amount,
-        )
+    def get_discount_percent(self, user: UserDto) -> int:
+        return min(user.purchase_discount or user.personal_discount or 0, 100)
 
     def parse_price(self, input_price: str, currency: Currency) -> Decimal:
         logger.debug(f"Parsing input price '{input_price}' for currency '{currency}'")
@@ -66,19 +97,18 @@ class PricingService(BaseService):
         return final_price
 
     def apply_currency_rules(self, amount: Decimal, currency: Currency) -> Decimal:
-        logger.debug(f"Applying currency rules for amount '{amount}' and currency '{currency}'")
-
-        match currency:
-            case Currency.XTR | Currency.RUB:
-                amount = amount.to_integral_value(rounding=ROUND_DOWN)
-                min_amount = Decimal(1)
-            case _:
-                amount = amount.quantize(Decimal("0.01"))
-                min_amount = Decimal("0.01")
-
-        if amount < min_amount:
-            logger.debug(f"Amount '{amount}' less than min '{min_amount}', adjusting")
-            amount = min_amount
-
-        logger.debug(f"Final amount after currency rules: '{amount}'")
-        return amount
+        return _round_to_currency(amount, currency)
+
+    #
+
+    @staticmethod
+    def _build_details(
+        price: Decimal,
+        discount_percent: int,
+        final_amount: Decimal,
+    ) -> PriceDetailsDto:
+        return PriceDetailsDto(
+            original_amount=price if price > 0 else Decimal(0),
+            discount_percent=discount_percent,
+            final_amount=final_amount,
+        )
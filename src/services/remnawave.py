@@ -314,60 +314,78 @@ class RemnawaveService(BaseService):
 
         user = cast(UserDto, user)
         subscription = await self.subscription_service.get_current(telegram_id=user.telegram_id)
-        remna_subscription = RemnaSubscriptionDto.from_remna_user(remna_user)
+        synced_subscription = await self.build_synced_subscription(remna_user, subscription)
 
-        if not remna_subscription.url:
-            remna_subscription.url = await self.get_subscription_url(remna_user.uuid)  # type: ignore[assignment]
+        if synced_subscription is None:
+            logger.debug(f"Subscription for '{user.telegram_id}' is unchanged, skipping sync")
+            return
 
         if not subscription:
             logger.info(f"No subscription found for '{user.telegram_id}', creating")
+            await self.subscription_service.create(user, synced_subscription)
+            logger.info(f"Subscription created for '{user.telegram_id}'")
+        else:
+            logger.info(f"Synchronizing subscription for '{user.telegram_id}'")
+            await self.subscription_service.update(synced_subscription)
+            logger.info(f"Subscription updated for '{user.telegram_id}'")
 
-            temp_plan = PlanSnapshotDto(
-                id=-1,
-                name=IMPORTED_TAG,
-                tag=remna_subscription.tag,
-                type=format_limits_to_plan_type(
-                    remna_subscription.traffic_limit,
-                    remna_subscription.device_limit,
-                ),
-                traffic_limit=remna_subscription.traffic_limit,
-                device_limit=remna_subscription.device_limit,
-                duration=-1,
-                traffic_limit_strategy=remna_subscription.traffic_limit_strategy,
-                internal_squads=remna_subscription.internal_squads,
-                external_squad=remna_subscription.external_squad,
-            )
+        logger.info(f"Sync completed for user '{remna_user.telegram_id}'")
 
-            expired = remna_user.expire_at and remna_user.expire_at < datetime_now()
-            status = SubscriptionStatus.EXPIRED if expired else remna_user.status
+    async def build_synced_subscription(
+        self,
+        remna_user: RemnaUserDto,
+        subscription: Optional[SubscriptionDto],
+    ) -> Optional[SubscriptionDto]:
+        remna_subscription = RemnaSubscriptionDto.from_remna_user(remna_user)
+        fingerprint = remna_subscription.fingerprint
 
-            subscription = SubscriptionDto(
-                user_remna_id=remna_user.uuid,
-                status=status,
-                traffic_limit=temp_plan.traffic_limit,
-                device_limit=temp_plan.device_limit,
-                traffic_limit_strategy=temp_plan.traffic_limit_strategy,
-                tag=temp_plan.tag,
-                internal_squads=remna_subscription.internal_squads,
-                external_squad=remna_subscription.external_squad,
-                expire_at=remna_user.expire_at,
-                url=remna_subscription.url,
-                plan=temp_plan,
-            )
+        if subscription and subscription.sync_fingerprint == fingerprint:
+            return None
 
-            await self.subscription_service.create(user, subscription)
-            logger.info(f"Subscription created for '{user.telegram_id}'")
+        if not remna_subscription.url:
+            remna_subscription.url = await self.get_subscription_url(remna_user.uuid)  # type: ignore[assignment]
 
-        else:
-            logger.info(f"Synchronizing subscription for '{user.telegram_id}'")
+        if subscription:
             subscription = SubscriptionService.apply_sync(
                 target=subscription,
                 source=remna_subscription,
             )
-            await self.subscription_service.update(subscription)
-            logger.info(f"Subscription updated for '{user.telegram_id}'")
+            subscription.sync_fingerprint = fingerprint
+            return subscription
+
+        temp_plan = PlanSnapshotDto(
+            id=-1,
+            name=IMPORTED_TAG,
+            tag=remna_subscription.tag,
+            type=format_limits_to_plan_type(
+                remna_subscription.traffic_limit,
+                remna_subscription.device_limit,
+            ),
+            traffic_limit=remna_subscription.traffic_limit,
+            device_limit=remna_subscription.device_limit,
+            duration=-1,
+            traffic_limit_strategy=remna_subscription.traffic_limit_strategy,
+            internal_squads=remna_subscription.internal_squads,
+            external_squad=remna_subscription.external_squad,
+        )
 
-        logger.info(f"Sync completed for user '{remna_user.telegram_id}'")
+        expired = remna_user.expire_at and remna_user.expire_at < datetime_now()
+        status = SubscriptionStatus.EXPIRED if expired else remna_user.status
+
+        return SubscriptionDto(
+            user_remna_id=remna_user.uuid,
+            status=status,
+            traffic_limit=temp_plan.traffic_limit,
+            device_limit=temp_plan.device_limit,
+            traffic_limit_strategy=temp_plan.traffic_limit_strategy,
+            tag=temp_plan.tag,
+            internal_squads=remna_subscription.internal_squads,
+            external_squad=remna_subscription.external_squad,
+            expire_at=remna_user.expire_at,
+            url=remna_subscription.url,
+            plan=temp_plan,
+            sync_fingerprint=fingerprint,
+        )
 
     #
 
@@ -6,7 +6,7 @@ from loguru import logger
 from redis.asyncio import Redis
 
 from src.core.config import AppConfig
-from src.core.constants import TIME_10M
+from src.core.constants import CACHE_LOCAL_TTL, TIME_10M
 from src.core.enums import AccessMode, Currency, SystemNotificationType, UserNotificationType
 from src.core.storage.key_builder import build_key
 from src.core.utils.types import AnyNotification
@@ -14,7 +14,7 @@ from src.infrastructure.database import UnitOfWork
 from src.infrastructure.database.models.dto import ReferralSettingsDto, SettingsDto
 from src.infrastructure.database.models.sql import Settings
 from src.infrastructure.redis import RedisRepository
-from src.infrastructure.redis.cache import redis_cache
+from src.infrastructure.redis.cache import invalidate_cache, redis_cache
 
 from .base import BaseService
 
@@ -46,7 +46,7 @@ class SettingsService(BaseService):
         logger.info("Default settings created in DB")
         return SettingsDto.from_model(db_settings)  # type: ignore[return-value]
 
-    @redis_cache(prefix="get_settings", ttl=TIME_10M)
+    @redis_cache(prefix="get_settings", ttl=TIME_10M, local_ttl=CACHE_LOCAL_TTL)
     async def get(self) -> SettingsDto:
         async with self.uow:
             db_settings = await self.uow.repository.settings.get()
@@ -187,4 +187,4 @@ class SettingsService(BaseService):
     async def _clear_cache(self) -> None:
         settings_cache_key: str = build_key("cache", "get_settings")
         logger.debug(f"Cache '{settings_cache_key}' cleared")
-        await self.redis_client.delete(settings_cache_key)
+        await invalidate_cache(self.redis_client, settings_cache_key)
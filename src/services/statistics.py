@@ -0,0 +1,297 @@
+from datetime import timedelta
+from typing import Any, Optional, Union
+
+from aiogram import Bot
+from fluentogram import TranslatorHub
+from loguru import logger
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from src.core.config import AppConfig
+from src.core.enums import Currency, PaymentGatewayType, SubscriptionStatus
+from src.core.storage.keys import StatisticsCountersKey, StatisticsSnapshotKey
+from src.core.utils.time import datetime_now
+from src.infrastructure.database import UnitOfWork
+from src.infrastructure.database.models.dto import (
+    GatewayStatisticsDto,
+    PlanStatisticsDto,
+    PromocodesStatisticsDto,
+    StatisticsSnapshotDto,
+    SubscriptionDto,
+    SubscriptionsStatisticsDto,
+    TransactionDto,
+    TransactionsStatisticsDto,
+    UsersStatisticsDto,
+)
+from src.infrastructure.redis import RedisRepository
+
+from .base import BaseService
+
+
+class StatisticsService(BaseService):
+    uow: UnitOfWork
+
+    def __init__(
+        self,
+        config: AppConfig,
+        bot: Bot,
+        redis_client: Redis,
+        redis_repository: RedisRepository,
+        translator_hub: TranslatorHub,
+        #
+        uow: UnitOfWork,
+    ) -> None:
+        super().__init__(config, bot, redis_client, redis_repository, translator_hub)
+        self.uow = uow
+
+    async def get_users_statistics(self) -> UsersStatisticsDto:
+        async with self.uow:
+            users = await self.uow.repository.statistics.get_users_statistics(datetime_now())
+            trials = await self.uow.repository.statistics.get_trial_conversion()
+
+        return UsersStatisticsDto.model_validate({**users, **trials})
+
+    async def get_transactions_statistics(self) -> TransactionsStatisticsDto:
+        async with self.uow:
+            totals = await self.uow.repository.statistics.get_transactions_totals()
+            gateways = await self.uow.repository.statistics.get_gateways_statistics(datetime_now())
+
+        return TransactionsStatisticsDto(
+            **totals,
+            gateways=[GatewayStatisticsDto.model_validate(dict(g)) for g in gateways],
+        )
+
+    async def get_subscriptions_statistics(self) -> SubscriptionsStatisticsDto:
+        async with self.uow:
+            subscriptions = await self.uow.repository.statistics.get_subscriptions_statistics(
+                datetime_now()
+            )
+
+        return SubscriptionsStatisticsDto.model_validate(dict(subscriptions))
+
+    async def get_plans_statistics(self) -> dict[int, PlanStatisticsDto]:
+        async with self.uow:
+            plans = await self.uow.repository.statistics.get_plans_statistics(datetime_now())
+            incomes = await self.uow.repository.statistics.get_plans_income()
+
+        statistics = {
+            row["plan_id"]: PlanStatisticsDto.model_validate(
+                {**row, "popular_duration": row["popular_duration"] or 0}
+            )
+            for row in plans
+        }
+
+        for row in incomes:
+            plan = statistics.setdefault(row["plan_id"], PlanStatisticsDto(plan_id=row["plan_id"]))
+            plan.incomes[row["currency"]] = float(row["income"])
+
+        return statistics
+
+    async def get_promocodes_statistics(self) -> PromocodesStatisticsDto:
+        async with self.uow:
+            rewards = await self.uow.repository.statistics.get_promocode_rewards()
+            most_popular = await self.uow.repository.statistics.get_most_popular_promocode()
+
+        return PromocodesStatisticsDto(
+            total_promo_activations=sum(row["activations"] for row in rewards),
+            most_popular_promo=most_popular or "-",
+            rewards={row["reward_type"]: row["reward"] for row in rewards},
+        )
+
+    #
+
+    async def get_snapshot(self) -> StatisticsSnapshotDto:
+        snapshot = await self.redis_repository.get(StatisticsSnapshotKey(), StatisticsSnapshotDto)
+
+        if snapshot is None:
+            logger.debug("Statistics snapshot is missing, building it now")
+            return await self.refresh_snapshot()
+
+        counters: dict[bytes, bytes] = await self.redis_client.hgetall(  # type: ignore[misc]
+            StatisticsCountersKey().pack()
+        )
+
+        for field, value in counters.items():
+            self._apply_counter(snapshot, field.decode(), float(value))
+
+        return snapshot
+
+    async def refresh_snapshot(self) -> StatisticsSnapshotDto:
+        key = StatisticsCountersKey().pack()
+
+        # Counters bumped while the queries run must survive the refresh, so only
+        # the part already covered by the new snapshot is subtracted
+        counters: dict[bytes, bytes] = await self.redis_client.hgetall(key)  # type: ignore[misc]
+
+        snapshot = StatisticsSnapshotDto(
+            users=await self.get_users_statistics(),
+            transactions=await self.get_transactions_statistics(),
+            subscriptions=await self.get_subscriptions_statistics(),
+            plans=await self.get_plans_statistics(),
+            promocodes=await self.get_promocodes_statistics(),
+            updated_at=datetime_now(),
+        )
+
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.set(StatisticsSnapshotKey().pack(), snapshot.model_dump_json())
+            for field, value in counters.items():
+                pipe.hincrbyfloat(key, field.decode(), -float(value))
+            await pipe.execute()
+
+        logger.info("Statistics snapshot refreshed")
+        return snapshot
+
+    async def on_user_created(self, count: int = 1) -> None:
+        await self._increment(
+            {
+                "users:total_users": count,
+                "users:new_users_daily": count,
+                "users:new_users_weekly": count,
+                "users:new_users_monthly": count,
+            }
+        )
+
+    async def on_transaction_created(self, transaction: TransactionDto) -> None:
+        await self._increment(
+            {
+                "transactions:total_transactions": 1,
+                "transactions:free_transactions": 1 if transaction.pricing.is_free else 0,
+            }
+        )
+
+    async def on_transaction_completed(self, transaction: TransactionDto) -> None:
+        pricing = transaction.pricing
+        amount = float(pricing.final_amount)
+        gateway = f"gateways:{transaction.gateway_type}"
+
+        counters: dict[str, Union[int, float]] = {
+            "transactions:completed_transactions": 1,
+            f"{gateway}:total": amount,
+            f"{gateway}:daily": amount,
+            f"{gateway}:weekly": amount,
+            f"{gateway}:monthly": amount,
+            f"{gateway}:discount": float(pricing.original_amount - pricing.final_amount),
+            f"{gateway}:paid_count": 0 if pricing.is_free else 1,
+        }
+
+        if transaction.plan.id > 0:
+            counters[f"plans:{transaction.plan.id}:incomes:{transaction.currency}"] = amount
+
+        await self._increment(counters)
+
+    async def on_subscription_created(self, subscription: SubscriptionDto) -> None:
+        plan = f"plans:{subscription.plan.id}"
+        counters: dict[str, Union[int, float]] = {f"{plan}:total_subscriptions": 1}
+
+        if subscription.is_active:
+            counters.update(self._active_counters(subscription, 1))
+
+        await self._increment(counters)
+
+    async def on_subscription_status_changed(
+        self,
+        subscription: SubscriptionDto,
+        old_status: SubscriptionStatus,
+    ) -> None:
+        new_status = subscription.status
+
+        if old_status == new_status:
+            return
+
+        counters: dict[str, Union[int, float]] = {}
+
+        if old_status == SubscriptionStatus.ACTIVE:
+            counters.update(self._active_counters(subscription, -1))
+        elif new_status == SubscriptionStatus.ACTIVE:
+            counters.update(self._active_counters(subscription, 1))
+
+        if new_status == SubscriptionStatus.EXPIRED:
+            counters["subscriptions:total_expire_subscriptions"] = 1
+        elif old_status == SubscriptionStatus.EXPIRED:
+            counters["subscriptions:total_expire_subscriptions"] = -1
+
+        await self._increment(counters)
+
+    #
+
+    async def _increment(self, counters: dict[str, Union[int, float]]) -> None:
+        key = StatisticsCountersKey().pack()
+
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for field, value in counters.items():
+                    if isinstance(value, float):
+                        pipe.hincrbyfloat(key, field, value)
+                    elif value:
+                        pipe.hincrby(key, field, value)
+                await pipe.execute()
+        except Exception as exception:
+            logger.warning(f"Failed to update statistics counters: {exception}")
+
+    @staticmethod
+    def _active_counters(
+        subscription: SubscriptionDto,
+        delta: int,
+    ) -> dict[str, Union[int, float]]:
+        counters: dict[str, Union[int, float]] = {
+            "subscriptions:total_active_subscriptions": delta,
+            f"plans:{subscription.plan.id}:active_subscriptions": delta,
+        }
+
+        if subscription.is_trial:
+            counters["subscriptions:active_trial_subscriptions"] = delta
+        if subscription.expire_at - datetime_now() < timedelta(days=8):
+            counters["subscriptions:expiring_subscriptions"] = delta
+        if (
+            not subscription.has_devices_limit
+            or not subscription.has_traffic_limit
+            or subscription.is_unlimited
+        ):
+            counters["subscriptions:total_unlimited"] = delta
+        if subscription.traffic_limit != -1:
+            counters["subscriptions:total_traffic"] = delta
+        if subscription.device_limit != -1:
+            counters["subscriptions:total_devices"] = delta
+
+        return counters
+
+    @staticmethod
+    def _apply_counter(snapshot: StatisticsSnapshotDto, field: str, value: float) -> None:
+        target: Optional[BaseModel]
+
+        match field.split(":"):
+            case ["users", name]:
+                target = snapshot.users
+            case ["transactions", name]:
+                target = snapshot.transactions
+            case ["subscriptions", name]:
+                target = snapshot.subscriptions
+            case ["gateways", gateway_type, name]:
+                target = next(
+                    (g for g in snapshot.transactions.gateways if g.gateway_type == gateway_type),
+                    None,
+                )
+                if target is None:
+                    target = GatewayStatisticsDto(gateway_type=PaymentGatewayType(gateway_type))
+                    snapshot.transactions.gateways.append(target)
+            case ["plans", plan_id, "incomes", currency]:
+                plan = snapshot.plans.setdefault(
+                    int(plan_id), PlanStatisticsDto(plan_id=int(plan_id))
+                )
+                plan.incomes[Currency(currency)] = plan.incomes.get(Currency(currency), 0) + value
+                return
+            case ["plans", plan_id, name]:
+                target = snapshot.plans.setdefault(
+                    int(plan_id), PlanStatisticsDto(plan_id=int(plan_id))
+                )
+            case _:
+                logger.warning(f"Unknown statistics counter '{field}'")
+                return
+
+        current: Any = getattr(target, name, None)
+
+        if current is None:
+            logger.warning(f"Unknown statistics counter '{field}'")
+            return
+
+        setattr(target, name, type(current)(current + value))
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Optional, TypeVar, Union
+from typing import Any, Optional, TypeVar, Union
 
 from aiogram import Bot
 from fluentogram import TranslatorHub
@@ -9,7 +9,7 @@ from remnapy.enums.users import TrafficLimitStrategy
 from sqlalchemy import and_
 
 from src.core.config import AppConfig
-from src.core.constants import TIME_1M, TIME_5M, TIME_10M, TIMEZONE
+from src.core.constants import CACHE_LOCAL_TTL, TIME_1M, TIME_5M, TIME_10M, TIMEZONE
 from src.core.enums import SubscriptionStatus
 from src.core.storage.key_builder import build_key
 from src.core.utils.time import datetime_now
@@ -22,8 +22,10 @@ from src.infrastructure.database.models.dto import (
     UserDto,
 )
 from src.infrastructure.database.models.sql import Subscription
+from src.infrastructure.database.repositories import LoadProfile
 from src.infrastructure.redis import RedisRepository
-from src.infrastructure.redis.cache import redis_cache
+from src.infrastructure.redis.cache import invalidate_cache, redis_cache
+from src.services.statistics import StatisticsService
 from src.services.user import UserService
 
 from .base import BaseService
@@ -34,6 +36,7 @@ T = TypeVar("T", SubscriptionDto, RemnaSubscriptionDto)
 class SubscriptionService(BaseService):
     uow: UnitOfWork
     user_service: UserService
+    statistics_service: StatisticsService
 
     def __init__(
         self,
@@ -45,14 +48,17 @@ class SubscriptionService(BaseService):
         #
         uow: UnitOfWork,
         user_service: UserService,
+        statistics_service: StatisticsService,
     ) -> None:
         super().__init__(config, bot, redis_client, redis_repository, translator_hub)
         self.uow = uow
         self.user_service = user_service
+        self.statistics_service = statistics_service
 
     async def create(self, user: UserDto, subscription: SubscriptionDto) -> SubscriptionDto:
         data = subscription.model_dump(exclude={"user"})
         data["plan"] = subscription.plan.model_dump(mode="json")
+        data["plan_id"] = subscription.plan.id
 
         db_subscription = Subscription(**data, user_telegram_id=user.telegram_id)
 
@@ -67,9 +73,50 @@ class SubscriptionService(BaseService):
         )
 
         await self.clear_subscription_cache(db_subscription.id, db_subscription.user_telegram_id)
+        await self.statistics_service.on_subscription_created(subscription)
         logger.info(f"Created subscription '{db_subscription.id}' for user '{user.telegram_id}'")
         return SubscriptionDto.from_model(db_created_subscription)  # type: ignore[return-value]
 
+    async def create_many(
+        self, subscriptions: dict[int, SubscriptionDto]
+    ) -> dict[int, SubscriptionDto]:
+        if not subscriptions:
+            return {}
+
+        rows = [
+            {
+                **subscription.model_dump(exclude={"user"}),
+                "plan": subscription.plan.model_dump(mode="json"),
+                "plan_id": subscription.plan.id,
+                "user_telegram_id": telegram_id,
+            }
+            for telegram_id, subscription in subscriptions.items()
+        ]
+
+        async with self.uow:
+            db_subscriptions = await self.uow.repository.subscriptions.create_many(rows)
+            await self.uow.repository.users.bulk_set_current_subscriptions(
+                {s.user_telegram_id: s.id for s in db_subscriptions}
+            )
+
+        created = {
+            db_subscription.user_telegram_id: subscription
+            for db_subscription, subscription in zip(
+                db_subscriptions, SubscriptionDto.from_model_list(db_subscriptions)
+            )
+        }
+        cache_keys = [
+            key for s in db_subscriptions for key in self._cache_keys(s.id, s.user_telegram_id)
+        ]
+        await invalidate_cache(self.redis_client, *cache_keys)
+        await self.user_service.clear_users_cache(list(created))
+
+        for subscription in subscriptions.values():
+            await self.statistics_service.on_subscription_created(subscription)
+
+        logger.info(f"Created '{len(created)}' subscriptions")
+        return created
+
     @redis_cache(prefix="get_subscription", ttl=TIME_5M)
     async def get(self, subscription_id: int) -> Optional[SubscriptionDto]:
         async with self.uow:
@@ -82,10 +129,10 @@ class SubscriptionService(BaseService):
 
         return SubscriptionDto.from_model(db_subscription)
 
-    @redis_cache(prefix="get_current_subscription", ttl=TIME_1M)
+    @redis_cache(prefix="get_current_subscription", ttl=TIME_1M, local_ttl=CACHE_LOCAL_TTL)
     async def get_current(self, telegram_id: int) -> Optional[SubscriptionDto]:
         async with self.uow:
-            db_user = await self.uow.repository.users.get(telegram_id)
+            db_user = await self.uow.repository.users.get(telegram_id, profile=LoadProfile.BARE)
 
             if not db_user or not db_user.current_subscription_id:
                 logger.debug(
@@ -94,7 +141,10 @@ class SubscriptionService(BaseService):
                 return None
 
             subscription_id = db_user.current_subscription_id
-            db_active_subscription = await self.uow.repository.subscriptions.get(subscription_id)
+            db_active_subscription = await self.uow.repository.subscriptions.get(
+                subscription_id,
+                profile=LoadProfile.BARE,
+            )
 
         if db_active_subscription:
             logger.debug(
@@ -123,19 +173,41 @@ class SubscriptionService(BaseService):
         logger.debug(f"Retrieved '{len(db_subscriptions)}' total subscriptions")
         return SubscriptionDto.from_model_list(db_subscriptions)
 
-    async def update(self, subscription: SubscriptionDto) -> Optional[SubscriptionDto]:
-        data = subscription.changed_data.copy()
+    async def get_all_current(
+        self,
+        telegram_ids: Optional[list[int]] = None,
+    ) -> dict[int, SubscriptionDto]:
+        async with self.uow:
+            db_subscriptions = await self.uow.repository.subscriptions.get_all_current(telegram_ids)
 
-        if subscription.plan.changed_data or "plan" in data:
-            data["plan"] = subscription.plan.model_dump(mode="json")
+        logger.debug(f"Retrieved '{len(db_subscriptions)}' current subscriptions")
+        return {
+            db_subscription.user_telegram_id: subscription
+            for db_subscription in db_subscriptions
+            if (subscription := SubscriptionDto.from_model(db_subscription))
+        }
+
+    async def update(self, subscription: SubscriptionDto) -> Optional[SubscriptionDto]:
+        data = self._prepare_update_data(subscription)
+        old_status: Optional[SubscriptionStatus] = None
 
         async with self.uow:
+            if "status" in data:
+                old_status = await self.uow.repository.subscriptions.get_status(
+                    subscription.id,  # type: ignore[arg-type]
+                )
+
             db_updated_subscription = await self.uow.repository.subscriptions.update(
                 subscription_id=subscription.id,  # type: ignore[arg-type]
                 **data,
             )
 
         if db_updated_subscription:
+            if old_status is not None:
+                await self.statistics_service.on_subscription_status_changed(
+                    subscription,
+                    old_status,
+                )
             await self.clear_subscription_cache(
                 db_updated_subscription.id,
                 db_updated_subscription.user_telegram_id,
@@ -150,6 +222,37 @@ class SubscriptionService(BaseService):
 
         return SubscriptionDto.from_model(db_updated_subscription)
 
+    async def update_many(self, subscriptions: dict[int, SubscriptionDto]) -> int:
+        changes = {
+            subscription.id: (telegram_id, subscription, data)
+            for telegram_id, subscription in subscriptions.items()
+            if subscription.id and (data := self._prepare_update_data(subscription))
+        }
+
+        if not changes:
+            return 0
+
+        status_changed = [id_ for id_, (*_, data) in changes.items() if "status" in data]
+
+        async with self.uow:
+            old_statuses = await self.uow.repository.subscriptions.get_statuses(status_changed)
+            await self.uow.repository.subscriptions.bulk_update(
+                [{"id": id_, **data} for id_, (*_, data) in changes.items()]
+            )
+
+        for subscription_id, old_status in old_statuses.items():
+            _, subscription, _ = changes[subscription_id]
+            await self.statistics_service.on_subscription_status_changed(subscription, old_status)
+
+        cache_keys = [
+            key
+            for subscription_id, (telegram_id, *_) in changes.items()
+            for key in self._cache_keys(subscription_id, telegram_id)
+        ]
+        await invalidate_cache(self.redis_client, *cache_keys)
+        logger.info(f"Bulk updated '{len(changes)}' subscriptions")
+        return len(changes)
+
     @redis_cache(prefix="has_used_trial", ttl=TIME_10M)
     async def has_used_trial(self, user_telegram_id: int) -> bool:
         conditions = and_(
@@ -164,14 +267,31 @@ class SubscriptionService(BaseService):
         return count > 0
 
     async def clear_subscription_cache(self, subscription_id: int, user_telegram_id: int) -> None:
-        list_cache_keys_to_invalidate = [
+        list_cache_keys_to_invalidate = self._cache_keys(subscription_id, user_telegram_id)
+        await invalidate_cache(self.redis_client, *list_cache_keys_to_invalidate)
+        logger.debug(f"Cache for subscription '{subscription_id}' invalidated")
+
+    @staticmethod
+    def _cache_keys(subscription_id: int, user_telegram_id: int) -> list[str]:
+        return [
             build_key("cache", "get_subscription", subscription_id),
             build_key("cache", "get_current_subscription", user_telegram_id),
             build_key("cache", "has_used_trial", user_telegram_id),
         ]
 
-        await self.redis_client.delete(*list_cache_keys_to_invalidate)
-        logger.debug(f"Cache for subscription '{subscription_id}' invalidated")
+    @staticmethod
+    def _prepare_update_data(subscription: SubscriptionDto) -> dict[str, Any]:
+        data = subscription.changed_data.copy()
+
+        if subscription.plan.changed_data or "plan" in data:
+            data["plan"] = subscription.plan.model_dump(mode="json")
+            data["plan_id"] = subscription.plan.id
+
+        # Local edits make the stored panel fingerprint stale
+        if data and "sync_fingerprint" not in data:
+            data["sync_fingerprint"] = None
+
+        return data
 
     @staticmethod
     def subscriptions_match(
@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import timedelta
+from typing import Optional, cast
 from uuid import UUID
 
 from aiogram import Bot
@@ -7,17 +8,20 @@ from loguru import logger
 from redis.asyncio import Redis
 
 from src.core.config import AppConfig
+from src.core.constants import TRANSACTION_PENDING_TTL
 from src.core.enums import TransactionStatus
 from src.infrastructure.database import UnitOfWork
 from src.infrastructure.database.models.dto import TransactionDto, UserDto
 from src.infrastructure.database.models.sql import Transaction
 from src.infrastructure.redis import RedisRepository
+from src.services.statistics import StatisticsService
 
 from .base import BaseService
 
 
 class TransactionService(BaseService):
     uow: UnitOfWork
+    statistics_service: StatisticsService
 
     def __init__(
         self,
@@ -28,9 +32,11 @@ class TransactionService(BaseService):
         translator_hub: TranslatorHub,
         #
         uow: UnitOfWork,
+        statistics_service: StatisticsService,
     ) -> None:
         super().__init__(config, bot, redis_client, redis_repository, translator_hub)
         self.uow = uow
+        self.statistics_service = statistics_service
 
     async def create(self, user: UserDto, transaction: TransactionDto) -> TransactionDto:
         data = transaction.model_dump(exclude={"user"})
@@ -42,6 +48,7 @@ class TransactionService(BaseService):
         async with self.uow:
             db_created_transaction = await self.uow.repository.transactions.create(db_transaction)
 
+        await self.statistics_service.on_transaction_created(transaction)
         logger.info(f"Created transaction '{transaction.payment_id}' for user '{user.telegram_id}'")
         return TransactionDto.from_model(db_created_transaction)  # type: ignore[return-value]
 
@@ -85,6 +92,8 @@ class TransactionService(BaseService):
             )
 
         if db_updated_transaction:
+            if transaction.changed_data.get("status") == TransactionStatus.COMPLETED:
+                await self.statistics_service.on_transaction_completed(transaction)
             logger.info(f"Updated transaction '{transaction.payment_id}' successfully")
         else:
             logger.warning(
@@ -94,6 +103,48 @@ class TransactionService(BaseService):
 
         return TransactionDto.from_model(db_updated_transaction)
 
+    async def transition(
+        self,
+        payment_id: UUID,
+        status: TransactionStatus,
+        expected: TransactionStatus = TransactionStatus.PENDING,
+    ) -> Optional[TransactionDto]:
+        async with self.uow:
+            db_transaction = await self.uow.repository.transactions.transition(
+                payment_id,
+                from_status=expected,
+                to_status=status,
+            )
+
+        if not db_transaction:
+            logger.warning(
+                f"Transaction '{payment_id}' is missing or no longer '{expected}', "
+                f"skipping transition to '{status}'"
+            )
+            return None
+
+        transaction = cast(TransactionDto, TransactionDto.from_model(db_transaction))
+
+        if status == TransactionStatus.COMPLETED:
+            await self.statistics_service.on_transaction_completed(transaction)
+
+        logger.info(f"Transaction '{payment_id}' moved from '{expected}' to '{status}'")
+        return transaction
+
+    async def cancel_stale(self) -> int:
+        async with self.uow:
+            payment_ids = await self.uow.repository.transactions.cancel_stale(
+                older_than=timedelta(seconds=TRANSACTION_PENDING_TTL)
+            )
+
+        if payment_ids:
+            logger.info(f"Canceled '{len(payment_ids)}' stale pending transactions")
+            logger.debug(f"Canceled transactions: {[str(p) for p in payment_ids]}")
+        else:
+            logger.debug("No stale pending transactions found")
+
+        return len(payment_ids)
+
     async def count(self) -> int:
         async with self.uow:
             count = await self.uow.repository.transactions.count()
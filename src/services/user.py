@@ -1,147 +1,370 @@
-from typing import Any, Awaitable, Callable, Optional
+from typing import Optional, Sequence, cast
 
-from aiogram.types import Message, TelegramObject
+from aiogram import Bot
+from aiogram.types import Message
 from aiogram.types import User as AiogramUser
-from aiogram_dialog.api.internal import FakeUser
-from dishka import AsyncContainer
+from fluentogram import TranslatorHub
 from loguru import logger
+from redis.asyncio import Redis
 
-from src.bot.keyboards import get_user_keyboard
 from src.core.config import AppConfig
-from src.core.constants import CONTAINER_KEY, IS_SUPER_DEV_KEY, USER_KEY
-from src.core.enums import MiddlewareEventType, SystemNotificationType
-from src.core.storage.keys import StartSpamGuardKey
-from src.core.utils.message_payload import MessagePayload
+from src.core.constants import RECENT_ACTIVITY_MAX_COUNT, RECENT_REGISTERED_MAX_COUNT, TIME_5M
+from src.core.enums import Locale, UserRole
+from src.core.storage.key_builder import build_key
+from src.core.storage.keys import PendingProfileUpdatesKey, RecentActivityUsersKey
+from src.core.utils import json_utils
+from src.core.utils.generators import generate_referral_code
+from src.core.utils.time import datetime_now
+from src.core.utils.types import RemnaUserDto
+from src.infrastructure.database import UnitOfWork
 from src.infrastructure.database.models.dto import UserDto
+from src.infrastructure.database.models.sql import User
+from src.infrastructure.database.repositories import LoadProfile
 from src.infrastructure.redis import RedisRepository
-from src.services.notification import NotificationService
-from src.services.referral import ReferralService
-from src.services.user import UserService
+from src.infrastructure.redis.cache import invalidate_cache, redis_cache
+from src.services.statistics import StatisticsService
 
-from .base import EventTypedMiddleware
+from .base import BaseService
 
 
-class UserMiddleware(EventTypedMiddleware):
-    _START_SPAM_WINDOW_SECONDS = 10
-    _START_SPAM_THRESHOLD = 5
+class UserService(BaseService):
+    uow: UnitOfWork
+    statistics_service: StatisticsService
 
-    __event_types__ = [
-        MiddlewareEventType.MESSAGE,
-        MiddlewareEventType.CALLBACK_QUERY,
-        MiddlewareEventType.ERROR,
-        MiddlewareEventType.AIOGD_UPDATE,
-        MiddlewareEventType.MY_CHAT_MEMBER,
-        MiddlewareEventType.PRE_CHECKOUT_QUERY,
-    ]
+    def __init__(
+        self,
+        config: AppConfig,
+        bot: Bot,
+        redis_client: Redis,
+        redis_repository: RedisRepository,
+        translator_hub: TranslatorHub,
+        #
+        uow: UnitOfWork,
+        statistics_service: StatisticsService,
+    ) -> None:
+        super().__init__(config, bot, redis_client, redis_repository, translator_hub)
+        self.uow = uow
+        self.statistics_service = statistics_service
+
+    async def create(self, aiogram_user: AiogramUser) -> UserDto:
+        user = UserDto(
+            telegram_id=aiogram_user.id,
+            username=aiogram_user.username,
+            referral_code=self._generate_referral_code(aiogram_user.id),
+            name=aiogram_user.full_name,
+            role=UserRole.DEV if aiogram_user.id == self.config.bot.dev_id else UserRole.USER,
+            language=self._get_locale(aiogram_user.language_code),
+        )
+        return await self._create(user)
+
+    async def create_from_panel(self, remna_user: RemnaUserDto) -> UserDto:
+        telegram_id = cast(int, remna_user.telegram_id)
+        user = UserDto(
+            telegram_id=telegram_id,
+            referral_code=self._generate_referral_code(telegram_id),
+            name=str(telegram_id),
+            role=UserRole.USER,
+            language=self.config.default_locale,
+        )
+        return await self._create(user)
+
+    async def create_many_from_panel(self, remna_users: Sequence[RemnaUserDto]) -> list[UserDto]:
+        users = [
+            UserDto(
+                telegram_id=telegram_id,
+                referral_code=self._generate_referral_code(telegram_id),
+                name=str(telegram_id),
+                role=UserRole.USER,
+                language=self.config.default_locale,
+            )
+            for telegram_id in (cast(int, u.telegram_id) for u in remna_users)
+        ]
+
+        if not users:
+            return []
+
+        async with self.uow:
+            db_users = await self.uow.repository.users.create_many(
+                [
+                    user.model_dump(
+                        exclude={"id", "current_subscription", "created_at", "updated_at"}
+                    )
+                    for user in users
+                ]
+            )
+
+        await self.clear_users_cache([user.telegram_id for user in users])
+        await self.statistics_service.on_user_created(len(db_users))
+
+        logger.info(f"Created '{len(db_users)}' users from panel")
+        return UserDto.from_model_list(db_users)
+
+    async def get(self, telegram_id: int) -> Optional[UserDto]:
+        async with self.uow:
+            db_user = await self.uow.repository.users.get(
+                telegram_id,
+                profile=LoadProfile.WITH_CURRENT_SUBSCRIPTION,
+            )
+
+        if db_user:
+            logger.debug(f"Retrieved user '{telegram_id}'")
+        else:
+            logger.debug(f"User '{telegram_id}' not found")
+
+        return UserDto.from_model(db_user)
+
+    async def get_by_referral_code(self, referral_code: str) -> Optional[UserDto]:
+        async with self.uow:
+            db_user = await self.uow.repository.users.get_by_referral_code(referral_code)
+
+        return UserDto.from_model(db_user)
+
+    async def get_by_ids(self, telegram_ids: list[int]) -> list[UserDto]:
+        async with self.uow:
+            db_users = await self.uow.repository.users.get_by_ids(
+                telegram_ids,
+                profile=LoadProfile.BARE,
+            )
+
+        logger.debug(f"Retrieved '{len(db_users)}' of '{len(telegram_ids)}' requested users")
+        return UserDto.from_model_list(db_users)
+
+    async def get_all(self) -> list[UserDto]:
+        async with self.uow:
+            db_users = await self.uow.repository.users.get_all(profile=LoadProfile.BARE)
+
+        logger.debug(f"Retrieved '{len(db_users)}' users")
+        return UserDto.from_model_list(db_users)
+
+    async def count(self) -> int:
+        async with self.uow:
+            count = await self.uow.repository.users.count()
+
+        logger.debug(f"Total users count: '{count}'")
+        return count
+
+    @redis_cache(prefix="get_users_by_role", ttl=TIME_5M)
+    async def get_by_role(self, role: UserRole) -> list[UserDto]:
+        async with self.uow:
+            db_users = await self.uow.repository.users.filter_by_role(role)
+
+        logger.debug(f"Retrieved '{len(db_users)}' users with role '{role}'")
+        return UserDto.from_model_list(db_users)
+
+    async def get_blocked_users(self) -> list[UserDto]:
+        async with self.uow:
+            db_users = await self.uow.repository.users.filter_by_blocked(blocked=True)
+
+        logger.debug(f"Retrieved '{len(db_users)}' blocked users")
+        return UserDto.from_model_list(list(reversed(db_users)))
+
+    async def update(self, user: UserDto) -> Optional[UserDto]:
+        async with self.uow:
+            db_updated_user = await self.uow.repository.users.update(
+                telegram_id=user.telegram_id,
+                **user.prepare_changed_data(),
+            )
+
+        if db_updated_user:
+            await self.clear_user_cache(user.telegram_id)
+            logger.info(f"Updated user '{user.telegram_id}' successfully")
+        else:
+            logger.warning(
+                f"Attempted to update user '{user.telegram_id}', "
+                "but user was not found or update failed"
+            )
+
+        return UserDto.from_model(db_updated_user)
+
+    async def set_block(self, user: UserDto, blocked: bool) -> None:
+        user.is_blocked = blocked
+        await self.update(user)
+        logger.info(f"Set block '{blocked}' for user '{user.telegram_id}'")
+
+    async def set_bot_blocked(self, user: UserDto, blocked: bool) -> None:
+        user.is_bot_blocked = blocked
+        await self.update(user)
+        logger.info(f"Set bot blocked '{blocked}' for user '{user.telegram_id}'")
+
+    async def set_role(self, user: UserDto, role: UserRole) -> None:
+        user.role = role
+        await self.update(user)
+        logger.info(f"Set role '{role}' for user '{user.telegram_id}'")
+
+    async def add_points(self, user: UserDto, points: int) -> None:
+        user.points = max(0, user.points + points)
+        await self.update(user)
+        logger.info(f"Added '{points}' points to user '{user.telegram_id}'")
+
+    async def set_current_subscription(self, telegram_id: int, subscription_id: int) -> None:
+        async with self.uow:
+            await self.uow.repository.users.update(
+                telegram_id=telegram_id,
+                current_subscription_id=subscription_id,
+            )
 
-    async def middleware_logic(
+        await self.clear_user_cache(telegram_id)
+        logger.info(f"Set current subscription '{subscription_id}' for user '{telegram_id}'")
+
+    async def delete_current_subscription(self, telegram_id: int) -> None:
+        async with self.uow:
+            await self.uow.repository.users.update(
+                telegram_id=telegram_id,
+                current_subscription_id=None,
+            )
+
+        await self.clear_user_cache(telegram_id)
+        logger.info(f"Deleted current subscription for user '{telegram_id}'")
+
+    async def clear_user_cache(self, telegram_id: int) -> None:
+        await invalidate_cache(self.redis_client, *self._role_cache_keys())
+        logger.debug(f"Cache for user '{telegram_id}' invalidated")
+
+    async def clear_users_cache(self, telegram_ids: list[int]) -> None:
+        await invalidate_cache(self.redis_client, *self._role_cache_keys())
+        logger.debug(f"Cache for '{len(telegram_ids)}' users invalidated")
+
+    #
+
+    async def track_activity(
         self,
-        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
-        event: TelegramObject,
-        data: dict[str, Any],
-    ) -> Any:
-        aiogram_user: Optional[AiogramUser] = self._get_aiogram_user(event)
-
-        if aiogram_user is None or aiogram_user.is_bot:
-            logger.warning("Terminating middleware: event from bot or missing user")
-            return
-
-        container: AsyncContainer = data[CONTAINER_KEY]
-        config: AppConfig = await container.get(AppConfig)
-        redis_repository: RedisRepository = await container.get(RedisRepository)
-        user_service: UserService = await container.get(UserService)
-        referral_service: ReferralService = await container.get(ReferralService)
-        notification_service: NotificationService = await container.get(NotificationService)
-
-        is_start = self._is_start_command(event)
-        start_is_spam = False
-        if is_start:
-            start_is_spam = await self._is_start_spam(redis_repository, aiogram_user.id)
-
-        user: Optional[UserDto] = await user_service.get(telegram_id=aiogram_user.id)
-
-        if user is None:
-            user = await user_service.create(aiogram_user)
-
-            referrer = await referral_service.get_referrer_by_event(event, user.telegram_id)
-
-            base_i18n_kwargs = {
-                "user_id": str(user.telegram_id),
-                "user_name": user.name,
-                "username": user.username or False,
-            }
-
-            if referrer:
-                referrer_i18n_kwargs = {
-                    "has_referrer": True,
-                    "referrer_user_id": str(referrer.telegram_id),
-                    "referrer_user_name": referrer.name,
-                    "referrer_username": referrer.username or False,
-                }
-            else:
-                referrer_i18n_kwargs = {"has_referrer": False}
-
-            should_notify_admin = not (is_start and start_is_spam)
-
-            if should_notify_admin:
-                await notification_service.system_notify(
-                    payload=MessagePayload.not_deleted(
-                        i18n_key="ntf-event-new-user",
-                        i18n_kwargs={**base_i18n_kwargs, **referrer_i18n_kwargs},
-                        reply_markup=get_user_keyboard(user.telegram_id),
-                    ),
-                    ntf_type=SystemNotificationType.USER_REGISTERED,
+        user: UserDto,
+        aiogram_user: Optional[AiogramUser] = None,
+    ) -> None:
+        if aiogram_user is not None:
+            if user.username != aiogram_user.username:
+                user.username = aiogram_user.username
+
+            if user.name != aiogram_user.full_name:
+                user.name = aiogram_user.full_name
+
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            # Profile changes are written to the database by flush_pending_updates
+            if {"name", "username"} & user.changed_data.keys():
+                logger.debug(
+                    f"User '{user.telegram_id}' profile changed: {list(user.changed_data)}"
                 )
-            else:
-                logger.warning(
-                    "Start spam protection enabled: skipping admin notification "
-                    f"(window={self._START_SPAM_WINDOW_SECONDS}s, threshold={self._START_SPAM_THRESHOLD}, user_id={aiogram_user.id})"
+                pipe.hset(
+                    PendingProfileUpdatesKey().pack(),
+                    str(user.telegram_id),
+                    json_utils.encode({"name": user.name, "username": user.username}),
                 )
 
-            if await referral_service.is_referral_event(event, user.telegram_id):
-                referral_code = await referral_service.get_ref_code_by_event(event)
-                logger.info(f"Registered with referral code: '{referral_code}'")
-                await referral_service.handle_referral(user, referral_code)
+            pipe.zadd(
+                RecentActivityUsersKey().pack(),
+                {str(user.telegram_id): datetime_now().timestamp()},
+            )
+            await pipe.execute()
 
-        elif not isinstance(aiogram_user, FakeUser):
-            await user_service.compare_and_update(user, aiogram_user)
+    async def flush_pending_updates(self) -> int:
+        key = PendingProfileUpdatesKey().pack()
 
-        await user_service.update_recent_activity(telegram_id=user.telegram_id)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hgetall(key)
+            pipe.delete(key)
+            pending, _ = await pipe.execute()
 
-        data[USER_KEY] = user
-        data[IS_SUPER_DEV_KEY] = user.telegram_id == config.bot.dev_id
+        await self.redis_client.zremrangebyrank(
+            RecentActivityUsersKey().pack(),
+            0,
+            -RECENT_ACTIVITY_MAX_COUNT - 2,
+        )
 
-        return await handler(event, data)
+        if not pending:
+            return 0
 
-    @staticmethod
-    def _is_start_command(event: TelegramObject) -> bool:
-        if not isinstance(event, Message) or not event.text:
-            return False
-        cmd = event.text.split(maxsplit=1)[0].lower()
-        return cmd == "/start" or cmd.startswith("/start@")
-
-    async def _is_start_spam(self, redis_repository: RedisRepository, user_id: int) -> bool:
-        base_key = StartSpamGuardKey().pack()
-        key = f"{base_key}:{user_id}"
+        profiles = [
+            {"telegram_id": int(telegram_id), **json_utils.decode(profile)}
+            for telegram_id, profile in pending.items()
+        ]
 
         try:
-            count = await redis_repository.client.incr(key)
-
-            if count == 1:
-                await redis_repository.client.expire(key, self._START_SPAM_WINDOW_SECONDS)
-            else:
-                ttl = await redis_repository.client.ttl(key)
-                if ttl == -1:
-                    await redis_repository.client.expire(key, self._START_SPAM_WINDOW_SECONDS)
-
-            if count == self._START_SPAM_THRESHOLD:
-                logger.warning(
-                    "Start spam threshold reached, admin notifications will be suppressed "
-                    f"for ~{self._START_SPAM_WINDOW_SECONDS}s (user_id={user_id})"
-                )
+            async with self.uow:
+                updated = await self.uow.repository.users.bulk_update_profiles(profiles)
+        except Exception:
+            # Put the batch back without overwriting changes buffered in the meantime
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for telegram_id, profile in pending.items():
+                    pipe.hsetnx(key, telegram_id, profile)
+                await pipe.execute()
+            raise
 
-            return count >= self._START_SPAM_THRESHOLD
+        await invalidate_cache(self.redis_client, *self._role_cache_keys())
+        logger.info(f"Flushed '{updated}' buffered profile updates")
+        return updated
 
-        except Exception:
-            logger.exception("Start spam guard failed (redis issue). Proceeding without suppression.")
-            return False
+    async def get_recent_activity_users(
+        self,
+        excluded_ids: Optional[list[int]] = None,
+    ) -> list[UserDto]:
+        excluded = set(excluded_ids or [])
+        telegram_ids = [
+            int(telegram_id)
+            for telegram_id in await self.redis_repository.sorted_collection_revrange(
+                RecentActivityUsersKey(),
+                0,
+                -1,
+            )
+            if int(telegram_id) not in excluded
+        ][:RECENT_ACTIVITY_MAX_COUNT]
+
+        async with self.uow:
+            db_users = await self.uow.repository.users.get_by_ids(telegram_ids)
+
+        users = {user.telegram_id: user for user in UserDto.from_model_list(db_users)}
+        return [users[telegram_id] for telegram_id in telegram_ids if telegram_id in users]
+
+    async def get_recent_registered_users(self) -> list[UserDto]:
+        async with self.uow:
+            db_users = await self.uow.repository.users.get_recent_registered(
+                limit=RECENT_REGISTERED_MAX_COUNT,
+            )
+
+        return UserDto.from_model_list(db_users)
+
+    async def search_users(self, message: Message) -> list[UserDto]:
+        if message.forward_from and not message.forward_from.is_bot:
+            user = await self.get(message.forward_from.id)
+            return [user] if user else []
+
+        query = message.text.strip() if message.text else None
+
+        if not query:
+            return []
+
+        if query.isdigit():
+            user = await self.get(int(query))
+            return [user] if user else []
+
+        async with self.uow:
+            db_users = await self.uow.repository.users.get_by_partial_name(query.lstrip("@"))
+
+        logger.debug(f"Search for '{query}' found '{len(db_users)}' users")
+        return UserDto.from_model_list(db_users)
+
+    #
+
+    async def _create(self, user: UserDto) -> UserDto:
+        db_user = User(
+            **user.model_dump(exclude={"id", "current_subscription", "created_at", "updated_at"})
+        )
+
+        async with self.uow:
+            db_created_user = await self.uow.repository.users.create(db_user)
+
+        await self.clear_user_cache(user.telegram_id)
+        await self.statistics_service.on_user_created()
+        logger.info(f"Created new user '{user.telegram_id}'")
+        return UserDto.from_model(db_created_user)  # type: ignore[return-value]
+
+    def _role_cache_keys(self) -> list[str]:
+        return [build_key("cache", "get_users_by_role", role) for role in UserRole]
+
+    def _generate_referral_code(self, telegram_id: int) -> str:
+        return generate_referral_code(telegram_id, self.config.crypt_key.get_secret_value())
+
+    def _get_locale(self, language_code: Optional[str]) -> Locale:
+        if language_code and language_code in self.config.locales:
+            return Locale(language_code)
+
+        return self.config.default_locale
@@ -44,12 +44,15 @@ class WebhookService(BaseService):
 
         return await self.bot.get_webhook_info()
 
-    async def delete(self) -> None:
-        if not self.config.bot.reset_webhook:
+    async def delete(self, force: bool = False) -> None:
+        if not self.config.bot.reset_webhook and not force:
             logger.debug("Bot webhook reset is disabled")
             return
 
-        if await self.bot.delete_webhook():
+        # Only switching to polling may drop the backlog, a shutdown keeps it for the restart
+        drop_pending_updates = force and self.config.bot.drop_pending_updates
+
+        if await self.bot.delete_webhook(drop_pending_updates=drop_pending_updates):
             logger.info("Bot webhook deleted successfully")
             await self._clear(bot_id=self.bot.id)
         else: